@@ -1,38 +1,91 @@
 from flask import Flask, jsonify
+from core import database, metrics, startup
 from core.config import settings
-from .extensions import db, migrate, ma, cors
+from .extensions import db, ma, cors
 from .celery_app import celery, init_celery
 
 
-def create_app(config_object=settings):
+def create_app(config_object=settings, role=None):
+    """
+    `role` ('api' or 'worker', default PROCESS_ROLE) selects the database pool settings.
+    A worker app (Celery workers, the dispatcher) gets no HTTP routes, CORS or request metrics.
+    """
     app = Flask(__name__)
     app.config.from_object(config_object)
+    role = role or app.config.get("PROCESS_ROLE", "api")
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", database.engine_options(role))
 
-    db.init_app(app)
-    migrate.init_app(app, db)
+    with startup.phase("database"):
+        db.init_app(app)
+        with app.app_context():
+            database.configure_engine(db.engine, role)
     ma.init_app(app)
-    cors.init_app(
-        app, resources={r"/*": {"origins": app.config.get("CORS_ORIGINS", [])}}
-    )
 
     if not app.config.get("TESTING", False):
         init_celery(app, celery)
 
+    if role != "worker":
+        with startup.phase("http"):
+            _init_http(app)
+    else:
+        with startup.phase("job_logs"):
+            _ensure_job_log_partitions(app)
+
+    if app.config.get("METRICS_ENABLED", True):
+        with app.app_context():
+            metrics.instrument_engine(db.engine)
+
+    from .cli import job_logs_cli, jobs_cli, migrate_cli
+    app.cli.add_command(job_logs_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(migrate_cli)
+
+    with startup.phase("tasks"):
+        with app.app_context():
+            from . import tasks
+
+    startup.report(role)
+    return app
+
+
+def _ensure_job_log_partitions(app):
+    """Workers and the dispatcher write job logs; make sure they have partitions to go to."""
+    from .services import job_log_maintenance
+
+    try:
+        with app.app_context():
+            created = job_log_maintenance.ensure_partitions(db.engine)
+    except Exception as e:
+        print(f"Could not create job_logs partitions at startup: {e}")
+        return
+    if created:
+        print(f"Created job_logs partitions: {', '.join(created)}")
+
+
+def _init_http(app):
+    cors.init_app(
+        app,
+        resources={r"/*": {"origins": app.config.get("CORS_ORIGINS", [])}},
+        expose_headers=["X-Next-Cursor", "Upload-Offset"],
+    )
+
     from .routes.health import health_bp
     from .routes.bots import bots_bp
     from .routes.jobs import jobs_bp
+    from .routes.uploads import uploads_bp
+    from .routes.metrics import metrics_bp
 
     app.register_blueprint(health_bp, url_prefix=f"{settings.API_V1_STR}/health")
     app.register_blueprint(bots_bp, url_prefix=f"{settings.API_V1_STR}/bots")
     app.register_blueprint(jobs_bp, url_prefix=f"{settings.API_V1_STR}/jobs")
+    app.register_blueprint(uploads_bp, url_prefix=f"{settings.API_V1_STR}/uploads")
+
+    if app.config.get("METRICS_ENABLED", True):
+        app.register_blueprint(metrics_bp, url_prefix="/metrics")
+        metrics.init_app(app)
 
     @app.route("/")
     def index():
         return jsonify(
             message=f"Welcome to {settings.PROJECT_NAME}! API is at {settings.API_V1_STR}"
         )
-
-    with app.app_context():
-        from . import tasks
-
-    return app
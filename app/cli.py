@@ -0,0 +1,92 @@
+from contextlib import contextmanager
+
+import click
+from flask.cli import AppGroup, ScriptInfo
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import db
+from app.services import job_log_maintenance, job_query
+
+job_logs_cli = AppGroup("job-logs", help="Maintenance of the partitioned job_logs table.")
+jobs_cli = AppGroup("jobs", help="Maintenance of job tables.")
+
+
+class MigrateGroup(click.Group):
+    """
+    Stands in for Flask-Migrate's `flask db` group: Flask-Migrate imports Alembic, which
+    would add ~100 ms to every process start, so it is only set up when a `db` command runs.
+    """
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        from flask_migrate import Migrate
+        from flask_migrate.cli import db as db_group
+
+        app = parent.ensure_object(ScriptInfo).load_app()
+        if "migrate" not in app.extensions:
+            Migrate(app, db)
+        return db_group.make_context(info_name, args, parent=parent, **extra)
+
+
+migrate_cli = MigrateGroup("db", help="Perform database migrations (Flask-Migrate).")
+
+
+@contextmanager
+def _lock_timeout_reported():
+    """Turns a lock wait past MAINTENANCE_LOCK_TIMEOUT_MS into a short error instead of a traceback."""
+    try:
+        yield
+    except OperationalError as e:
+        # 55P03 lock_not_available: `lock_timeout` expired.
+        if getattr(e.orig, "pgcode", None) != "55P03":
+            raise
+        raise click.ClickException(
+            "Timed out waiting for a table lock held by running jobs or queries; "
+            "retry later or raise MAINTENANCE_LOCK_TIMEOUT_MS."
+        ) from e
+
+
+@job_logs_cli.command("partition")
+def partition_job_logs():
+    """
+    One-off after `flask db upgrade`: turn an existing plain job_logs table into the
+    partitioned one, or give a job_logs the migration just created its first partitions.
+    """
+    with _lock_timeout_reported():
+        converted = job_log_maintenance.partition_existing_table(db.engine)
+        created = [] if converted else job_log_maintenance.ensure_partitions(db.engine)
+    if converted:
+        click.echo("job_logs is now partitioned.")
+    else:
+        click.echo(f"job_logs is already partitioned; created {len(created)} missing partitions.")
+
+
+@job_logs_cli.command("maintain")
+@click.option("--compact/--no-compact", default=False, help="Also compact the logs of finished jobs.")
+def maintain_job_logs(compact):
+    """Create upcoming partitions, apply retention and optionally compact logs now."""
+    result = job_log_maintenance.maintain_partitions(db.engine)
+    click.echo(f"Created {result['created']}, dropped {result['dropped']}.")
+    if compact:
+        total = 0
+        while True:
+            compacted = job_log_maintenance.compact_finished_jobs(db.engine)
+            total += compacted
+            if not compacted:
+                break
+        click.echo(f"Compacted the logs of {total} jobs.")
+
+
+@jobs_cli.command("install-counters")
+def install_status_counters():
+    """Create the job_status_counters triggers on an existing database and count its jobs."""
+    with _lock_timeout_reported():
+        rows = job_query.install_status_counters(db.engine)
+    click.echo(f"Status counters installed ({rows} counter rows).")
+
+
+@jobs_cli.command("rebuild-counters")
+def rebuild_status_counters():
+    """Recount job_status_counters from the jobs table."""
+    with _lock_timeout_reported():
+        rows = job_query.rebuild_status_counters(db.engine)
+    click.echo(f"Status counters rebuilt ({rows} counter rows).")
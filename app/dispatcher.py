@@ -0,0 +1,197 @@
+import time
+import traceback
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from uuid import UUID
+
+import redis
+
+from app.extensions import db
+from app.services import job_log_maintenance, job_service, schedule_service
+from core import task_queue
+from core.config import settings
+from core.redis_client import get_redis
+
+
+class FairDispatcher:
+    """
+    Sends 'queued' jobs to Celery with deficit round robin across bots. Every round each
+    bot with a backlog earns `dispatch_weight * FAIR_DISPATCH_QUANTUM` credits and spends
+    one per job sent; the bot that goes first rotates between rounds. Bots with a
+    `max_concurrency` only receive jobs while their Redis semaphore has free slots, and
+    no more than `FAIR_DISPATCH_MAX_IN_FLIGHT` jobs wait in the Celery queue at once, so
+    the backlog stays in the jobs table instead of occupying worker prefetch slots.
+    """
+
+    def __init__(self):
+        self._deficits: Dict[UUID, float] = {}
+        self._rotation = 0
+
+    def tick(self) -> int:
+        budget = settings.FAIR_DISPATCH_MAX_IN_FLIGHT - job_service.count_jobs_with_status(db.session, "dispatched")
+        backlog = job_service.get_bots_with_queued_jobs(db.session) if budget > 0 else []
+        db.session.commit()
+        if not backlog:
+            return 0
+
+        active = {bot.id for bot in backlog}
+        self._deficits = {bot_id: deficit for bot_id, deficit in self._deficits.items() if bot_id in active}
+        start = self._rotation % len(backlog)
+        self._rotation += 1
+
+        sent = 0
+        for bot in backlog[start:] + backlog[:start]:
+            if budget <= 0:
+                break
+            quantum = max(bot.dispatch_weight or 1, 1) * settings.FAIR_DISPATCH_QUANTUM
+            deficit = self._deficits.get(bot.id, 0) + quantum
+            wanted = min(int(deficit), budget)
+            dispatched = self._dispatch_bot(bot, wanted) if wanted > 0 else 0
+            # Credit isn't banked beyond one quantum while a bot is blocked or drained.
+            self._deficits[bot.id] = min(deficit - dispatched, quantum)
+            budget -= dispatched
+            sent += dispatched
+        return sent
+
+    def _dispatch_bot(self, bot, wanted: int) -> int:
+        slot_key = job_service.bot_slot_key(bot.id)
+        if bot.max_concurrency:
+            try:
+                wanted = min(wanted, task_queue.available_slots(slot_key, bot.max_concurrency))
+            except redis.RedisError as e:
+                print(f"Dispatcher: could not read concurrency slots for bot {bot.id}: {e}")
+                return 0
+            if wanted <= 0:
+                return 0
+
+        claimed = job_service.claim_queued_jobs(db.session, bot.id, wanted)
+        if not claimed:
+            return 0
+
+        if bot.max_concurrency:
+            try:
+                acquired = set(task_queue.acquire_slots(
+                    slot_key, [str(job_id) for job_id, _ in claimed],
+                    bot.max_concurrency, settings.BOT_SLOT_LEASE_SECONDS,
+                ))
+            except redis.RedisError as e:
+                print(f"Dispatcher: could not acquire concurrency slots for bot {bot.id}: {e}")
+                acquired = set()
+            job_service.requeue_dispatched_jobs(
+                db.session, [job_id for job_id, _ in claimed if str(job_id) not in acquired]
+            )
+            claimed = [(job_id, task_id) for job_id, task_id in claimed if str(job_id) in acquired]
+
+        job_service.enqueue_jobs(db.session, claimed)
+        return len(claimed)
+
+
+class ScheduledJobDispatcher:
+    """
+    Queues 'scheduled' jobs once their `scheduled_at` has passed and fires due cron
+    schedules. The Redis sorted set `job_service.SCHEDULED_JOBS_KEY` is polled every
+    tick, so an idle tick costs one ZRANGEBYSCORE and no database query. Every
+    `SCHEDULER_RECONCILE_INTERVAL` seconds (and whenever Redis is unreachable) the
+    partial index on `jobs.scheduled_at` is scanned instead, picking up jobs the
+    Redis index missed. Claims use SKIP LOCKED, so replicas can run side by side.
+    Cron schedules (minute resolution) are checked at most every `CRON_CHECK_INTERVAL`.
+    """
+
+    CRON_CHECK_INTERVAL = 1.0
+
+    def __init__(self):
+        self._reconciled_at = 0.0
+        self._cron_checked_at = 0.0
+        self._index_checked = False
+
+    def tick(self) -> int:
+        now = datetime.now(timezone.utc)
+        batch_size = settings.SCHEDULER_BATCH_SIZE
+
+        claimed = []
+        if time.monotonic() - self._cron_checked_at >= self.CRON_CHECK_INTERVAL:
+            claimed = schedule_service.fire_due_schedules(db.session, now, batch_size)
+            if len(claimed) < batch_size:
+                self._cron_checked_at = time.monotonic()
+
+        due_ids = self._due_from_index(now, batch_size)
+        if due_ids is None or time.monotonic() - self._reconciled_at >= settings.SCHEDULER_RECONCILE_INTERVAL:
+            self._reconciled_at = time.monotonic()
+            scheduled = job_service.claim_due_scheduled_jobs(db.session, now, batch_size)
+            job_service.unindex_scheduled_jobs([job_id for job_id, _ in scheduled])
+        elif due_ids:
+            scheduled = job_service.claim_due_scheduled_jobs(db.session, now, batch_size, job_ids=due_ids)
+            # Ids that weren't claimed are cancelled, already queued or held by another
+            # replica (which removes them itself); none of them must block the index head.
+            job_service.unindex_scheduled_jobs(due_ids)
+        else:
+            scheduled = []
+        claimed += scheduled
+
+        if claimed and settings.JOB_DISPATCH_MODE != "fair":
+            job_service.enqueue_jobs(db.session, claimed)
+        return len(claimed)
+
+    def _due_from_index(self, now: datetime, limit: int) -> Optional[List[UUID]]:
+        try:
+            if not self._index_checked:
+                if not get_redis().exists(job_service.SCHEDULED_JOBS_KEY):
+                    indexed = job_service.rebuild_scheduled_index(db.session)
+                    print(f"Scheduler: rebuilt the Redis due-time index ({indexed} jobs).")
+                self._index_checked = True
+            return job_service.get_due_scheduled_job_ids(now, limit)
+        except redis.RedisError as e:
+            self._index_checked = False
+            print(f"Scheduler: Redis due-time index unavailable, scanning the database: {e}")
+            return None
+
+
+class JobLogMaintainer:
+    """
+    Keeps `job_logs` partitions created ahead and drops those past JOB_LOG_RETENTION_DAYS
+    every `JOB_LOG_MAINTENANCE_INTERVAL`. With JOB_LOG_COMPACTION_ENABLED each tick also
+    compacts the logs of one batch of finished jobs, running again right away while
+    there is a backlog.
+    """
+
+    def __init__(self):
+        self._maintained_at: Optional[float] = None
+
+    def tick(self) -> int:
+        if self._maintained_at is None or time.monotonic() - self._maintained_at >= settings.JOB_LOG_MAINTENANCE_INTERVAL:
+            self._maintained_at = time.monotonic()
+            result = job_log_maintenance.maintain_partitions(db.engine)
+            if result["created"] or result["dropped"]:
+                print(f"Job log maintenance: created {result['created']}, dropped {result['dropped']}.")
+        if not settings.JOB_LOG_COMPACTION_ENABLED:
+            return 0
+        return job_log_maintenance.compact_finished_jobs(db.engine)
+
+
+def run_forever() -> None:
+    """
+    Dispatcher main loop: queues due scheduled jobs and, with `JOB_DISPATCH_MODE=fair`,
+    also runs the fair dispatcher; maintains job_logs partitions unless
+    JOB_LOG_MAINTENANCE_INTERVAL is 0. Must run inside an application context.
+    """
+    components = [(ScheduledJobDispatcher(), settings.SCHEDULER_INTERVAL)]
+    if settings.JOB_DISPATCH_MODE == "fair":
+        components.append((FairDispatcher(), settings.FAIR_DISPATCH_INTERVAL))
+    if settings.JOB_LOG_MAINTENANCE_INTERVAL > 0:
+        components.append((JobLogMaintainer(), settings.JOB_LOG_MAINTENANCE_INTERVAL))
+    next_ticks = [0.0] * len(components)
+    print(f"Dispatcher started (mode {settings.JOB_DISPATCH_MODE}, scheduler interval {settings.SCHEDULER_INTERVAL}s).")
+    while True:
+        for i, (component, interval) in enumerate(components):
+            now = time.monotonic()
+            if now < next_ticks[i]:
+                continue
+            try:
+                sent = component.tick()
+            except Exception as e:
+                db.session.rollback()
+                print(f"{type(component).__name__} tick failed: {e}\n{traceback.format_exc()}")
+                sent = 0
+            # A component that made progress runs again right away; an idle one waits its interval.
+            next_ticks[i] = now if sent else now + interval
+        time.sleep(max(0.0, min(next_ticks) - time.monotonic()))
@@ -0,0 +1,649 @@
+import asyncio
+import importlib
+import multiprocessing
+import os
+import pkgutil
+import queue
+import resource
+import signal
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from app import script_registry
+from app.extensions import db
+from app.job_control import JobCancelled, JobControl
+from app.models.bot_model import BotConfiguration
+from app.services import artifact_service, upload_service
+from core import redis_client
+from core.config import settings
+
+try:
+    from gevent import monkey as _gevent_monkey
+except ImportError:
+    _gevent_monkey = None
+
+EXECUTION_MODES = ("inline", "thread", "subprocess")
+
+
+def _original(module_name: str, name: str):
+    """`module_name.name` as it was before gevent monkey-patching (if gevent is in use at all)."""
+    if _gevent_monkey is not None:
+        return _gevent_monkey.get_original(module_name, name)
+    return getattr(importlib.import_module(module_name), name)
+
+
+# Scripts in 'thread' mode run on a real OS thread even in a gevent worker.
+_start_native_thread = _original("_thread", "start_new_thread")
+_allocate_native_lock = _original("_thread", "allocate_lock")
+_native_sleep = _original("time", "sleep")
+# gevent swaps in a cooperative selector that can't run on a native thread; the event loop for async scripts needs the real one.
+_native_selector = _original("selectors", "DefaultSelector")
+
+
+class ScriptFailed(Exception):
+    """The script raised (or its process died) in thread or subprocess mode."""
+
+    def __init__(self, message: str, remote_traceback: Optional[str] = None):
+        super().__init__(message)
+        self.remote_traceback = remote_traceback
+
+
+class ScriptTimeout(ScriptFailed):
+    """The script exceeded the bot's `timeout_seconds`."""
+
+
+class ScriptCancelTimeout(JobCancelled):
+    """Cancellation was requested, but the script didn't stop within `JOB_CANCEL_GRACE_SECONDS`."""
+
+
+class _Flag:
+    """Minimal cancel flag for thread mode (multiprocessing.Event plays this role for subprocesses)."""
+
+    def __init__(self):
+        self._set = False
+
+    def set(self) -> None:
+        self._set = True
+
+    def clear(self) -> None:
+        self._set = False
+
+    def is_set(self) -> bool:
+        return self._set
+
+
+class _TaskCancelFlag(_Flag):
+    """Cancel flag for async scripts on the shared event loop: setting it also cancels the script's task."""
+
+    def __init__(self):
+        super().__init__()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def attach(self, task: asyncio.Task) -> None:
+        self._loop = task.get_loop()
+        self._task = task
+        if self.is_set():
+            task.cancel()
+
+    def set(self) -> None:
+        super().set()
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(task.cancel)
+
+
+class _ScriptSideControl:
+    """
+    Stands in for `job_control` and `job_log_func` where the script runs in thread or subprocess
+    mode. Everything is sent over the pipe to the Celery task, which owns the database and Redis
+    connections; heartbeats are throttled here so a chatty script cannot flood the pipe.
+    """
+
+    HEARTBEAT_MIN_INTERVAL = 0.2
+
+    def __init__(self, conn, job_id: str, cancel_flag):
+        self.job_id = job_id
+        self.progress_percent: Optional[int] = None
+        self.progress_message: Optional[str] = None
+        self._conn = conn
+        self._cancel_flag = cancel_flag
+        self._send_lock = _allocate_native_lock()
+        self._heartbeat_sent_at = 0.0
+        self._progress_pending = False
+
+    def send(self, message: Tuple) -> None:
+        with self._send_lock:
+            self._conn.send(message)
+
+    def log(self, job_id, level: str, message: str, source: Optional[str] = "script") -> None:
+        self.send(("log", str(level), str(message), source))
+
+    def should_cancel(self) -> bool:
+        return self._cancel_flag.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self.should_cancel():
+            raise JobCancelled(f"Job {self.job_id} was cancelled.")
+
+    def heartbeat(self, progress_percent: Optional[int] = None, progress_message: Optional[str] = None) -> None:
+        if progress_percent is not None:
+            self.progress_percent = max(0, min(100, int(progress_percent)))
+        if progress_message is not None:
+            self.progress_message = str(progress_message)
+        self._progress_pending = True
+        if time.monotonic() - self._heartbeat_sent_at >= self.HEARTBEAT_MIN_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._progress_pending:
+            self._progress_pending = False
+            self._heartbeat_sent_at = time.monotonic()
+            self.send(("progress", self.progress_percent, self.progress_message))
+
+    def save_artifact(self, name: str, data, content_type: Optional[str] = None) -> None:
+        # The blob is written here; the Celery task only records the row.
+        artifact_service.validate_artifact_name(name)
+        stream, content_type = artifact_service.as_stream(name, data, content_type)
+        sha256, size = upload_service.write_blob(stream)
+        self.send(("artifact", name, sha256, size, content_type))
+
+
+class _AsyncScriptSideControl(_ScriptSideControl):
+    """
+    `job_control` and `job_log_func` for `async def` scripts: `log`, `heartbeat` and
+    `save_artifact` are coroutines, `should_cancel` / `raise_if_cancelled` stay plain calls.
+    On the shared event loop a cancellation request also cancels the script's task, so
+    the script stops at its next `await` even if it never checks.
+    """
+
+    async def log(self, job_id, level: str, message: str, source: Optional[str] = "script") -> None:
+        super().log(job_id, level, message, source)
+
+    async def heartbeat(self, progress_percent: Optional[int] = None, progress_message: Optional[str] = None) -> None:
+        super().heartbeat(progress_percent, progress_message)
+
+    async def save_artifact(self, name: str, data, content_type: Optional[str] = None) -> None:
+        super().save_artifact(name, data, content_type)
+
+
+@contextmanager
+def _reporting_outcome(control: _ScriptSideControl, memory_limit_mb: Optional[int] = None) -> Iterator[None]:
+    """Sends how the script invocation inside the block ended, unless it reported a result itself."""
+    try:
+        yield
+    except JobCancelled as e:
+        control.flush()
+        control.send(("cancelled", str(e)))
+    except script_registry.InvalidScriptIdentifier as e:
+        control.send(("invalid_script", str(e), traceback.format_exc()))
+    except MemoryError:
+        control.send(("error", f"Script exceeded its memory limit of {memory_limit_mb} MB.", traceback.format_exc()))
+    except (Exception, SystemExit) as e:
+        control.send(("error", str(e), traceback.format_exc()))
+
+
+def _call_script(control: _ScriptSideControl, script: script_registry.Script, job_id_str: str, parameters,
+                 input_files_metadata) -> Any:
+    script_kwargs = {}
+    if script.accepts_job_control:
+        script_kwargs["job_control"] = control
+    return script.function(
+        job_id_str=job_id_str,
+        parameters=parameters,
+        input_files_metadata=input_files_metadata,
+        job_log_func=control.log,
+        **script_kwargs
+    )
+
+
+def _send_result(control: _ScriptSideControl, result: Any) -> None:
+    control.flush()
+    control.send(("result", str(result) if result else None))
+
+
+def _run_script_remote(conn, cancel_flag, script: Union[str, script_registry.Script], job_id_str: str, parameters,
+                       input_files_metadata, memory_limit_mb: Optional[int] = None) -> None:
+    """
+    Runs one script invocation on the far side of the pipe and reports its outcome. `script`
+    is the task's resolved Script in thread mode; a pool process gets the identifier.
+    """
+    control = _ScriptSideControl(conn, job_id_str, cancel_flag)
+    with _reporting_outcome(control, memory_limit_mb):
+        if isinstance(script, str):
+            script = script_registry.get(script)
+        if script.is_async:
+            # Only reached in a pool process, which has no shared loop: the coroutine gets its own.
+            asyncio.run(_run_async_remote(conn, cancel_flag, script, job_id_str, parameters,
+                                          input_files_metadata, memory_limit_mb))
+            return
+        _send_result(control, _call_script(control, script, job_id_str, parameters, input_files_metadata))
+
+
+async def _run_async_remote(conn, cancel_flag, script: script_registry.Script, job_id_str: str, parameters,
+                            input_files_metadata, memory_limit_mb: Optional[int] = None) -> None:
+    """`_run_script_remote` for `async def` scripts."""
+    control = _AsyncScriptSideControl(conn, job_id_str, cancel_flag)
+    with _reporting_outcome(control, memory_limit_mb):
+        try:
+            result = await _call_script(control, script, job_id_str, parameters, input_files_metadata)
+        except asyncio.CancelledError:
+            if not cancel_flag.is_set():
+                raise
+            raise JobCancelled(f"Job {job_id_str} was cancelled.")
+        _send_result(control, result)
+
+
+def _set_soft_limit(limit: int, soft: int) -> None:
+    _, hard = resource.getrlimit(limit)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(limit, (soft, hard))
+
+
+def _apply_limits(cpu_time_limit: Optional[int], memory_limit_mb: Optional[int]) -> None:
+    if cpu_time_limit:
+        # RLIMIT_CPU counts the whole life of the process, so the budget starts from what's used so far.
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        _set_soft_limit(resource.RLIMIT_CPU, int(usage.ru_utime + usage.ru_stime) + cpu_time_limit)
+    if memory_limit_mb:
+        _set_soft_limit(resource.RLIMIT_AS, memory_limit_mb * 1024 * 1024)
+
+
+def _reset_limits() -> None:
+    for limit in (resource.RLIMIT_CPU, resource.RLIMIT_AS):
+        _, hard = resource.getrlimit(limit)
+        resource.setrlimit(limit, (hard, hard))
+
+
+def _rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def _pool_process_main(conn, cancel_event) -> None:
+    """Loop of one pool process: runs the jobs sent by Celery tasks until told to stop."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        cpu_time_limit, memory_limit_mb, args = job
+        _apply_limits(cpu_time_limit, memory_limit_mb)
+        try:
+            _run_script_remote(conn, cancel_event, *args, memory_limit_mb=memory_limit_mb)
+        finally:
+            _reset_limits()
+    conn.close()
+
+
+class _PoolProcess:
+    def __init__(self, process, conn, cancel_event):
+        self.process = process
+        self.conn = conn
+        self.cancel_event = cancel_event
+        self.served = 0
+        self.broken = False
+
+    def alive(self) -> bool:
+        return not self.broken and self.process.is_alive()
+
+    def worn_out(self) -> bool:
+        return (self.served >= settings.EXECUTOR_MAX_JOBS_PER_PROCESS
+                or _rss_mb(self.process.pid) >= settings.EXECUTOR_MAX_RSS_MB)
+
+    def run(self, job: Tuple) -> None:
+        self.served += 1
+        self.cancel_event.clear()
+        self.conn.send(job)
+
+    def retire(self) -> None:
+        self.broken = True
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        self.kill()
+
+    def kill(self) -> None:
+        self.broken = True
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class ScriptProcessPool:
+    """
+    A fixed number of warm worker processes for bots with execution_mode='subprocess'.
+    Processes come from a forkserver that preloads the rpa_scripts modules, so they start
+    warm without inheriting the Celery worker's database or Redis connections. A process
+    is retired after `EXECUTOR_MAX_JOBS_PER_PROCESS` jobs or once its RSS passes
+    `EXECUTOR_MAX_RSS_MB`, and one that crashed or timed out is replaced on its next checkout.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._context = multiprocessing.get_context("forkserver")
+        self._context.set_forkserver_preload([__name__] + _script_modules())
+        self._idle: "queue.Queue[Optional[_PoolProcess]]" = queue.Queue()
+        for _ in range(size):
+            self._idle.put(None)
+
+    def _spawn(self) -> _PoolProcess:
+        parent_conn, child_conn = self._context.Pipe()
+        cancel_event = self._context.Event()
+        process = self._context.Process(
+            target=_pool_process_main,
+            args=(child_conn, cancel_event),
+            name="rpa-script-process",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _PoolProcess(process, parent_conn, cancel_event)
+
+    def prewarm(self) -> None:
+        procs = [self._idle.get() for _ in range(self.size)]
+        for i, proc in enumerate(procs):
+            if proc is None or not proc.alive():
+                procs[i] = self._spawn()
+        for proc in procs:
+            self._idle.put(proc)
+
+    @contextmanager
+    def checkout(self) -> Iterator[_PoolProcess]:
+        proc = self._idle.get()
+        try:
+            if proc is None or not proc.alive():
+                if proc is not None:
+                    proc.kill()
+                    proc = None
+                proc = self._spawn()
+            yield proc
+        finally:
+            if proc is not None and proc.alive() and proc.worn_out():
+                proc.retire()
+            self._idle.put(proc)
+
+
+_pool: Optional[ScriptProcessPool] = None
+_pool_pid: Optional[int] = None
+
+
+def _script_modules() -> List[str]:
+    package = importlib.import_module(script_registry.SCRIPTS_PACKAGE)
+    return [m.name for m in pkgutil.iter_modules(package.__path__, prefix=f"{script_registry.SCRIPTS_PACKAGE}.")]
+
+
+def get_process_pool() -> ScriptProcessPool:
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = ScriptProcessPool(settings.EXECUTOR_PROCESS_POOL_SIZE)
+        _pool_pid = os.getpid()
+    return _pool
+
+
+class ScriptEventLoop:
+    """
+    One asyncio event loop per worker process, running on a native OS thread, that `async def`
+    scripts are multiplexed onto. Each job's Celery task still waits for its script in `_relay`:
+    in a gevent worker that wait is a greenlet, so one process runs as many async jobs as its
+    concurrency allows, while in a prefork worker every job holds a process as usual (hence
+    ASYNC_SCRIPTS_QUEUE, which sends async jobs to a gevent worker of their own).
+    """
+
+    def __init__(self):
+        self.loop = asyncio.SelectorEventLoop(_native_selector())
+        _start_native_thread(self._run, ())
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coroutine) -> None:
+        asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+
+_event_loop: Optional[ScriptEventLoop] = None
+_event_loop_pid: Optional[int] = None
+
+
+def get_event_loop() -> ScriptEventLoop:
+    global _event_loop, _event_loop_pid
+    if _event_loop is None or _event_loop_pid != os.getpid():
+        _event_loop = ScriptEventLoop()
+        _event_loop_pid = os.getpid()
+    return _event_loop
+
+
+def _relay(conn, cancel_flag, control: JobControl, job_id, job_log_func: Callable,
+           timeout_seconds: Optional[int], is_alive: Callable[[], bool]) -> Any:
+    """
+    Relays messages from the script side until it reports an outcome: logs go to `job_log_func`,
+    progress to `control.heartbeat`, artifacts are recorded. Meanwhile the job's heartbeat and
+    bot slot lease are renewed, and cancellation requests (read through `control`) are passed
+    on via `cancel_flag`. Raises ScriptCancelTimeout when the script doesn't stop within
+    `JOB_CANCEL_GRACE_SECONDS` of that, and ScriptTimeout once `timeout_seconds` pass.
+    """
+    deadline = time.monotonic() + timeout_seconds if timeout_seconds else None
+    cancel_deadline = None
+    while True:
+        # On every pass, not just when the script is quiet; both calls are rate-limited.
+        control.heartbeat()
+        if cancel_deadline is None and control.should_cancel():
+            cancel_flag.set()
+            cancel_deadline = time.monotonic() + settings.JOB_CANCEL_GRACE_SECONDS
+        if cancel_deadline is not None and time.monotonic() >= cancel_deadline:
+            raise ScriptCancelTimeout(
+                f"Job {job_id} was cancelled; the script did not stop within {settings.JOB_CANCEL_GRACE_SECONDS:g}s."
+            )
+        wait = settings.JOB_CANCEL_CHECK_INTERVAL
+        if deadline is not None:
+            wait = max(0.0, min(wait, deadline - time.monotonic()))
+        if conn.poll(wait):
+            try:
+                message = conn.recv()
+            except EOFError:
+                raise ScriptFailed(f"Script process exited unexpectedly{_exit_reason(is_alive)}.")
+            kind = message[0]
+            if kind == "log":
+                job_log_func(job_id, message[1], message[2], source=message[3])
+            elif kind == "progress":
+                control.heartbeat(message[1], message[2])
+            elif kind == "artifact":
+                artifact_service.record_artifact(db.engine, job_id, *message[1:])
+            elif kind == "result":
+                return message[1]
+            elif kind == "cancelled":
+                raise JobCancelled(message[1])
+            elif kind == "invalid_script":
+                raise script_registry.InvalidScriptIdentifier(message[1])
+            elif kind == "error":
+                raise ScriptFailed(message[1], remote_traceback=message[2])
+            continue
+        if not is_alive():
+            raise ScriptFailed(f"Script process exited unexpectedly{_exit_reason(is_alive)}.")
+        if deadline is not None and time.monotonic() >= deadline:
+            raise ScriptTimeout(f"Script exceeded the wall-clock limit of {timeout_seconds}s.")
+
+
+def _exit_reason(is_alive: Callable[[], bool]) -> str:
+    exitcode = getattr(is_alive, "exitcode", lambda: None)()
+    if exitcode == -signal.SIGXCPU:
+        return " (CPU time limit exceeded)"
+    if exitcode is not None and exitcode < 0:
+        return f" (killed by signal {-exitcode})"
+    if exitcode:
+        return f" (exit code {exitcode})"
+    return ""
+
+
+@contextmanager
+def _keeping_alive(control: JobControl) -> Iterator[None]:
+    """
+    Renews the job's heartbeat and bot slot lease while the block runs, whether or not the
+    script reports progress itself (`_relay` does this for the other modes). It runs on a
+    native thread with a Redis client of its own, so in a gevent worker it keeps going while
+    the script blocks or burns CPU; otherwise the job would look dead and be run again.
+    """
+    lock = _allocate_native_lock()
+    stopped = []
+    client = redis_client.new_redis()
+
+    def keep_alive():
+        try:
+            while True:
+                _native_sleep(settings.JOB_HEARTBEAT_INTERVAL)
+                # Under the lock, so nothing is published after the job closed its control keys.
+                with lock:
+                    if stopped:
+                        return
+                    control.keep_alive(client)
+        finally:
+            client.close()
+
+    _start_native_thread(keep_alive, ())
+    try:
+        yield
+    finally:
+        with lock:
+            stopped.append(True)
+
+
+def _run_inline(script: script_registry.Script, control: JobControl, script_args: Dict[str, Any]) -> Any:
+    script_kwargs = {}
+    if script.accepts_job_control:
+        script_kwargs["job_control"] = control
+    with _keeping_alive(control):
+        return script.function(**script_args, **script_kwargs)
+
+
+def _remote_args(script: Union[str, script_registry.Script], script_args: Dict[str, Any]) -> Tuple:
+    return (script, script_args["job_id_str"], script_args["parameters"], script_args["input_files_metadata"])
+
+
+def _run_thread(bot_config: BotConfiguration, script: script_registry.Script, control: JobControl,
+                script_args: Dict[str, Any]) -> Any:
+    # A script that times out here cannot be killed: it is told to cancel and its pipe is closed,
+    # so its next log or heartbeat call fails. Use 'subprocess' for scripts that must be stopped.
+    conn, script_conn = multiprocessing.Pipe()
+    cancel_flag = _Flag()
+    finished = []
+
+    def target():
+        try:
+            _run_script_remote(script_conn, cancel_flag, *_remote_args(script, script_args))
+        except (OSError, EOFError):
+            pass
+        finally:
+            finished.append(True)
+            script_conn.close()
+
+    _start_native_thread(target, ())
+    try:
+        return _relay(conn, cancel_flag, control, control.job_id, script_args["job_log_func"],
+                      bot_config.timeout_seconds, lambda: not finished)
+    finally:
+        cancel_flag.set()
+        conn.close()
+
+
+async def _run_async_job(script_conn, cancel_flag: _TaskCancelFlag, finished: List[bool], *remote_args) -> None:
+    cancel_flag.attach(asyncio.current_task())
+    try:
+        await _run_async_remote(script_conn, cancel_flag, *remote_args)
+    except (OSError, EOFError, asyncio.CancelledError):
+        pass
+    finally:
+        finished.append(True)
+        script_conn.close()
+
+
+def _run_async(bot_config: BotConfiguration, script: script_registry.Script, control: JobControl,
+               script_args: Dict[str, Any]) -> Any:
+    # Unlike thread mode, a timed-out async script is actually stopped: its task is cancelled.
+    conn, script_conn = multiprocessing.Pipe()
+    cancel_flag = _TaskCancelFlag()
+    finished: List[bool] = []
+    get_event_loop().submit(_run_async_job(script_conn, cancel_flag, finished, *_remote_args(script, script_args)))
+    try:
+        return _relay(conn, cancel_flag, control, control.job_id, script_args["job_log_func"],
+                      bot_config.timeout_seconds, lambda: not finished)
+    finally:
+        cancel_flag.set()
+        conn.close()
+
+
+class _ProcessLiveness:
+    def __init__(self, process):
+        self._process = process
+
+    def __call__(self) -> bool:
+        return self._process.is_alive()
+
+    def exitcode(self) -> Optional[int]:
+        self._process.join(timeout=1)
+        return self._process.exitcode
+
+
+def _run_subprocess(bot_config: BotConfiguration, control: JobControl, script_args: Dict[str, Any]) -> Any:
+    with get_process_pool().checkout() as proc:
+        # Sent by identifier: the pool process resolves it from its own imports.
+        proc.run((bot_config.cpu_time_limit, bot_config.memory_limit_mb,
+                  _remote_args(bot_config.script_identifier, script_args)))
+        try:
+            return _relay(proc.conn, proc.cancel_event, control, control.job_id, script_args["job_log_func"],
+                          bot_config.timeout_seconds, _ProcessLiveness(proc.process))
+        except (ScriptTimeout, ScriptCancelTimeout):
+            proc.kill()
+            raise
+        except (JobCancelled, script_registry.InvalidScriptIdentifier):
+            raise
+        except ScriptFailed:
+            # Either reported by a process that is ready for the next job, or the process is
+            # gone and the pool replaces it on its next checkout.
+            raise
+        except BaseException:
+            # The process is mid-job; its remaining messages would confuse the next job.
+            proc.kill()
+            raise
+
+
+def run_script(bot_config: BotConfiguration, control: JobControl,
+               script: Optional[script_registry.Script] = None, **script_args) -> Any:
+    """
+    Runs the bot's script according to its `execution_mode`:
+    'inline' calls it in the Celery task itself; 'thread' runs it on a native OS thread (so
+    blocking or CPU-bound work doesn't stall a gevent worker); 'subprocess' runs it in a warm
+    pool process under the bot's CPU-time and memory rlimits. Both non-inline modes stream
+    logs, progress and artifacts back over a pipe and enforce `timeout_seconds`.
+    `async def` scripts run on the worker's shared event loop in 'inline' and 'thread' mode,
+    and on an event loop of their own in 'subprocess' mode.
+    A cancelled job stops where its script checks `job_control`; otherwise an async script is
+    cancelled at its next `await` and a 'subprocess' one is killed after
+    `JOB_CANCEL_GRACE_SECONDS`. 'thread' mode gives up on the script then (it only fails at
+    its next log call), and an 'inline' script without `job_control` runs to the end.
+    `script` is the bot's script as the caller already resolved it (looked up when omitted).
+    `script_args` are the usual script keyword arguments (job_id_str, parameters,
+    input_files_metadata, job_log_func).
+    """
+    mode = bot_config.execution_mode or "inline"
+    if mode == "subprocess":
+        return _run_subprocess(bot_config, control, script_args)
+    if script is None:
+        script = script_registry.get(bot_config.script_identifier)
+    if script.is_async:
+        return _run_async(bot_config, script, control, script_args)
+    if mode == "thread":
+        return _run_thread(bot_config, script, control, script_args)
+    return _run_inline(script, control, script_args)
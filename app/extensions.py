@@ -1,9 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_marshmallow import Marshmallow 
 from flask_cors import CORS
 
 db = SQLAlchemy()
-migrate = Migrate()
 ma = Marshmallow()
 cors = CORS()
\ No newline at end of file
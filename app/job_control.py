@@ -0,0 +1,164 @@
+import socket
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Optional, Union
+from uuid import UUID
+
+import redis
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models.job_model import Job, JobArtifact
+from app.services import artifact_service
+from core import task_queue
+from core.config import settings
+from core.redis_client import get_redis
+
+
+class JobCancelled(Exception):
+    """Raised by `JobControl.raise_if_cancelled` once cancellation of the job was requested."""
+
+
+def cancel_key(job_id: Union[UUID, str]) -> str:
+    return f"job_control:{job_id}:cancel"
+
+
+def heartbeat_key(job_id: Union[UUID, str]) -> str:
+    return f"job_control:{job_id}:heartbeat"
+
+
+def request_cancel(job_id: Union[UUID, str]) -> None:
+    """Flags a running job for cancellation; its JobControl picks this up without touching Postgres."""
+    get_redis().set(cancel_key(job_id), 1, ex=settings.JOB_CONTROL_KEY_TTL)
+
+
+def get_heartbeat(job_id: Union[UUID, str]) -> Optional[Dict[str, Any]]:
+    """Latest heartbeat of a running job, as published by its worker, or None."""
+    data = get_redis().hgetall(heartbeat_key(job_id))
+    if not data:
+        return None
+    data = {k.decode(): v.decode() for k, v in data.items()}
+    return {
+        "worker": data.get("worker"),
+        "timestamp": float(data["timestamp"]) if data.get("timestamp") else None,
+        "progress_percent": int(data["progress_percent"]) if data.get("progress_percent") else None,
+        "progress_message": data.get("progress_message") or None,
+    }
+
+
+class JobControl:
+    """
+    Handle passed to RPA scripts (as `job_control`) for cooperative cancellation,
+    progress reporting and saving output files (`save_artifact`). Cancellation is read
+    from a Redis key at most every `JOB_CANCEL_CHECK_INTERVAL` seconds. Heartbeats go to
+    a Redis hash at most every `JOB_HEARTBEAT_INTERVAL` seconds and are coalesced into
+    `Job.progress_percent` / `progress_message` at most every `JOB_PROGRESS_FLUSH_INTERVAL`
+    seconds.
+    """
+
+    def __init__(self, job_id: UUID, slot_key: Optional[str] = None):
+        self.job_id = job_id
+        self.slot_key = slot_key
+        self.progress_percent: Optional[int] = None
+        self.progress_message: Optional[str] = None
+        self._engine = db.engine
+        self._worker = socket.gethostname()
+        self._cancelled = False
+        self._cancel_checked_at = 0.0
+        self._heartbeat_sent_at = 0.0
+        self._progress_flushed_at = time.monotonic()
+        self._progress_dirty = False
+        self._lock = threading.Lock()
+
+    def should_cancel(self) -> bool:
+        if self._cancelled:
+            return True
+        now = time.monotonic()
+        if now - self._cancel_checked_at < settings.JOB_CANCEL_CHECK_INTERVAL:
+            return False
+        self._cancel_checked_at = now
+        try:
+            self._cancelled = bool(get_redis().exists(cancel_key(self.job_id)))
+        except redis.RedisError as e:
+            print(f"Error checking cancellation of job {self.job_id}: {e}")
+        return self._cancelled
+
+    def raise_if_cancelled(self) -> None:
+        if self.should_cancel():
+            raise JobCancelled(f"Job {self.job_id} was cancelled.")
+
+    def heartbeat(self, progress_percent: Optional[int] = None, progress_message: Optional[str] = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if progress_percent is not None:
+                self.progress_percent = max(0, min(100, int(progress_percent)))
+                self._progress_dirty = True
+            if progress_message is not None:
+                self.progress_message = progress_message
+                self._progress_dirty = True
+            send_heartbeat = now - self._heartbeat_sent_at >= settings.JOB_HEARTBEAT_INTERVAL
+            flush_progress = self._progress_dirty and now - self._progress_flushed_at >= settings.JOB_PROGRESS_FLUSH_INTERVAL
+            if send_heartbeat:
+                self._heartbeat_sent_at = now
+            if flush_progress:
+                self._progress_flushed_at = now
+                self._progress_dirty = False
+        if send_heartbeat:
+            self._send_heartbeat()
+        if flush_progress:
+            self._flush_progress()
+
+    def save_artifact(self, name: str, data: Union[BinaryIO, bytes, str], content_type: Optional[str] = None) -> JobArtifact:
+        """
+        Stores an output file of the job (a binary file object, bytes or text) as artifact `name`,
+        downloadable from GET /api/v1/jobs/<id>/artifacts/<name>. File objects are streamed.
+        """
+        return artifact_service.save_artifact(self._engine, self.job_id, name, data, content_type)
+
+    def start(self) -> None:
+        """Publishes the first heartbeat, so the job shows a live worker before the script reports anything."""
+        self._heartbeat_sent_at = time.monotonic()
+        self._send_heartbeat()
+
+    def close(self) -> None:
+        """Removes the job's control keys. Final progress is written with the job's last update."""
+        try:
+            get_redis().delete(cancel_key(self.job_id), heartbeat_key(self.job_id))
+        except redis.RedisError as e:
+            print(f"Error clearing control keys of job {self.job_id}: {e}")
+
+    def keep_alive(self, client: redis.Redis) -> None:
+        """
+        Republishes the heartbeat and renews the slot lease through `client`, touching neither
+        Postgres nor the process-wide Redis client (see `executors._keeping_alive`).
+        """
+        self._send_heartbeat(client)
+
+    def _send_heartbeat(self, client: Optional[redis.Redis] = None) -> None:
+        mapping = {
+            "worker": self._worker,
+            "timestamp": time.time(),
+            "progress_percent": "" if self.progress_percent is None else self.progress_percent,
+            "progress_message": self.progress_message or "",
+        }
+        try:
+            client = client or get_redis()
+            pipe = client.pipeline(transaction=False)
+            pipe.hset(heartbeat_key(self.job_id), mapping=mapping)
+            pipe.expire(heartbeat_key(self.job_id), settings.JOB_CONTROL_KEY_TTL)
+            pipe.execute()
+            if self.slot_key:
+                task_queue.renew_slot(self.slot_key, str(self.job_id), settings.BOT_SLOT_LEASE_SECONDS, client)
+        except redis.RedisError as e:
+            print(f"Error sending heartbeat for job {self.job_id}: {e}")
+
+    def _flush_progress(self) -> None:
+        try:
+            with self._engine.begin() as connection:
+                connection.execute(
+                    update(Job.__table__)
+                    .where(Job.__table__.c.id == self.job_id)
+                    .values(progress_percent=self.progress_percent, progress_message=self.progress_message)
+                )
+        except Exception as e:
+            print(f"Error writing progress of job {self.job_id}: {e}")
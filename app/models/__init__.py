@@ -1,2 +1,4 @@
 from .bot_model import BotConfiguration
-from .job_model import Job, JobLog
+from .job_model import Job, JobLog, JobLogArchive, JobArtifact, JobStatusCounter
+from .schedule_model import BotSchedule
+from .upload_model import FileBlob, Upload
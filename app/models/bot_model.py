@@ -13,6 +13,17 @@ class BotConfiguration(db.Model):
     parameter_schema = db.Column(db.JSON, nullable=True)
     default_parameters = db.Column(db.JSON, nullable=True)
     is_enabled = db.Column(db.Boolean, nullable=False, default=True)
+    max_concurrency = db.Column(db.Integer, nullable=True)
+    dispatch_weight = db.Column(db.Integer, nullable=False, default=1)
+    execution_mode = db.Column(db.String(20), nullable=False, default='inline')
+    timeout_seconds = db.Column(db.Integer, nullable=True)
+    cpu_time_limit = db.Column(db.Integer, nullable=True)
+    memory_limit_mb = db.Column(db.Integer, nullable=True)
+    result_cache_ttl = db.Column(db.Integer, nullable=True)
+    max_retries = db.Column(db.Integer, nullable=True)
+    retry_backoff_seconds = db.Column(db.Integer, nullable=True)
+    retry_backoff_max_seconds = db.Column(db.Integer, nullable=True)
+    retry_on = db.Column(db.JSON, nullable=True)
     created_by = db.Column(PG_UUID(as_uuid=True), nullable=True)
     updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
@@ -1,4 +1,5 @@
 from app.extensions import db
+from sqlalchemy import DDL, event
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB
 from uuid import uuid4
 from datetime import datetime, timezone
@@ -6,11 +7,32 @@ from datetime import datetime, timezone
 
 class Job(db.Model):
     __tablename__ = "jobs"
+    __table_args__ = (
+        # Listing filters by bot and/or status and pages by (created_at, id); see job_query.
+        db.Index("ix_jobs_bot_status_created", "bot_config_id", "status", "created_at", "id"),
+        db.Index("ix_jobs_status_created", "status", "created_at", "id"),
+        db.Index("ix_jobs_created", "created_at", "id"),
+        # Only pending schedules are indexed, so due-time lookups don't grow with job history.
+        db.Index("ix_jobs_scheduled_at_scheduled", "scheduled_at", postgresql_where=db.text("status = 'scheduled'")),
+        # Result cache lookups only ever want the latest successful run for a key.
+        db.Index("ix_jobs_result_cache_key_success", "result_cache_key", "completed_at",
+                 postgresql_where=db.text("status = 'success' AND result_cache_key IS NOT NULL")),
+        # Jobs that failed after exhausting their retries; see job_service.get_dead_letter_jobs.
+        db.Index("ix_jobs_dead_lettered_at", "dead_lettered_at", "id", postgresql_where=db.text("dead_lettered_at IS NOT NULL")),
+        # Finished jobs whose logs haven't been compacted yet (see job_log_maintenance).
+        db.Index("ix_jobs_logs_compaction_pending", "completed_at",
+                 postgresql_where=db.text("completed_at IS NOT NULL AND logs_compacted_at IS NULL")),
+    )
 
     id = db.Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid4)
-    bot_config_id = db.Column(PG_UUID(as_uuid=True), db.ForeignKey("bot_configurations.id"), nullable=False, index=True)
-    status = db.Column(db.String(50), nullable=False, default='pending', index=True) 
+    bot_config_id = db.Column(PG_UUID(as_uuid=True), db.ForeignKey("bot_configurations.id"), nullable=False)
+    status = db.Column(db.String(50), nullable=False, default='pending')
     parameters_used = db.Column(JSONB, nullable=True) 
+    input_files = db.Column(JSONB, nullable=True)
+    celery_task_id = db.Column(db.String(255), nullable=True, index=True)
+    batch_id = db.Column(PG_UUID(as_uuid=True), nullable=True, index=True)
+    scheduled_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    schedule_id = db.Column(PG_UUID(as_uuid=True), db.ForeignKey("bot_schedules.id", ondelete="SET NULL"), nullable=True, index=True)
     enqueued_at = db.Column(db.DateTime(timezone=True), nullable=True)
     started_at = db.Column(db.DateTime(timezone=True), nullable=True)
     completed_at = db.Column(db.DateTime(timezone=True), nullable=True)
@@ -21,27 +43,140 @@ class Job(db.Model):
     progress_message = db.Column(db.Text, nullable=True)
     triggered_by_user_id = db.Column(PG_UUID(as_uuid=True), nullable=True) 
     retry_count = db.Column(db.Integer, default=0, nullable=True)
+    result_cache_key = db.Column(db.String(64), nullable=True)
+    cached_from_job_id = db.Column(PG_UUID(as_uuid=True), db.ForeignKey("jobs.id", ondelete="SET NULL"), nullable=True)
+    logs_compacted_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    dead_lettered_at = db.Column(db.DateTime(timezone=True), nullable=True)
     created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 
     bot_configuration = db.relationship("BotConfiguration", backref=db.backref("jobs", lazy=True))
 
-    logs = db.relationship("JobLog", backref="job", lazy="dynamic", cascade="all, delete-orphan")
+    # Log rows are removed by the database's ON DELETE CASCADE rather than loaded and deleted one by one.
+    logs = db.relationship("JobLog", backref="job", lazy="dynamic", cascade="all, delete-orphan", passive_deletes=True)
+    artifacts = db.relationship("JobArtifact", backref="job", lazy="dynamic", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<Job {self.id} - Status: {self.status}>"
 
 
+class JobStatusCounter(db.Model):
+    """
+    Number of jobs per bot and status, kept current by triggers on `jobs` in the same
+    transaction as every status change. Each change lands in a random one of
+    STATUS_COUNTER_SHARDS rows so busy bots don't serialize on a single counter row;
+    readers sum the shards.
+    """
+    __tablename__ = "job_status_counters"
+
+    bot_config_id = db.Column(PG_UUID(as_uuid=True), db.ForeignKey("bot_configurations.id", ondelete="CASCADE"), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    shard = db.Column(db.SmallInteger, primary_key=True)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+STATUS_COUNTER_SHARDS = 8
+
+# Statement-level triggers aggregate the transition tables, so a bulk INSERT/UPDATE of
+# thousands of jobs costs one upsert per (bot, status) it touches. Updates that don't
+# change bot or status cancel out and write nothing.
+STATUS_COUNTER_TRIGGERS = f"""
+CREATE OR REPLACE FUNCTION job_status_counters_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO job_status_counters AS c (bot_config_id, status, shard, count)
+        SELECT bot_config_id, status, floor(random() * {STATUS_COUNTER_SHARDS})::smallint, count(*)
+        FROM new_rows GROUP BY bot_config_id, status
+        ON CONFLICT (bot_config_id, status, shard) DO UPDATE SET count = c.count + EXCLUDED.count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO job_status_counters AS c (bot_config_id, status, shard, count)
+        SELECT bot_config_id, status, floor(random() * {STATUS_COUNTER_SHARDS})::smallint, -count(*)
+        FROM old_rows GROUP BY bot_config_id, status
+        ON CONFLICT (bot_config_id, status, shard) DO UPDATE SET count = c.count + EXCLUDED.count;
+    ELSE
+        INSERT INTO job_status_counters AS c (bot_config_id, status, shard, count)
+        SELECT bot_config_id, status, floor(random() * {STATUS_COUNTER_SHARDS})::smallint, sum(delta)
+        FROM (
+            SELECT bot_config_id, status, 1 AS delta FROM new_rows
+            UNION ALL
+            SELECT bot_config_id, status, -1 AS delta FROM old_rows
+        ) changes
+        GROUP BY bot_config_id, status
+        HAVING sum(delta) <> 0
+        ON CONFLICT (bot_config_id, status, shard) DO UPDATE SET count = c.count + EXCLUDED.count;
+    END IF;
+    RETURN NULL;
+END
+$$;
+DROP TRIGGER IF EXISTS jobs_status_counters_insert ON jobs;
+DROP TRIGGER IF EXISTS jobs_status_counters_update ON jobs;
+DROP TRIGGER IF EXISTS jobs_status_counters_delete ON jobs;
+CREATE TRIGGER jobs_status_counters_insert AFTER INSERT ON jobs
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION job_status_counters_apply();
+CREATE TRIGGER jobs_status_counters_update AFTER UPDATE ON jobs
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION job_status_counters_apply();
+CREATE TRIGGER jobs_status_counters_delete AFTER DELETE ON jobs
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION job_status_counters_apply();
+"""
+
+
+@event.listens_for(db.Model.metadata, "after_create")
+def _create_status_counter_triggers(target, connection, tables=(), **kw):
+    # Only alongside a new (empty) jobs table; existing databases use `flask jobs install-counters`,
+    # which also counts the jobs already there.
+    if any(table.name == "jobs" for table in tables):
+        connection.execute(DDL(STATUS_COUNTER_TRIGGERS))
+
+
 class JobLog(db.Model):
     __tablename__ = "job_logs"
+    # Range partitions on `timestamp` are created ahead and dropped after retention by
+    # job_log_maintenance; the partition key has to be part of the primary key.
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
-    id = db.Column(db.BigInteger, primary_key=True) 
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     job_id = db.Column(PG_UUID(as_uuid=True), db.ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False, index=True)
-    timestamp = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc), index=True)
+    timestamp = db.Column(db.DateTime(timezone=True), primary_key=True, nullable=False, default=lambda: datetime.now(timezone.utc), index=True)
     log_level = db.Column(db.String(20), nullable=False, default='INFO') 
     message = db.Column(db.Text, nullable=False)
     source = db.Column(db.String(100), nullable=True) 
 
     def __repr__(self):
-        return f"<JobLog {self.id} [{self.log_level}] Job: {self.job_id}>"
\ No newline at end of file
+        return f"<JobLog {self.id} [{self.log_level}] Job: {self.job_id}>"
+
+
+class JobLogArchive(db.Model):
+    """The logs of a finished job, compacted out of `job_logs` into one compressed JSONL blob."""
+    __tablename__ = "job_log_archives"
+
+    job_id = db.Column(PG_UUID(as_uuid=True), db.ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    codec = db.Column(db.String(16), nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    line_count = db.Column(db.Integer, nullable=False)
+    first_log_id = db.Column(db.BigInteger, nullable=False)
+    last_log_id = db.Column(db.BigInteger, nullable=False)
+    last_timestamp = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<JobLogArchive Job: {self.job_id} ({self.line_count} lines)>"
+
+
+class JobArtifact(db.Model):
+    """A named output file of a job. The content lives in the blob store, addressed by `sha256`."""
+    __tablename__ = "job_artifacts"
+    __table_args__ = (
+        db.UniqueConstraint("job_id", "name", name="uq_job_artifacts_job_id_name"),
+    )
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    job_id = db.Column(PG_UUID(as_uuid=True), db.ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = db.Column(db.String(255), nullable=False)
+    sha256 = db.Column(db.String(64), db.ForeignKey("file_blobs.sha256"), nullable=False, index=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    content_type = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<JobArtifact {self.name} Job: {self.job_id}>"
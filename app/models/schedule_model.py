@@ -0,0 +1,30 @@
+from app.extensions import db
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB
+from uuid import uuid4
+from datetime import datetime, timezone
+
+
+class BotSchedule(db.Model):
+    __tablename__ = "bot_schedules"
+    __table_args__ = (
+        db.Index("ix_bot_schedules_next_run_at_enabled", "next_run_at", postgresql_where=db.text("is_enabled")),
+    )
+
+    id = db.Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid4)
+    bot_config_id = db.Column(PG_UUID(as_uuid=True), db.ForeignKey("bot_configurations.id", ondelete="CASCADE"), nullable=False, index=True)
+    cron_expression = db.Column(db.String(100), nullable=False)
+    timezone = db.Column(db.String(64), nullable=False, default='UTC')
+    parameters = db.Column(JSONB, nullable=True)
+    is_enabled = db.Column(db.Boolean, nullable=False, default=True)
+    next_run_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    last_run_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    created_by = db.Column(PG_UUID(as_uuid=True), nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    bot_configuration = db.relationship(
+        "BotConfiguration", backref=db.backref("schedules", lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    )
+
+    def __repr__(self):
+        return f"<BotSchedule {self.id} '{self.cron_expression}' Bot: {self.bot_config_id}>"
@@ -0,0 +1,37 @@
+from app.extensions import db
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from uuid import uuid4
+from datetime import datetime, timezone
+
+
+class FileBlob(db.Model):
+    """A stored file, addressed by the SHA-256 of its content; shared by every upload with that content."""
+    __tablename__ = "file_blobs"
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<FileBlob {self.sha256} ({self.size} bytes)>"
+
+
+class Upload(db.Model):
+    __tablename__ = "uploads"
+
+    id = db.Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid4)
+    filename = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(255), nullable=True)
+    size = db.Column(db.BigInteger, nullable=True)
+    offset = db.Column(db.BigInteger, nullable=False, default=0)
+    expected_sha256 = db.Column(db.String(64), nullable=True)
+    sha256 = db.Column(db.String(64), db.ForeignKey("file_blobs.sha256"), nullable=True, index=True)
+    status = db.Column(db.String(20), nullable=False, default='uploading')
+    created_by = db.Column(PG_UUID(as_uuid=True), nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    blob = db.relationship("FileBlob", lazy="joined")
+
+    def __repr__(self):
+        return f"<Upload {self.id} {self.filename} - Status: {self.status}>"
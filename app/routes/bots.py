@@ -1,18 +1,52 @@
-from flask import Blueprint, request, jsonify 
+import hashlib
+from collections.abc import Mapping
+from flask import Blueprint, Response, request, jsonify 
 from app.extensions import db
 from app.schemas.bot_schema import (
     bot_config_schema,
     bot_configs_schema,
     bot_config_create_schema,
-    bot_config_update_schema
+    bot_config_update_schema,
+    sparse_bot_configs_schema
 )
-from app.services import bot_service
+from app.schemas.schedule_schema import bot_schedule_schema, bot_schedules_schema, bot_schedule_update_schema
+from app.services import bot_service, parameter_validation, schedule_service
+from app.services.parameter_validation import ParameterError
+from app.script_registry import InvalidScriptIdentifier
+from core import serialization
 from core.auth import token_required, admin_required, AuthenticatedUser 
+from core.pagination import encode_cursor, decode_cursor, InvalidCursor
 from uuid import UUID
 from marshmallow import ValidationError
 
 bots_bp = Blueprint("bots", __name__)
 
+
+def _etag(rows, variant: bytes = b"") -> str:
+    """
+    Strong ETag of a bot representation: every write to a bot moves its `updated_at`, so
+    the (id, updated_at) of the bots listed, plus the query that listed them, identify it.
+    """
+    digest = hashlib.blake2b(variant, digest_size=16)
+    for row in rows:
+        bot_id, updated_at = (row["id"], row["updated_at"]) if isinstance(row, Mapping) else (row.id, row.updated_at)
+        digest.update(f"{bot_id}:{updated_at.isoformat() if updated_at else ''};".encode())
+    return digest.hexdigest()
+
+
+def _not_modified(etag: str):
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def _json_response(data, etag: str, headers=None) -> Response:
+    response = Response(serialization.dumps(data), status=200, mimetype="application/json", headers=headers)
+    response.set_etag(etag)
+    return response
+
 @bots_bp.route("/", methods=["POST"])
 @admin_required 
 def create_bot_configuration(current_user: AuthenticatedUser):
@@ -30,6 +64,8 @@ def create_bot_configuration(current_user: AuthenticatedUser):
     try:
         new_bot = bot_service.create_bot_config(db=db.session, bot_in_data=data, creator_id=creator_id)
         return bot_config_schema.dump(new_bot), 201
+    except InvalidScriptIdentifier as e:
+        return jsonify({"errors": {"script_identifier": [str(e)]}}), 400
     except ValueError as e:
         return jsonify({"message": str(e)}), 409
     except Exception as e:
@@ -43,14 +79,57 @@ def create_bot_configuration(current_user: AuthenticatedUser):
 def get_bot_configurations(current_user: AuthenticatedUser): 
    
     skip = request.args.get("skip", 0, type=int)
-    limit = request.args.get("limit", 100, type=int)
+    limit = max(request.args.get("limit", 100, type=int), 0)
     is_enabled_str = request.args.get("is_enabled", type=str)
     is_enabled = None
     if is_enabled_str is not None:
         is_enabled = is_enabled_str.lower() in ['true', '1', 't']
 
-    bots = bot_service.get_all_bot_configs(db=db.session, skip=skip, limit=limit, is_enabled=is_enabled)
-    return bot_configs_schema.dump(bots), 200
+    after = None
+    cursor = request.args.get("cursor", type=str)
+    if cursor:
+        try:
+            after_name, after_id = decode_cursor(cursor, 2)
+            after = (after_name, UUID(after_id))
+        except (InvalidCursor, ValueError, TypeError):
+            return jsonify({"errors": {"cursor": ["Invalid cursor."]}}), 400
+
+    schema, columns = bot_configs_schema, None
+    fields_str = request.args.get("fields", type=str)
+    if fields_str:
+        try:
+            schema, columns = sparse_bot_configs_schema([f.strip() for f in fields_str.split(",") if f.strip()])
+        except ValueError as e:
+            return jsonify({"errors": {"fields": [str(e)]}}), 400
+
+    # A conditional request first checks the page's (id, updated_at) pairs, which is all
+    # most dashboard polls need; the ETag covers the extra row that decides the cursor.
+    if request.if_none_match:
+        versions = bot_service.get_all_bot_configs(
+            db=db.session, skip=skip, limit=limit + 1, is_enabled=is_enabled, after=after, columns=["updated_at"]
+        )
+        not_modified = _not_modified(_etag(versions, request.query_string))
+        if not_modified is not None:
+            return not_modified
+
+    if columns and "updated_at" not in columns:
+        columns = columns + ["updated_at"]
+    bots = bot_service.get_all_bot_configs(
+        db=db.session, skip=skip, limit=limit + 1, is_enabled=is_enabled, after=after, columns=columns
+    )
+    etag = _etag(bots, request.query_string)
+    headers = {}
+    if len(bots) > limit:
+        bots = bots[:limit]
+        # With limit=0 the page is empty and there is no last bot to continue after.
+        if bots:
+            last = bots[-1]
+            if columns:
+                headers["X-Next-Cursor"] = encode_cursor(last["name"], last["id"])
+            else:
+                headers["X-Next-Cursor"] = encode_cursor(last.name, last.id)
+    dump = serialization.dumper(schema)
+    return _json_response([dump(bot) for bot in bots], etag, headers)
 
 
 @bots_bp.route("/<uuid:bot_id>", methods=["GET"])
@@ -59,7 +138,11 @@ def get_bot_configuration(current_user: AuthenticatedUser, bot_id: UUID):
     bot = bot_service.get_bot_config_by_id(db=db.session, bot_id=bot_id)
     if not bot:
         return jsonify({"message": "Bot configuration not found"}), 404
-    return bot_config_schema.dump(bot), 200
+    etag = _etag([bot])
+    not_modified = _not_modified(etag)
+    if not_modified is not None:
+        return not_modified
+    return _json_response(serialization.dumper(bot_config_schema)(bot), etag)
 
 
 @bots_bp.route("/<uuid:bot_id>", methods=["PUT"])
@@ -74,13 +157,15 @@ def update_bot_configuration(current_user: AuthenticatedUser, bot_id: UUID):
     except ValidationError as err:
         return jsonify({"errors": err.messages}), 400
 
-    bot = bot_service.get_bot_config_by_id(db=db.session, bot_id=bot_id)
+    bot = bot_service.get_bot_config_by_id(db=db.session, bot_id=bot_id, use_cache=False)
     if not bot:
         return jsonify({"message": "Bot configuration not found"}), 404
 
     try:
         updated_bot = bot_service.update_bot_config(db=db.session, db_bot=bot, bot_in_data=data_to_update)
         return bot_config_schema.dump(updated_bot), 200
+    except InvalidScriptIdentifier as e:
+        return jsonify({"errors": {"script_identifier": [str(e)]}}), 400
     except ValueError as e:
         return jsonify({"message": str(e)}), 409
     except Exception as e:
@@ -95,4 +180,92 @@ def delete_bot_configuration(current_user: AuthenticatedUser, bot_id: UUID):
     success = bot_service.delete_bot_config(db=db.session, bot_id=bot_id)
     if not success:
         return jsonify({"message": "Bot configuration not found or could not be deleted"}), 404
-    return '', 204
\ No newline at end of file
+    return '', 204
+
+
+@bots_bp.route("/<uuid:bot_id>/schedules", methods=["GET"])
+@token_required
+def get_bot_schedules(current_user: AuthenticatedUser, bot_id: UUID):
+    bot = bot_service.get_bot_config_by_id(db=db.session, bot_id=bot_id)
+    if not bot:
+        return jsonify({"message": "Bot configuration not found"}), 404
+    return bot_schedules_schema.dump(schedule_service.get_schedules_for_bot(db.session, bot_id)), 200
+
+
+@bots_bp.route("/<uuid:bot_id>/schedules", methods=["POST"])
+@admin_required
+def create_bot_schedule(current_user: AuthenticatedUser, bot_id: UUID):
+    json_data = request.get_json()
+    if not json_data:
+        return jsonify({"message": "No input data provided"}), 400
+
+    try:
+        data = bot_schedule_schema.load(json_data)
+    except ValidationError as err:
+        return jsonify({"errors": err.messages}), 400
+
+    bot = bot_service.get_bot_config_by_id(db=db.session, bot_id=bot_id)
+    if not bot:
+        return jsonify({"message": "Bot configuration not found"}), 404
+
+    # Checked now, merged with the bot's defaults when the schedule fires (see fire_due_schedules).
+    try:
+        parameter_validation.validate_parameters(bot, data.get("parameters"))
+    except ParameterError as e:
+        return jsonify({"errors": {"parameters": e.messages}}), 400
+
+    creator_id = current_user.id if current_user and hasattr(current_user, 'id') else None
+
+    try:
+        schedule = schedule_service.create_schedule(db.session, bot_id, data, creator_id=creator_id)
+        return bot_schedule_schema.dump(schedule), 201
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error creating schedule: {e}")
+        return jsonify({"message": "An internal error occurred"}), 500
+
+
+@bots_bp.route("/<uuid:bot_id>/schedules/<uuid:schedule_id>", methods=["PUT"])
+@admin_required
+def update_bot_schedule(current_user: AuthenticatedUser, bot_id: UUID, schedule_id: UUID):
+    json_data = request.get_json()
+    if not json_data:
+        return jsonify({"message": "No input data provided"}), 400
+
+    try:
+        data = bot_schedule_update_schema.load(json_data)
+    except ValidationError as err:
+        return jsonify({"errors": err.messages}), 400
+
+    schedule = schedule_service.get_schedule(db.session, bot_id, schedule_id)
+    if not schedule:
+        return jsonify({"message": "Schedule not found"}), 404
+
+    if data.get("parameters") is not None:
+        try:
+            parameter_validation.validate_parameters(schedule.bot_configuration, data["parameters"])
+        except ParameterError as e:
+            return jsonify({"errors": {"parameters": e.messages}}), 400
+
+    try:
+        schedule = schedule_service.update_schedule(db.session, schedule, data)
+        return bot_schedule_schema.dump(schedule), 200
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error updating schedule: {e}")
+        return jsonify({"message": "An internal error occurred"}), 500
+
+
+@bots_bp.route("/<uuid:bot_id>/schedules/<uuid:schedule_id>", methods=["DELETE"])
+@admin_required
+def delete_bot_schedule(current_user: AuthenticatedUser, bot_id: UUID, schedule_id: UUID):
+    schedule = schedule_service.get_schedule(db.session, bot_id, schedule_id)
+    if not schedule:
+        return jsonify({"message": "Schedule not found"}), 404
+    schedule_service.delete_schedule(db.session, schedule)
+    return '', 204
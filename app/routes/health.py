@@ -1,31 +1,36 @@
-from flask import Blueprint, jsonify
-from app.extensions import db 
-from sqlalchemy import text
+from flask import Blueprint, Response, jsonify
+from app.extensions import db
+from core import database
 from core.config import settings
+from app.services import bot_service, health_service
 
 health_bp = Blueprint("health", __name__)
 
+_LIVE_BODY = b'{"status": "alive"}'
+
+
+@health_bp.route("/live", methods=["GET"])
+def liveness():
+    """The process is serving requests; checks no dependency."""
+    return Response(_LIVE_BODY, status=200, mimetype="application/json")
+
+
+@health_bp.route("/ready", methods=["GET"])
+def readiness():
+    """The latest background check of Postgres, Redis and (with HEALTH_REQUIRE_WORKERS) workers."""
+    status, body, _ = health_service.get_readiness_checker().snapshot()
+    return Response(body, status=status, mimetype="application/json")
+
+
 @health_bp.route("/", methods=["GET"])
 def health_check():
-    db_status = "disconnected"
-    db_error = None
-    try:
-        result = db.session.execute(text("SELECT 1")).scalar_one()
-        if result == 1:
-            db_status = "connected"
-    except Exception as e:
-        db_error = str(e)
-        db.session.rollback()
-        db_status = "error"
-        print(f"Health check DB error: {e}")
-
+    status, _, report = health_service.get_readiness_checker().snapshot()
     response = {
-        "status": "healthy" if db_status == "connected" else "degraded",
+        "status": "healthy" if status == 200 else "degraded",
         "project_name": settings.PROJECT_NAME,
-        "database_status": db_status
+        "database_status": "connected" if report.get("database", {}).get("status") == "ok" else "error",
+        "checks": report,
+        "bot_config_cache": bot_service.bot_config_cache_stats(),
+        "database_pool": database.pool_stats(db.engine),
     }
-    if db_error:
-        response["database_error"] = db_error
-
-    status_code = 200 if db_status == "connected" else 503
-    return jsonify(response), status_code
\ No newline at end of file
+    return jsonify(response), status
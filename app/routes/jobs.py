@@ -1,3 +1,413 @@
+import json
+import os
+import redis
+from flask import Blueprint, request, jsonify, Response, stream_with_context, send_file
+from app.extensions import db
+from app.schemas.job_schema import (
+    jobs_schema, job_logs_schema, job_batch_create_schema, job_schedule_create_schema, job_artifacts_schema,
+    job_dead_letter_requeue_schema,
+)
+from app.services import artifact_service, bot_service, job_query, job_service, job_log_service, parameter_validation, upload_service
+from app.services.parameter_validation import ParameterError
+from app.services.upload_service import UploadError
+from app import job_control
+from core.auth import token_required, admin_required, AuthenticatedUser
+from core.config import settings
+from core.pagination import encode_cursor, decode_cursor, InvalidCursor
+from datetime import datetime, timezone
+from uuid import UUID
+from marshmallow import ValidationError
 
+jobs_bp = Blueprint("jobs", __name__)
 
 
+def _sse(event: str, data, event_id=None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@jobs_bp.route("/batch", methods=["POST"])
+@admin_required
+def create_job_batch(current_user: AuthenticatedUser):
+    json_data = request.get_json()
+    if not json_data:
+        return jsonify({"message": "No input data provided"}), 400
+
+    try:
+        data = job_batch_create_schema.load(json_data)
+    except ValidationError as err:
+        return jsonify({"errors": err.messages}), 400
+
+    bot = bot_service.get_bot_config_by_id(db=db.session, bot_id=data["bot_config_id"])
+    if not bot:
+        return jsonify({"message": "Bot configuration not found"}), 404
+    if not bot.is_enabled:
+        return jsonify({"message": f"Bot '{bot.name}' is disabled"}), 409
+
+    try:
+        input_files = upload_service.get_input_files(db.session, data["input_files"]) if data["input_files"] else None
+    except UploadError as e:
+        return jsonify({"errors": {"input_files": [str(e)]}}), 400
+
+    try:
+        parameter_sets = parameter_validation.validate_parameter_sets(bot, data["parameter_sets"], input_files)
+    except ParameterError as e:
+        return jsonify({"errors": {"parameter_sets": e.messages}}), 400
+
+    user_id = current_user.id if current_user and hasattr(current_user, 'id') else None
+
+    try:
+        batch_id, job_ids = job_service.create_jobs_batch(
+            db.session, bot_config=bot, parameter_sets=parameter_sets, triggered_by_user_id=user_id,
+            input_files=input_files,
+        )
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error creating job batch: {e}")
+        return jsonify({"message": "An internal error occurred"}), 500
+
+    return jsonify({
+        "batch_id": str(batch_id),
+        "count": len(job_ids),
+        "job_ids": [str(job_id) for job_id in job_ids],
+    }), 202
+
+
+@jobs_bp.route("/schedule", methods=["POST"])
+@admin_required
+def schedule_job(current_user: AuthenticatedUser):
+    json_data = request.get_json()
+    if not json_data:
+        return jsonify({"message": "No input data provided"}), 400
+
+    try:
+        data = job_schedule_create_schema.load(json_data)
+    except ValidationError as err:
+        return jsonify({"errors": err.messages}), 400
+
+    bot = bot_service.get_bot_config_by_id(db=db.session, bot_id=data["bot_config_id"])
+    if not bot:
+        return jsonify({"message": "Bot configuration not found"}), 404
+    if not bot.is_enabled:
+        return jsonify({"message": f"Bot '{bot.name}' is disabled"}), 409
+
+    try:
+        input_files = upload_service.get_input_files(db.session, data["input_files"]) if data["input_files"] else None
+    except UploadError as e:
+        return jsonify({"errors": {"input_files": [str(e)]}}), 400
+
+    try:
+        parameters = parameter_validation.validate_parameters(bot, data["parameters"], input_files)
+    except ParameterError as e:
+        return jsonify({"errors": {"parameters": e.messages}}), 400
+
+    user_id = current_user.id if current_user and hasattr(current_user, 'id') else None
+
+    try:
+        job = job_service.schedule_job(
+            db.session, bot_config=bot, run_at=data["run_at"], parameters=parameters, triggered_by_user_id=user_id,
+            input_files=input_files,
+        )
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error scheduling job: {e}")
+        return jsonify({"message": "An internal error occurred"}), 500
+
+    return jsonify({
+        "job_id": str(job.id),
+        "status": job.status,
+        "scheduled_at": job.scheduled_at.isoformat(),
+    }), 201
+
+
+def _parse_datetime_arg(name: str):
+    value = request.args.get(name, type=str)
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+@jobs_bp.route("/", methods=["GET"])
+@token_required
+def list_jobs(current_user: AuthenticatedUser):
+    """Newest jobs first, filtered by bot, status (comma-separated) and creation time; paged with `cursor`."""
+    limit = min(max(request.args.get("limit", 50, type=int), 1), settings.JOB_LIST_MAX_LIMIT)
+    statuses = [s.strip() for s in request.args.get("status", "", type=str).split(",") if s.strip()]
+    try:
+        bot_config_id = request.args.get("bot_config_id", type=str)
+        bot_config_id = UUID(bot_config_id) if bot_config_id else None
+    except ValueError:
+        return jsonify({"errors": {"bot_config_id": ["Not a valid UUID."]}}), 400
+    try:
+        created_after = _parse_datetime_arg("created_after")
+        created_before = _parse_datetime_arg("created_before")
+    except ValueError:
+        return jsonify({"errors": {"created_after/created_before": ["Not a valid ISO 8601 datetime."]}}), 400
+
+    before = None
+    cursor = request.args.get("cursor", type=str)
+    if cursor:
+        try:
+            created_at, job_id = decode_cursor(cursor, 2)
+            before = (datetime.fromisoformat(created_at), UUID(job_id))
+        except (InvalidCursor, ValueError, TypeError):
+            return jsonify({"errors": {"cursor": ["Invalid cursor."]}}), 400
+
+    jobs = job_query.list_jobs(
+        db.session, bot_config_id=bot_config_id, statuses=statuses, created_after=created_after,
+        created_before=created_before, before=before, limit=limit + 1,
+    )
+    headers = {}
+    if len(jobs) > limit:
+        jobs = jobs[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(jobs[-1].created_at.isoformat(), jobs[-1].id)
+    return jobs_schema.dump(jobs), 200, headers
+
+
+@jobs_bp.route("/summary", methods=["GET"])
+@token_required
+def get_job_summary(current_user: AuthenticatedUser):
+    """Job counts per bot and status (the dashboard tiles), read from the status counters."""
+    try:
+        bot_config_id = request.args.get("bot_config_id", type=str)
+        bot_config_id = UUID(bot_config_id) if bot_config_id else None
+    except ValueError:
+        return jsonify({"errors": {"bot_config_id": ["Not a valid UUID."]}}), 400
+    counts = job_query.status_counts(db.session, bot_config_id=bot_config_id)
+    totals = {}
+    for by_status in counts.values():
+        for status, count in by_status.items():
+            totals[status] = totals.get(status, 0) + count
+    return jsonify({"bots": {str(bot_id): by_status for bot_id, by_status in counts.items()}, "totals": totals}), 200
+
+
+@jobs_bp.route("/dead-letter", methods=["GET"])
+@token_required
+def list_dead_letter_jobs(current_user: AuthenticatedUser):
+    """Jobs that failed after exhausting their bot's retries, most recent first; paged with `cursor`."""
+    limit = min(max(request.args.get("limit", 50, type=int), 1), settings.JOB_LIST_MAX_LIMIT)
+    try:
+        bot_config_id = request.args.get("bot_config_id", type=str)
+        bot_config_id = UUID(bot_config_id) if bot_config_id else None
+    except ValueError:
+        return jsonify({"errors": {"bot_config_id": ["Not a valid UUID."]}}), 400
+
+    before = None
+    cursor = request.args.get("cursor", type=str)
+    if cursor:
+        try:
+            dead_lettered_at, job_id = decode_cursor(cursor, 2)
+            before = (datetime.fromisoformat(dead_lettered_at), UUID(job_id))
+        except (InvalidCursor, ValueError, TypeError):
+            return jsonify({"errors": {"cursor": ["Invalid cursor."]}}), 400
+
+    jobs = job_query.list_dead_letter_jobs(db.session, bot_config_id=bot_config_id, before=before, limit=limit + 1)
+    headers = {}
+    if len(jobs) > limit:
+        jobs = jobs[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(jobs[-1].dead_lettered_at.isoformat(), jobs[-1].id)
+    return jobs_schema.dump(jobs), 200, headers
+
+
+@jobs_bp.route("/dead-letter/requeue", methods=["POST"])
+@admin_required
+def requeue_dead_letter_jobs(current_user: AuthenticatedUser):
+    try:
+        data = job_dead_letter_requeue_schema.load(request.get_json(silent=True) or {})
+    except ValidationError as err:
+        return jsonify({"errors": err.messages}), 400
+
+    try:
+        job_ids = job_service.requeue_dead_letter_jobs(db.session, job_ids=data["job_ids"], bot_config_id=data["bot_config_id"])
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error requeueing dead-lettered jobs: {e}")
+        return jsonify({"message": "An internal error occurred"}), 500
+
+    return jsonify({"count": len(job_ids), "job_ids": [str(job_id) for job_id in job_ids]}), 202
+
+
+@jobs_bp.route("/batch/<uuid:batch_id>", methods=["GET"])
+@token_required
+def get_job_batch(current_user: AuthenticatedUser, batch_id: UUID):
+    counts = job_service.get_batch_status_counts(db.session, batch_id)
+    if not counts:
+        return jsonify({"message": "Batch not found"}), 404
+    return jsonify({
+        "batch_id": str(batch_id),
+        "total": sum(counts.values()),
+        "status_counts": counts,
+    }), 200
+
+
+@jobs_bp.route("/<uuid:job_id>/cancel", methods=["POST"])
+@admin_required
+def cancel_job(current_user: AuthenticatedUser, job_id: UUID):
+    try:
+        status = job_service.request_cancel_job(db.session, job_id)
+    except redis.RedisError as e:
+        db.session.rollback()
+        print(f"Error requesting cancellation of job {job_id}: {e}")
+        return jsonify({"message": "Cancellation channel unavailable"}), 503
+
+    if status is None:
+        return jsonify({"message": "Job not found"}), 404
+    if status not in ("cancelled", "cancelling"):
+        return jsonify({"message": f"Job already finished with status '{status}'", "status": status}), 409
+    return jsonify({"job_id": str(job_id), "status": status}), 202
+
+
+@jobs_bp.route("/<uuid:job_id>/progress", methods=["GET"])
+@token_required
+def get_job_progress(current_user: AuthenticatedUser, job_id: UUID):
+    job = job_service.get_job_by_id(db.session, job_id)
+    if not job:
+        return jsonify({"message": "Job not found"}), 404
+
+    response = {
+        "job_id": str(job_id),
+        "status": job.status,
+        "progress_percent": job.progress_percent,
+        "progress_message": job.progress_message,
+        "heartbeat": None,
+    }
+    if job.status in ("running", "cancelling"):
+        try:
+            heartbeat = job_control.get_heartbeat(job_id)
+        except redis.RedisError as e:
+            print(f"Error reading heartbeat of job {job_id}: {e}")
+            heartbeat = None
+        if heartbeat:
+            response["heartbeat"] = heartbeat
+            if heartbeat["progress_percent"] is not None:
+                response["progress_percent"] = heartbeat["progress_percent"]
+            if heartbeat["progress_message"]:
+                response["progress_message"] = heartbeat["progress_message"]
+    return jsonify(response), 200
+
+
+@jobs_bp.route("/<uuid:job_id>/artifacts", methods=["GET"])
+@token_required
+def get_job_artifacts(current_user: AuthenticatedUser, job_id: UUID):
+    job = job_service.get_job_by_id(db.session, job_id)
+    if not job:
+        return jsonify({"message": "Job not found"}), 404
+    return job_artifacts_schema.dump(artifact_service.get_job_artifacts(db.session, job_id)), 200
+
+
+@jobs_bp.route("/<uuid:job_id>/artifacts/<name>", methods=["GET"])
+@token_required
+def download_job_artifact(current_user: AuthenticatedUser, job_id: UUID, name: str):
+    """
+    Sends the artifact file from disk (wsgi.file_wrapper / sendfile, or X-Sendfile with
+    USE_X_SENDFILE) with Range and conditional request support; it is never read into memory.
+    """
+    artifact = artifact_service.get_job_artifact(db.session, job_id, name)
+    if not artifact:
+        return jsonify({"message": "Artifact not found"}), 404
+    path = artifact_service.artifact_path(artifact)
+    if not os.path.exists(path):
+        print(f"Artifact {name} of job {job_id} is missing its blob {artifact.sha256}.")
+        return jsonify({"message": "Artifact content is no longer available"}), 410
+
+    return send_file(
+        path,
+        mimetype=artifact.content_type,
+        as_attachment=True,
+        download_name=artifact.name,
+        conditional=True,
+        etag=artifact.sha256,
+        last_modified=artifact.created_at,
+        max_age=settings.JOB_ARTIFACT_MAX_AGE,
+    )
+
+
+@jobs_bp.route("/<uuid:job_id>/logs", methods=["GET"])
+@token_required
+def get_job_logs(current_user: AuthenticatedUser, job_id: UUID):
+    after_id = request.args.get("after_id", type=int)
+    limit = min(request.args.get("limit", 500, type=int), 5000)
+
+    job = job_service.get_job_by_id(db.session, job_id)
+    if not job:
+        return jsonify({"message": "Job not found"}), 404
+
+    logs = job_service.get_job_logs(db.session, job_id, after_id=after_id, limit=limit)
+    return job_logs_schema.dump(logs), 200
+
+
+@jobs_bp.route("/<uuid:job_id>/logs/stream", methods=["GET"])
+@token_required
+def stream_job_logs(current_user: AuthenticatedUser, job_id: UUID):
+    """
+    Server-Sent Events tail of a job's logs: a backfill from `job_logs` followed by
+    the live Redis feed. Each entry's event id is its JobLog id, so reconnecting
+    clients resume from `Last-Event-ID`.
+    """
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        after_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({"message": "Invalid Last-Event-ID"}), 400
+
+    # Subscribe before reading the backfill so nothing flushed in between is missed;
+    # entries seen in both are dropped by id.
+    pubsub = job_log_service.subscribe_job_logs(job_id)
+
+    job = job_service.get_job_by_id(db.session, job_id)
+    if not job:
+        if pubsub is not None:
+            pubsub.close()
+        return jsonify({"message": "Job not found"}), 404
+    finished_status = job.status if job.status in job_service.TERMINAL_STATUSES else None
+    page_size = settings.JOB_LOG_STREAM_BACKFILL_PAGE_SIZE
+
+    def events():
+        last_id = after_id
+        try:
+            while True:
+                page = job_logs_schema.dump(job_service.get_job_logs(db.session, job_id, after_id=last_id, limit=page_size))
+                # Don't hold a pooled connection for the lifetime of the stream.
+                db.session.close()
+                for entry in page:
+                    last_id = entry["id"]
+                    yield _sse("log", entry, event_id=entry["id"])
+                if len(page) < page_size:
+                    break
+
+            if finished_status is not None:
+                yield _sse("end", {"status": finished_status})
+                return
+            if pubsub is None:
+                # No live feed available: ask the client to reconnect (and resume) shortly.
+                yield "retry: 2000\n\n"
+                return
+
+            while True:
+                message = pubsub.get_message(timeout=settings.JOB_LOG_STREAM_KEEPALIVE)
+                if message is None:
+                    yield ": keepalive\n\n"
+                    continue
+                event = json.loads(message["data"])
+                if event.get("event") == "end":
+                    yield _sse("end", {"status": event.get("status")})
+                    return
+                entry = event.get("log")
+                if not entry or (last_id is not None and entry["id"] <= last_id):
+                    continue
+                last_id = entry["id"]
+                yield _sse("log", entry, event_id=entry["id"])
+        finally:
+            if pubsub is not None:
+                pubsub.close()
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,87 @@
+from flask import Blueprint, request, jsonify
+from app.extensions import db
+from app.schemas.upload_schema import upload_schema, upload_create_schema
+from app.services import upload_service
+from app.services.upload_service import UploadError, UploadOffsetMismatch, UploadBusy
+from core.auth import token_required, admin_required, AuthenticatedUser
+from core.config import settings
+from uuid import UUID
+from marshmallow import ValidationError
+
+uploads_bp = Blueprint("uploads", __name__)
+
+
+def _upload_response(upload, status_code: int):
+    return upload_schema.dump(upload), status_code, {"Upload-Offset": str(upload.offset)}
+
+
+@uploads_bp.route("/", methods=["POST"])
+@admin_required
+def create_upload(current_user: AuthenticatedUser):
+    json_data = request.get_json()
+    if not json_data:
+        return jsonify({"message": "No input data provided"}), 400
+
+    try:
+        data = upload_create_schema.load(json_data)
+    except ValidationError as err:
+        return jsonify({"errors": err.messages}), 400
+
+    creator_id = current_user.id if current_user and hasattr(current_user, 'id') else None
+
+    try:
+        upload = upload_service.create_upload(db.session, creator_id=creator_id, **data)
+    except UploadError as e:
+        return jsonify({"message": str(e)}), 400
+    return _upload_response(upload, 201)
+
+
+@uploads_bp.route("/<uuid:upload_id>", methods=["GET", "HEAD"])
+@token_required
+def get_upload(current_user: AuthenticatedUser, upload_id: UUID):
+    upload = upload_service.get_upload(db.session, upload_id)
+    if not upload:
+        return jsonify({"message": "Upload not found"}), 404
+    return _upload_response(upload, 200)
+
+
+@uploads_bp.route("/<uuid:upload_id>", methods=["PATCH"])
+@admin_required
+def append_upload_chunk(current_user: AuthenticatedUser, upload_id: UUID):
+    """
+    Appends the raw request body at the `Upload-Offset` header. The body is streamed to
+    disk, so a chunk may be up to `UPLOAD_MAX_CHUNK_SIZE` rather than `MAX_CONTENT_LENGTH`.
+    """
+    request.max_content_length = settings.UPLOAD_MAX_CHUNK_SIZE
+    offset = request.headers.get("Upload-Offset", type=int)
+    if offset is None or offset < 0:
+        return jsonify({"message": "Missing or invalid Upload-Offset header"}), 400
+
+    upload = upload_service.get_upload(db.session, upload_id)
+    if not upload:
+        return jsonify({"message": "Upload not found"}), 404
+
+    try:
+        upload = upload_service.append_chunk(db.session, upload, offset, request.stream)
+    except UploadOffsetMismatch as e:
+        return jsonify({"message": str(e), "offset": e.offset}), 409, {"Upload-Offset": str(e.offset)}
+    except UploadBusy as e:
+        return jsonify({"message": str(e)}), 409
+    except UploadError as e:
+        return jsonify({"message": str(e)}), 400
+    return _upload_response(upload, 200)
+
+
+@uploads_bp.route("/<uuid:upload_id>/complete", methods=["POST"])
+@admin_required
+def complete_upload(current_user: AuthenticatedUser, upload_id: UUID):
+    """Finalizes an upload created without a `size`."""
+    upload = upload_service.get_upload(db.session, upload_id)
+    if not upload:
+        return jsonify({"message": "Upload not found"}), 404
+
+    try:
+        upload = upload_service.complete_upload(db.session, upload)
+    except UploadError as e:
+        return jsonify({"message": str(e)}), 400
+    return _upload_response(upload, 200)
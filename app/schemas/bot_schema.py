@@ -2,6 +2,8 @@ from app.extensions import ma
 from app.models.bot_model import BotConfiguration
 from marshmallow import fields, validate, EXCLUDE 
 from uuid import UUID
+from functools import lru_cache
+from typing import List, Tuple
 
 
 class ParameterSchemaItemSchema(ma.Schema):
@@ -38,6 +40,20 @@ class BotConfigurationSchema(ma.SQLAlchemyAutoSchema):
         load_default=None 
     )
     is_enabled = fields.Bool(load_default=True) 
+    max_concurrency = fields.Int(allow_none=True, load_default=None, validate=validate.Range(min=1))
+    dispatch_weight = fields.Int(load_default=1, validate=validate.Range(min=1, max=1000))
+    execution_mode = fields.Str(load_default="inline", validate=validate.OneOf(["inline", "thread", "subprocess"]))
+    timeout_seconds = fields.Int(allow_none=True, load_default=None, validate=validate.Range(min=1))
+    cpu_time_limit = fields.Int(allow_none=True, load_default=None, validate=validate.Range(min=1))
+    memory_limit_mb = fields.Int(allow_none=True, load_default=None, validate=validate.Range(min=16))
+    # Seconds a successful result is reused for identical submissions; None disables the result cache.
+    result_cache_ttl = fields.Int(allow_none=True, load_default=None, validate=validate.Range(min=1))
+    # Failed runs are retried up to `max_retries` times, after an exponentially growing, jittered delay.
+    # `retry_on` lists exception class names to retry (including base classes); None retries any error.
+    max_retries = fields.Int(allow_none=True, load_default=None, validate=validate.Range(min=0, max=100))
+    retry_backoff_seconds = fields.Int(allow_none=True, load_default=None, validate=validate.Range(min=1))
+    retry_backoff_max_seconds = fields.Int(allow_none=True, load_default=None, validate=validate.Range(min=1))
+    retry_on = fields.List(fields.Str(validate=validate.Length(min=1, max=255)), allow_none=True, load_default=None)
     created_at = fields.DateTime(dump_only=True)
     updated_at = fields.DateTime(dump_only=True)
     created_by_user_id_display = fields.UUID(data_key="created_by", attribute="created_by", dump_only=True, allow_none=True)
@@ -45,11 +61,39 @@ class BotConfigurationSchema(ma.SQLAlchemyAutoSchema):
 bot_config_schema = BotConfigurationSchema()
 bot_configs_schema = BotConfigurationSchema(many=True)
 
+# bot_service takes plain dicts, so the input schemas don't build model instances.
 bot_config_create_schema = BotConfigurationSchema(
-    exclude=("id", "created_at", "updated_at", "created_by_user_id_display")
+    exclude=("id", "created_at", "updated_at", "created_by_user_id_display"),
+    load_instance=False,
 )
 
 bot_config_update_schema = BotConfigurationSchema(
     partial=True, 
-    exclude=("id", "created_at", "updated_at", "created_by_user_id_display")
-)
\ No newline at end of file
+    exclude=("id", "created_at", "updated_at", "created_by_user_id_display"),
+    load_instance=False,
+)
+
+
+# Maps each output key of a dumped bot configuration to its schema field name and model attribute.
+BOT_CONFIG_OUTPUT_FIELDS = {
+    field.data_key or name: (name, field.attribute or name)
+    for name, field in bot_configs_schema.dump_fields.items()
+}
+
+
+@lru_cache(maxsize=64)
+def _sparse_bot_configs_schema(field_names: frozenset) -> BotConfigurationSchema:
+    return BotConfigurationSchema(many=True, only=field_names)
+
+
+def sparse_bot_configs_schema(output_fields: List[str]) -> Tuple[BotConfigurationSchema, List[str]]:
+    """
+    Returns a list schema that dumps only `output_fields` (output keys, e.g. 'created_by'),
+    together with the model columns that must be selected to fill them.
+    """
+    unknown = [f for f in output_fields if f not in BOT_CONFIG_OUTPUT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(sorted(BOT_CONFIG_OUTPUT_FIELDS))}.")
+    field_names = frozenset(BOT_CONFIG_OUTPUT_FIELDS[f][0] for f in output_fields)
+    columns = sorted({BOT_CONFIG_OUTPUT_FIELDS[f][1] for f in output_fields})
+    return _sparse_bot_configs_schema(field_names), columns
@@ -0,0 +1,77 @@
+from datetime import timezone
+from app.extensions import ma
+from app.models.job_model import Job, JobLog, JobArtifact
+from core.config import settings
+from marshmallow import fields, validate, EXCLUDE
+
+
+class JobSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = Job
+        include_fk = True
+
+
+job_schema = JobSchema()
+jobs_schema = JobSchema(many=True)
+
+
+class JobLogSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = JobLog
+        include_fk = True
+
+
+job_log_schema = JobLogSchema()
+job_logs_schema = JobLogSchema(many=True)
+
+
+class JobBatchCreateSchema(ma.Schema):
+    bot_config_id = fields.UUID(required=True)
+    parameter_sets = fields.List(
+        fields.Dict(keys=fields.Str(), values=fields.Raw(), allow_none=True),
+        required=True,
+        validate=validate.Length(min=1, max=settings.JOB_BATCH_MAX_SIZE),
+    )
+    # Ids of completed uploads, shared by every job of the batch.
+    input_files = fields.List(fields.UUID(), load_default=None)
+
+    class Meta:
+        unknown = EXCLUDE
+
+
+job_batch_create_schema = JobBatchCreateSchema()
+
+
+class JobScheduleCreateSchema(ma.Schema):
+    bot_config_id = fields.UUID(required=True)
+    run_at = fields.AwareDateTime(required=True, default_timezone=timezone.utc)
+    parameters = fields.Dict(keys=fields.Str(), values=fields.Raw(), allow_none=True, load_default=None)
+    input_files = fields.List(fields.UUID(), load_default=None)
+
+    class Meta:
+        unknown = EXCLUDE
+
+
+job_schedule_create_schema = JobScheduleCreateSchema()
+
+
+class JobDeadLetterRequeueSchema(ma.Schema):
+    # Neither given: requeue every dead-lettered job (up to JOB_BATCH_MAX_SIZE).
+    job_ids = fields.List(fields.UUID(), validate=validate.Length(min=1, max=settings.JOB_BATCH_MAX_SIZE), load_default=None)
+    bot_config_id = fields.UUID(load_default=None)
+
+    class Meta:
+        unknown = EXCLUDE
+
+
+job_dead_letter_requeue_schema = JobDeadLetterRequeueSchema()
+
+
+class JobArtifactSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = JobArtifact
+        include_fk = True
+        exclude = ("id",)
+
+
+job_artifacts_schema = JobArtifactSchema(many=True)
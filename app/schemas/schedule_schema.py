@@ -0,0 +1,27 @@
+from app.extensions import ma
+from app.models.schedule_model import BotSchedule
+from marshmallow import fields, validate, EXCLUDE
+
+
+class BotScheduleSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = BotSchedule
+        include_fk = True
+        exclude = ("created_by",)
+        unknown = EXCLUDE
+
+    id = fields.UUID(dump_only=True)
+    bot_config_id = fields.UUID(dump_only=True)
+    cron_expression = fields.Str(required=True, validate=validate.Length(min=9, max=100))
+    timezone = fields.Str(load_default="UTC", validate=validate.Length(min=1, max=64))
+    parameters = fields.Dict(keys=fields.Str(), values=fields.Raw(), allow_none=True, load_default=None)
+    is_enabled = fields.Bool(load_default=True)
+    next_run_at = fields.DateTime(dump_only=True)
+    last_run_at = fields.DateTime(dump_only=True)
+    created_at = fields.DateTime(dump_only=True)
+    updated_at = fields.DateTime(dump_only=True)
+
+
+bot_schedule_schema = BotScheduleSchema()
+bot_schedules_schema = BotScheduleSchema(many=True)
+bot_schedule_update_schema = BotScheduleSchema(partial=True)
@@ -0,0 +1,25 @@
+from app.extensions import ma
+from app.models.upload_model import Upload
+from core.config import settings
+from marshmallow import fields, validate, EXCLUDE
+
+
+class UploadSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = Upload
+        include_fk = True
+        exclude = ("created_by", "expected_sha256")
+
+
+class UploadCreateSchema(ma.Schema):
+    filename = fields.Str(required=True, validate=validate.Length(min=1, max=255))
+    content_type = fields.Str(load_default=None, validate=validate.Length(max=255))
+    size = fields.Int(load_default=None, validate=validate.Range(min=0, max=settings.UPLOAD_MAX_FILE_SIZE))
+    sha256 = fields.Str(load_default=None, validate=validate.Regexp(r"^[0-9a-fA-F]{64}$"))
+
+    class Meta:
+        unknown = EXCLUDE
+
+
+upload_schema = UploadSchema()
+upload_create_schema = UploadCreateSchema()
@@ -0,0 +1,167 @@
+import importlib
+import inspect
+import os
+import pkgutil
+import sys
+import threading
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from core.config import settings
+
+SCRIPTS_PACKAGE = "rpa_scripts"
+
+
+class InvalidScriptIdentifier(ValueError):
+    """Raised when a `script_identifier` does not resolve to a callable in `rpa_scripts`."""
+
+
+class Script(NamedTuple):
+    """A resolved script: its callable and how executors call it."""
+
+    function: Callable
+    module_name: str
+    mtime: Optional[float]
+    accepts_job_control: bool
+    is_async: bool
+
+
+_entries: Dict[str, Script] = {}
+_module_mtimes: Dict[str, Optional[float]] = {}
+_lock = threading.Lock()
+
+
+def parse_script_identifier(script_identifier: str) -> Tuple[str, str]:
+    """Splits 'module_name.function_name' into the full module path and the function name."""
+    if not script_identifier or '.' not in script_identifier:
+        raise InvalidScriptIdentifier(
+            f"Invalid script_identifier format: '{script_identifier}'. Expected 'module_name.function_name'."
+        )
+    module_name_rel, function_name = script_identifier.rsplit('.', 1)
+    if not module_name_rel or not function_name:
+        raise InvalidScriptIdentifier(
+            f"Invalid script_identifier format: '{script_identifier}'. Expected 'module_name.function_name'."
+        )
+    return f"{SCRIPTS_PACKAGE}.{module_name_rel}", function_name
+
+
+def _module_mtime(module) -> Optional[float]:
+    module_file = getattr(module, "__file__", None)
+    if not module_file:
+        return None
+    try:
+        return os.stat(module_file).st_mtime
+    except OSError:
+        return None
+
+
+def _is_stale(entry: Script) -> bool:
+    module = sys.modules.get(entry.module_name)
+    return module is None or _module_mtime(module) != entry.mtime
+
+
+def _accepts_keyword(function: Callable, name: str) -> bool:
+    try:
+        parameters = inspect.signature(function).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(p.name == name or p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters)
+
+
+def _load(script_identifier: str) -> Script:
+    full_module_name, function_name = parse_script_identifier(script_identifier)
+
+    try:
+        module = importlib.import_module(full_module_name)
+        current_mtime = _module_mtime(module)
+        if full_module_name in _module_mtimes and _module_mtimes[full_module_name] != current_mtime:
+            module = importlib.reload(module)
+        _module_mtimes[full_module_name] = current_mtime
+    except ImportError as e:
+        raise InvalidScriptIdentifier(
+            f"Failed to import RPA script module '{full_module_name}': {e}. "
+            f"Ensure it exists and the rpa_scripts directory is in PYTHONPATH."
+        ) from e
+    except Exception as e:
+        # A SyntaxError or an error raised while the module body runs.
+        raise InvalidScriptIdentifier(
+            f"Error importing RPA script module '{full_module_name}': {type(e).__name__}: {e}"
+        ) from e
+
+    function = getattr(module, function_name, None)
+    if function is None:
+        raise InvalidScriptIdentifier(f"Failed to find function '{function_name}' in module '{full_module_name}'.")
+    if not callable(function):
+        raise InvalidScriptIdentifier(f"'{function_name}' in module '{full_module_name}' is not callable.")
+
+    entry = Script(
+        function=function,
+        module_name=full_module_name,
+        mtime=current_mtime,
+        accepts_job_control=_accepts_keyword(function, "job_control"),
+        is_async=inspect.iscoroutinefunction(function),
+    )
+    _entries[script_identifier] = entry
+    return entry
+
+
+def get(script_identifier: str) -> Script:
+    """
+    Like `resolve`, but returns the whole `Script`, so one job's executor can call it
+    without looking it up again.
+    """
+    return _resolve_entry(script_identifier)
+
+
+def resolve(script_identifier: str) -> Callable:
+    """
+    Returns the callable for `script_identifier`, importing it on first use.
+    With `RPA_SCRIPTS_AUTO_RELOAD` enabled, a changed module file is reloaded.
+    """
+    return _resolve_entry(script_identifier).function
+
+
+def accepts_job_control(script_identifier: str) -> bool:
+    """Whether the script's callable takes a `job_control` keyword (or **kwargs)."""
+    return _resolve_entry(script_identifier).accepts_job_control
+
+
+def is_async(script_identifier: str) -> bool:
+    """Whether the script's callable is an `async def` coroutine function."""
+    return _resolve_entry(script_identifier).is_async
+
+
+def _resolve_entry(script_identifier: str) -> Script:
+    entry = _entries.get(script_identifier)
+    if entry is not None and not (settings.RPA_SCRIPTS_AUTO_RELOAD and _is_stale(entry)):
+        return entry
+    with _lock:
+        return _load(script_identifier)
+
+
+def validate(script_identifier: str) -> None:
+    """Raises `InvalidScriptIdentifier` unless `script_identifier` resolves to a callable."""
+    resolve(script_identifier)
+
+
+def reload(script_identifier: Optional[str] = None) -> None:
+    """Drops cached callables (all of them, or one) so the next `resolve` re-imports changed modules."""
+    with _lock:
+        if script_identifier is None:
+            _entries.clear()
+        else:
+            _entries.pop(script_identifier, None)
+
+
+def warm() -> int:
+    """Imports every module in the rpa_scripts package. Returns the number imported."""
+    package = importlib.import_module(SCRIPTS_PACKAGE)
+    imported = 0
+    for module_info in pkgutil.iter_modules(package.__path__, prefix=f"{SCRIPTS_PACKAGE}."):
+        try:
+            module = importlib.import_module(module_info.name)
+        except Exception as e:
+            print(f"Error importing RPA script module {module_info.name}: {e}")
+            continue
+        _module_mtimes.setdefault(module_info.name, _module_mtime(module))
+        imported += 1
+    return imported
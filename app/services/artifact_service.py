@@ -0,0 +1,81 @@
+import io
+import mimetypes
+import re
+from typing import BinaryIO, List, Optional, Tuple, Union
+from uuid import UUID
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.job_model import JobArtifact
+from app.services import upload_service
+
+ARTIFACT_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,254}$")
+
+
+def validate_artifact_name(name: str) -> None:
+    if not name or not ARTIFACT_NAME_PATTERN.match(name):
+        raise ValueError(
+            f"Invalid artifact name: '{name}'. Use letters, digits, '.', '_' and '-' (max 255 characters)."
+        )
+
+
+def as_stream(name: str, data: Union[BinaryIO, bytes, str],
+              content_type: Optional[str] = None) -> Tuple[BinaryIO, str]:
+    """Normalizes artifact data to a binary stream and fills in the content type from the name."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+        content_type = content_type or "text/plain; charset=utf-8"
+    if isinstance(data, (bytes, bytearray)):
+        data = io.BytesIO(data)
+    return data, content_type or mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+def save_artifact(engine: Engine, job_id: UUID, name: str, data: Union[BinaryIO, bytes, str],
+                  content_type: Optional[str] = None) -> JobArtifact:
+    """
+    Streams `data` (a binary file object, bytes or text) into the blob store and records it
+    as artifact `name` of the job, replacing an earlier artifact of that name. Runs in its
+    own session on `engine`, so it never commits the caller's pending `db.session` state.
+    """
+    validate_artifact_name(name)
+    stream, content_type = as_stream(name, data, content_type)
+    sha256, size = upload_service.write_blob(stream)
+    return record_artifact(engine, job_id, name, sha256, size, content_type)
+
+
+def record_artifact(engine: Engine, job_id: UUID, name: str, sha256: str, size: int,
+                    content_type: Optional[str]) -> JobArtifact:
+    """Records content already written with `upload_service.write_blob` as artifact `name`."""
+    with Session(engine, expire_on_commit=False) as session:
+        upload_service.ensure_blob_row(session, sha256, size)
+        session.execute(delete(JobArtifact).where(JobArtifact.job_id == job_id, JobArtifact.name == name))
+        artifact = JobArtifact(job_id=job_id, name=name, sha256=sha256, size=size, content_type=content_type)
+        session.add(artifact)
+        session.commit()
+    return artifact
+
+
+def copy_artifacts(db: Session, from_job_id: UUID, to_job_id: UUID) -> None:
+    """Gives `to_job_id` the artifacts of `from_job_id` (rows only; blobs are shared). Does not commit."""
+    db.execute(
+        insert(JobArtifact).from_select(
+            ["job_id", "name", "sha256", "size", "content_type", "created_at"],
+            select(literal(to_job_id, JobArtifact.job_id.type), JobArtifact.name, JobArtifact.sha256,
+                   JobArtifact.size, JobArtifact.content_type, func.now())
+            .where(JobArtifact.job_id == from_job_id),
+        )
+    )
+
+
+def get_job_artifacts(db: Session, job_id: UUID) -> List[JobArtifact]:
+    return db.query(JobArtifact).filter(JobArtifact.job_id == job_id).order_by(JobArtifact.name).all()
+
+
+def get_job_artifact(db: Session, job_id: UUID, name: str) -> Optional[JobArtifact]:
+    return db.query(JobArtifact).filter(JobArtifact.job_id == job_id, JobArtifact.name == name).first()
+
+
+def artifact_path(artifact: JobArtifact) -> str:
+    return upload_service.blob_path(artifact.sha256)
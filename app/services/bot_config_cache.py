@@ -0,0 +1,155 @@
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+from uuid import UUID
+
+import redis
+
+from app.models.bot_model import BotConfiguration
+from core.cache import CacheStats, TTLCache
+from core.config import settings
+from core.redis_client import get_redis
+
+GENERATION_KEY = "bot_config_cache:generation"
+
+_UUID_COLUMNS = {c.name for c in BotConfiguration.__table__.columns if c.type.python_type is UUID}
+_DATETIME_COLUMNS = {c.name for c in BotConfiguration.__table__.columns if c.type.python_type is datetime}
+
+_local = TTLCache(
+    max_entries=settings.BOT_CONFIG_CACHE_MAX_ENTRIES,
+    ttl=settings.BOT_CONFIG_CACHE_TTL if settings.BOT_CONFIG_CACHE_USE_REDIS
+    else min(settings.BOT_CONFIG_CACHE_TTL, settings.BOT_CONFIG_CACHE_LOCAL_ONLY_TTL),
+)
+_stats = CacheStats("local_hits", "redis_hits", "misses", "invalidations", "redis_errors")
+_generation = 0
+_generation_checked_at = 0.0
+_generation_lock = threading.Lock()
+
+
+def _snapshot(bot: BotConfiguration) -> Dict[str, Any]:
+    return {c.name: getattr(bot, c.key) for c in BotConfiguration.__table__.columns}
+
+
+def _encode(snapshot: Dict[str, Any]) -> str:
+    return json.dumps({
+        key: (str(value) if key in _UUID_COLUMNS and value is not None
+              else value.isoformat() if key in _DATETIME_COLUMNS and value is not None
+              else value)
+        for key, value in snapshot.items()
+    })
+
+
+def _decode(raw: bytes) -> Dict[str, Any]:
+    data = json.loads(raw)
+    for key in _UUID_COLUMNS:
+        if data.get(key) is not None:
+            data[key] = UUID(data[key])
+    for key in _DATETIME_COLUMNS:
+        if data.get(key) is not None:
+            data[key] = datetime.fromisoformat(data[key])
+    return data
+
+
+def _materialize(snapshot: Dict[str, Any]) -> BotConfiguration:
+    """Builds a transient (session-less) BotConfiguration, suitable for reading and serializing only."""
+    return BotConfiguration(**snapshot)
+
+
+def _redis_key(generation: int, cache_key: str) -> str:
+    return f"bot_config_cache:{generation}:{cache_key}"
+
+
+def _current_generation() -> int:
+    """
+    Returns the cache generation, re-reading the shared Redis counter at most once per
+    `BOT_CONFIG_CACHE_GENERATION_CHECK_INTERVAL`. A new generation empties the local tier.
+    """
+    global _generation, _generation_checked_at
+    if not settings.BOT_CONFIG_CACHE_USE_REDIS:
+        return _generation
+
+    now = time.monotonic()
+    if now - _generation_checked_at < settings.BOT_CONFIG_CACHE_GENERATION_CHECK_INTERVAL:
+        return _generation
+    with _generation_lock:
+        if now - _generation_checked_at < settings.BOT_CONFIG_CACHE_GENERATION_CHECK_INTERVAL:
+            return _generation
+        try:
+            shared = int(get_redis().get(GENERATION_KEY) or 0)
+        except redis.RedisError as e:
+            _stats.incr("redis_errors")
+            print(f"Bot config cache: could not read generation from Redis: {e}")
+            shared = _generation
+        if shared != _generation:
+            _local.clear()
+            _generation = shared
+        _generation_checked_at = now
+    return _generation
+
+
+def get(cache_key: str, loader: Callable[[], Optional[BotConfiguration]]) -> Optional[BotConfiguration]:
+    """
+    Read-through lookup. `cache_key` identifies the lookup (e.g. 'id:<uuid>', 'name:<name>');
+    `loader` queries the database on a miss. Hits return transient BotConfiguration objects.
+    """
+    generation = _current_generation()
+
+    snapshot = _local.get((generation, cache_key))
+    if snapshot is not None:
+        _stats.incr("local_hits")
+        return _materialize(snapshot)
+
+    if settings.BOT_CONFIG_CACHE_USE_REDIS:
+        try:
+            raw = get_redis().get(_redis_key(generation, cache_key))
+        except redis.RedisError as e:
+            _stats.incr("redis_errors")
+            print(f"Bot config cache: Redis read failed for {cache_key}: {e}")
+            raw = None
+        if raw is not None:
+            snapshot = _decode(raw)
+            _local.set((generation, cache_key), snapshot)
+            _stats.incr("redis_hits")
+            return _materialize(snapshot)
+
+    _stats.incr("misses")
+    bot = loader()
+    if bot is None:
+        return None
+
+    snapshot = _snapshot(bot)
+    _local.set((generation, cache_key), snapshot)
+    if settings.BOT_CONFIG_CACHE_USE_REDIS:
+        try:
+            get_redis().set(_redis_key(generation, cache_key), _encode(snapshot), ex=int(settings.BOT_CONFIG_CACHE_TTL))
+        except redis.RedisError as e:
+            _stats.incr("redis_errors")
+            print(f"Bot config cache: Redis write failed for {cache_key}: {e}")
+    return bot
+
+
+def invalidate() -> None:
+    """Starts a new cache generation, here and (through Redis) in every other process."""
+    global _generation, _generation_checked_at
+    with _generation_lock:
+        _local.clear()
+        _stats.incr("invalidations")
+        if settings.BOT_CONFIG_CACHE_USE_REDIS:
+            try:
+                _generation = int(get_redis().incr(GENERATION_KEY))
+                _generation_checked_at = time.monotonic()
+                return
+            except redis.RedisError as e:
+                _stats.incr("redis_errors")
+                print(f"Bot config cache: could not bump generation in Redis: {e}")
+        _generation += 1
+
+
+def stats() -> Dict[str, Any]:
+    return _stats.snapshot(
+        local_entries=len(_local),
+        generation=_generation,
+        redis_enabled=settings.BOT_CONFIG_CACHE_USE_REDIS,
+    )
@@ -1,52 +1,125 @@
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID
 
 from app.models.bot_model import BotConfiguration
+from app import script_registry
+from app.services import bot_config_cache
 
 class BotConfigCreateData:
     def __init__(self, name: str, script_identifier: str, description: Optional[str] = None,
                  parameter_schema: Optional[Dict[str, Any]] = None,
                  default_parameters: Optional[Dict[str, Any]] = None,
-                 is_enabled: bool = True):
+                 is_enabled: bool = True, max_concurrency: Optional[int] = None,
+                 dispatch_weight: int = 1, execution_mode: str = "inline",
+                 timeout_seconds: Optional[int] = None, cpu_time_limit: Optional[int] = None,
+                 memory_limit_mb: Optional[int] = None, result_cache_ttl: Optional[int] = None,
+                 max_retries: Optional[int] = None, retry_backoff_seconds: Optional[int] = None,
+                 retry_backoff_max_seconds: Optional[int] = None, retry_on: Optional[List[str]] = None):
         self.name = name
         self.description = description
         self.script_identifier = script_identifier
         self.parameter_schema = parameter_schema
         self.default_parameters = default_parameters
         self.is_enabled = is_enabled
+        self.max_concurrency = max_concurrency
+        self.dispatch_weight = dispatch_weight
+        self.execution_mode = execution_mode
+        self.timeout_seconds = timeout_seconds
+        self.cpu_time_limit = cpu_time_limit
+        self.memory_limit_mb = memory_limit_mb
+        self.result_cache_ttl = result_cache_ttl
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.retry_backoff_max_seconds = retry_backoff_max_seconds
+        self.retry_on = retry_on
 
 class BotConfigUpdateData:
     def __init__(self, name: Optional[str] = None, description: Optional[str] = None,
                  script_identifier: Optional[str] = None,
                  parameter_schema: Optional[Dict[str, Any]] = None,
                  default_parameters: Optional[Dict[str, Any]] = None,
-                 is_enabled: Optional[bool] = None):
+                 is_enabled: Optional[bool] = None, max_concurrency: Optional[int] = None,
+                 dispatch_weight: Optional[int] = None, execution_mode: Optional[str] = None,
+                 timeout_seconds: Optional[int] = None, cpu_time_limit: Optional[int] = None,
+                 memory_limit_mb: Optional[int] = None, result_cache_ttl: Optional[int] = None,
+                 max_retries: Optional[int] = None, retry_backoff_seconds: Optional[int] = None,
+                 retry_backoff_max_seconds: Optional[int] = None, retry_on: Optional[List[str]] = None):
         self.name = name
         self.description = description
         self.script_identifier = script_identifier
         self.parameter_schema = parameter_schema
         self.default_parameters = default_parameters
         self.is_enabled = is_enabled
+        self.max_concurrency = max_concurrency
+        self.dispatch_weight = dispatch_weight
+        self.execution_mode = execution_mode
+        self.timeout_seconds = timeout_seconds
+        self.cpu_time_limit = cpu_time_limit
+        self.memory_limit_mb = memory_limit_mb
+        self.result_cache_ttl = result_cache_ttl
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.retry_backoff_max_seconds = retry_backoff_max_seconds
+        self.retry_on = retry_on
         self.update_dict = {k: v for k, v in self.__dict__.items() if v is not None and k != 'update_dict'}
 
 
-def get_bot_config_by_id(db: Session, bot_id: UUID) -> Optional[BotConfiguration]:
-    return db.query(BotConfiguration).filter(BotConfiguration.id == bot_id).first()
+def get_bot_config_by_id(db: Session, bot_id: UUID, use_cache: bool = True) -> Optional[BotConfiguration]:
+    """
+    With `use_cache` (the default) the result may come from the bot config cache as a
+    read-only transient object; pass `use_cache=False` for an instance you intend to modify.
+    """
+    def load():
+        return db.query(BotConfiguration).filter(BotConfiguration.id == bot_id).first()
+    if not use_cache:
+        return load()
+    return bot_config_cache.get(f"id:{bot_id}", load)
 
-def get_bot_config_by_name(db: Session, name: str) -> Optional[BotConfiguration]:
-    return db.query(BotConfiguration).filter(BotConfiguration.name == name).first()
+def get_bot_config_by_name(db: Session, name: str, use_cache: bool = True) -> Optional[BotConfiguration]:
+    def load():
+        return db.query(BotConfiguration).filter(BotConfiguration.name == name).first()
+    if not use_cache:
+        return load()
+    return bot_config_cache.get(f"name:{name}", load)
 
-def get_all_bot_configs(db: Session, skip: int = 0, limit: int = 100, is_enabled: Optional[bool] = None) -> List[BotConfiguration]:
-    query = db.query(BotConfiguration)
+def bot_config_cache_stats() -> Dict[str, Any]:
+    return bot_config_cache.stats()
+
+def get_all_bot_configs(db: Session, skip: int = 0, limit: int = 100, is_enabled: Optional[bool] = None,
+                        after: Optional[Tuple[str, UUID]] = None, columns: Optional[List[str]] = None) -> List[Any]:
+    """
+    Returns bot configurations ordered by (name, id). `after` continues from a (name, id)
+    keyset position instead of using `skip`. `columns` restricts the SELECT to those
+    attributes (plus `id` and `name`) and returns row mappings instead of model instances.
+    """
+    if columns:
+        selected = ["id", "name"] + [c for c in columns if c not in ("id", "name")]
+        query = db.query(*[getattr(BotConfiguration, c) for c in selected])
+    else:
+        query = db.query(BotConfiguration)
     if is_enabled is not None:
         query = query.filter(BotConfiguration.is_enabled == is_enabled)
-    return query.order_by(BotConfiguration.name).offset(skip).limit(limit).all()
+    if after is not None:
+        after_name, after_id = after
+        query = query.filter(or_(
+            BotConfiguration.name > after_name,
+            and_(BotConfiguration.name == after_name, BotConfiguration.id > after_id),
+        ))
+    query = query.order_by(BotConfiguration.name, BotConfiguration.id)
+    if after is None and skip:
+        query = query.offset(skip)
+    rows = query.limit(limit).all()
+    if columns:
+        return [row._mapping for row in rows]
+    return rows
 
 def create_bot_config(db: Session, bot_in_data: Dict[str, Any], creator_id: Optional[UUID] = None) -> BotConfiguration:
-    existing_bot = get_bot_config_by_name(db, name=bot_in_data["name"])
+    existing_bot = get_bot_config_by_name(db, name=bot_in_data["name"], use_cache=False)
     if existing_bot:
         raise ValueError(f"Bot configuration with name '{bot_in_data['name']}' already exists.")
+    script_registry.validate(bot_in_data["script_identifier"])
 
     db_bot = BotConfiguration(
         name=bot_in_data["name"],
@@ -55,29 +128,49 @@ def create_bot_config(db: Session, bot_in_data: Dict[str, Any], creator_id: Opti
         parameter_schema=bot_in_data.get("parameter_schema"),
         default_parameters=bot_in_data.get("default_parameters"),
         is_enabled=bot_in_data.get("is_enabled", True),
+        max_concurrency=bot_in_data.get("max_concurrency"),
+        dispatch_weight=bot_in_data.get("dispatch_weight", 1),
+        execution_mode=bot_in_data.get("execution_mode", "inline"),
+        timeout_seconds=bot_in_data.get("timeout_seconds"),
+        cpu_time_limit=bot_in_data.get("cpu_time_limit"),
+        memory_limit_mb=bot_in_data.get("memory_limit_mb"),
+        result_cache_ttl=bot_in_data.get("result_cache_ttl"),
+        max_retries=bot_in_data.get("max_retries"),
+        retry_backoff_seconds=bot_in_data.get("retry_backoff_seconds"),
+        retry_backoff_max_seconds=bot_in_data.get("retry_backoff_max_seconds"),
+        retry_on=bot_in_data.get("retry_on"),
         created_by=creator_id
     )
     db.add(db_bot)
     db.commit()
     db.refresh(db_bot)
+    bot_config_cache.invalidate()
     return db_bot
 
 def update_bot_config(db: Session, db_bot: BotConfiguration, bot_in_data: Dict[str, Any]) -> BotConfiguration:
-    update_data = {k: v for k, v in bot_in_data.items() if v is not None}
+    """
+    Applies every key present in `bot_in_data` (a partial load, so omitted fields are absent);
+    an explicit None clears a nullable setting such as `max_concurrency` or `max_retries`.
+    """
+    update_data = dict(bot_in_data)
     if 'name' in update_data and update_data['name'] != db_bot.name:
-        existing_bot_with_new_name = get_bot_config_by_name(db, name=update_data['name'])
+        existing_bot_with_new_name = get_bot_config_by_name(db, name=update_data['name'], use_cache=False)
         if existing_bot_with_new_name:
             raise ValueError(f"Another bot configuration with name '{update_data['name']}' already exists.")
+    if 'script_identifier' in update_data and update_data['script_identifier'] != db_bot.script_identifier:
+        script_registry.validate(update_data['script_identifier'])
     for key, value in update_data.items():
         setattr(db_bot, key, value)
     db.commit()
     db.refresh(db_bot)
+    bot_config_cache.invalidate()
     return db_bot
 
 def delete_bot_config(db: Session, bot_id: UUID) -> bool:
-    db_bot = get_bot_config_by_id(db, bot_id=bot_id)
+    db_bot = get_bot_config_by_id(db, bot_id=bot_id, use_cache=False)
     if db_bot:
         db.delete(db_bot)
         db.commit()
+        bot_config_cache.invalidate()
         return True
     return False
\ No newline at end of file
@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+import redis
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+from core.config import settings
+from core.redis_client import get_redis
+
+# Sorted set of Celery worker hostnames scored by their last heartbeat (epoch seconds).
+WORKER_HEARTBEATS_KEY = "worker_heartbeats"
+
+
+def _engine() -> Engine:
+    """A one-connection engine for probes, so they never wait behind request traffic for the app's pool."""
+    return create_engine(
+        settings.SQLALCHEMY_DATABASE_URI,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.HEALTH_CHECK_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args={
+            "connect_timeout": max(1, int(settings.HEALTH_CHECK_TIMEOUT)),
+            "application_name": "girit-rpa-health",
+        },
+    )
+
+
+class ReadinessChecker:
+    """
+    Checks Postgres, Redis and worker heartbeats every HEALTH_CHECK_INTERVAL seconds on a
+    background thread and keeps the serialized result, so a probe only reads a tuple.
+    A result older than three intervals (the checker stalled) is reported as not ready.
+    """
+
+    def __init__(self):
+        self._engine: Optional[Engine] = None
+        self._snapshot: Tuple[float, int, bytes, Dict[str, Any]] = (0.0, 503, b"", {})
+        self._lock = threading.Lock()
+
+    def _check_database(self) -> Dict[str, Any]:
+        if self._engine is None:
+            self._engine = _engine()
+        started = time.perf_counter()
+        try:
+            with self._engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return {"status": "ok", "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+        except Exception as e:
+            return {"status": "error", "error": str(e)}
+
+    def _check_redis_and_workers(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        started = time.perf_counter()
+        try:
+            client = get_redis()
+            pipe = client.pipeline(transaction=False)
+            pipe.ping()
+            pipe.zcount(WORKER_HEARTBEATS_KEY, time.time() - settings.WORKER_HEARTBEAT_TTL, "+inf")
+            _, alive = pipe.execute()
+        except redis.RedisError as e:
+            error = {"status": "error", "error": str(e)}
+            return error, {"status": "unknown"}
+        redis_status = {"status": "ok", "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+        return redis_status, {"status": "ok" if alive else "none", "alive": alive}
+
+    def refresh(self) -> None:
+        with self._lock:
+            database = self._check_database()
+            broker, workers = self._check_redis_and_workers()
+            ready = database["status"] == "ok" and broker["status"] == "ok"
+            if settings.HEALTH_REQUIRE_WORKERS:
+                ready = ready and workers["status"] == "ok"
+            report = {
+                "status": "ready" if ready else "not_ready",
+                "checked_at": datetime.now(timezone.utc).isoformat(),
+                "database": database,
+                "redis": broker,
+                "workers": workers,
+            }
+            self._snapshot = (time.monotonic(), 200 if ready else 503, json.dumps(report).encode("utf-8"), report)
+
+    def snapshot(self) -> Tuple[int, bytes, Dict[str, Any]]:
+        """(HTTP status, JSON body, report) of the latest check."""
+        checked_at, status, body, report = self._snapshot
+        if time.monotonic() - checked_at > 3 * settings.HEALTH_CHECK_INTERVAL:
+            report = dict(report, status="stale")
+            return 503, json.dumps(report).encode("utf-8"), report
+        return status, body, report
+
+    def run_forever(self) -> None:
+        while True:
+            time.sleep(settings.HEALTH_CHECK_INTERVAL)
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Readiness check failed: {e}")
+
+
+_checker: Optional[ReadinessChecker] = None
+_checker_pid: Optional[int] = None
+_checker_lock = threading.Lock()
+
+
+def get_readiness_checker() -> ReadinessChecker:
+    """The process's checker; the first call checks once inline and starts the background thread."""
+    global _checker, _checker_pid
+    if _checker_pid == os.getpid():
+        return _checker
+    with _checker_lock:
+        if _checker_pid != os.getpid():
+            checker = ReadinessChecker()
+            checker.refresh()
+            threading.Thread(target=checker.run_forever, name="readiness-checker", daemon=True).start()
+            _checker, _checker_pid = checker, os.getpid()
+    return _checker
+
+
+def _beat(hostname: str) -> None:
+    while True:
+        try:
+            now = time.time()
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.zadd(WORKER_HEARTBEATS_KEY, {hostname: now})
+            pipe.zremrangebyscore(WORKER_HEARTBEATS_KEY, "-inf", now - settings.WORKER_HEARTBEAT_TTL)
+            pipe.execute()
+        except redis.RedisError as e:
+            print(f"Worker heartbeat for {hostname} failed: {e}")
+        time.sleep(settings.WORKER_HEARTBEAT_INTERVAL)
+
+
+def start_worker_heartbeat(hostname: str) -> None:
+    """Records `hostname` as alive every WORKER_HEARTBEAT_INTERVAL seconds until the process exits."""
+    threading.Thread(target=_beat, args=(hostname,), name="worker-heartbeat", daemon=True).start()
+
+
+def stop_worker_heartbeat(hostname: str) -> None:
+    try:
+        get_redis().zrem(WORKER_HEARTBEATS_KEY, hostname)
+    except redis.RedisError as e:
+        print(f"Could not remove the heartbeat of {hostname}: {e}")
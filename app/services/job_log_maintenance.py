@@ -0,0 +1,317 @@
+import bisect
+import gzip
+import json
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, event, func, insert, select, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.models.job_model import Job, JobLog, JobLogArchive
+from core import database
+from core.config import settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+TABLE = JobLog.__tablename__
+DEFAULT_PARTITION = f"{TABLE}_default"
+LEGACY_PARTITION = f"{TABLE}_legacy"
+
+# Partition boundaries are multiples of JOB_LOG_PARTITION_DAYS from a Monday, so 7-day partitions are calendar weeks.
+_ALIGNMENT = date(1970, 1, 5)
+# Advisory lock serializing partition DDL between dispatcher replicas.
+_MAINTENANCE_LOCK_KEY = 0x6A6F625F6C6F67
+# How far past the newest legacy row (or now) the legacy partition's upper bound at least lies.
+_BOUNDARY_MARGIN = timedelta(hours=1)
+_BOUND = re.compile(r"FROM \((?:'([^']+)'|MINVALUE)\) TO \('([^']+)'\)")
+
+
+def _period_start(day: date) -> datetime:
+    days = max(1, settings.JOB_LOG_PARTITION_DAYS)
+    start = _ALIGNMENT + timedelta(days=(day - _ALIGNMENT).days // days * days)
+    return datetime.combine(start, time.min, tzinfo=timezone.utc)
+
+
+def _relkind(conn: Connection) -> Optional[str]:
+    """'p' once job_logs is partitioned, 'r' for the original plain table, None if it doesn't exist."""
+    return conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {"t": TABLE}).scalar()
+
+
+def _parse_bound(value: str) -> datetime:
+    # Bounds are rendered in the session time zone, which the callers set to UTC.
+    return datetime.strptime(value[:19], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+
+
+def _range_partitions(conn: Connection) -> List[Tuple[str, Optional[datetime], datetime]]:
+    """(name, lower bound or None for MINVALUE, upper bound) of every range partition of job_logs."""
+    rows = conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(:t)"
+    ), {"t": TABLE}).all()
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND.search(bound or "")
+        if match:
+            lower = _parse_bound(match.group(1)) if match.group(1) else None
+            partitions.append((name, lower, _parse_bound(match.group(2))))
+    return sorted(partitions, key=lambda p: p[2])
+
+
+def _create_partition(conn: Connection, start: datetime, end: datetime) -> str:
+    """
+    Creates and attaches the partition [start, end). Rows that already landed in the
+    default partition for that range are moved into it first, or the attach would fail.
+    """
+    name = f"{TABLE}_p{start:%Y%m%d}"
+    conn.execute(text(f'CREATE TABLE "{name}" (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+    conn.execute(text(
+        f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE "timestamp" >= :start AND "timestamp" < :end RETURNING *) '
+        f'INSERT INTO "{name}" SELECT * FROM moved'
+    ), {"start": start, "end": end})
+    conn.execute(text(
+        f"ALTER TABLE {TABLE} ATTACH PARTITION \"{name}\" FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    return name
+
+
+def _ensure_partitions(conn: Connection, now: datetime) -> List[str]:
+    """Creates partitions from the last existing one up to JOB_LOG_PARTITIONS_AHEAD periods past now."""
+    conn.execute(text(f'CREATE TABLE IF NOT EXISTS "{DEFAULT_PARTITION}" PARTITION OF {TABLE} DEFAULT'))
+    current = _period_start(now.date())
+    start = max((upper for _, _, upper in _range_partitions(conn)), default=current)
+    if settings.JOB_LOG_RETENTION_DAYS:
+        # After a long pause there's no point in creating partitions retention would drop right away.
+        start = max(start, _period_start((now - timedelta(days=settings.JOB_LOG_RETENTION_DAYS)).date()))
+    horizon = current + timedelta(days=max(1, settings.JOB_LOG_PARTITION_DAYS) * (settings.JOB_LOG_PARTITIONS_AHEAD + 1))
+    created = []
+    while start < horizon:
+        end = _period_start(start.date()) + timedelta(days=max(1, settings.JOB_LOG_PARTITION_DAYS))
+        created.append(_create_partition(conn, start, end))
+        start = end
+    return created
+
+
+def _drop_expired(conn: Connection, now: datetime) -> List[str]:
+    """Drops partitions entirely older than JOB_LOG_RETENTION_DAYS, plus expired stragglers and archives."""
+    cutoff = now - timedelta(days=settings.JOB_LOG_RETENTION_DAYS)
+    dropped = []
+    for name, _, upper in _range_partitions(conn):
+        if upper <= cutoff:
+            conn.execute(text(f'DROP TABLE "{name}"'))
+            dropped.append(name)
+    conn.execute(text(f'DELETE FROM "{DEFAULT_PARTITION}" WHERE "timestamp" < :cutoff'), {"cutoff": cutoff})
+    conn.execute(delete(JobLogArchive).where(JobLogArchive.last_timestamp < cutoff))
+    return dropped
+
+
+def _begin_maintenance(conn: Connection) -> None:
+    conn.execute(text("SET LOCAL TimeZone = 'UTC'"))
+    conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _MAINTENANCE_LOCK_KEY})
+
+
+def ensure_partitions(engine: Engine) -> List[str]:
+    """Creates any missing partitions (without applying retention). Returns the names created."""
+    with engine.begin() as conn:
+        if _relkind(conn) != "p":
+            return []
+        _begin_maintenance(conn)
+        return _ensure_partitions(conn, datetime.now(timezone.utc))
+
+
+@event.listens_for(JobLog.metadata, "after_create")
+def _partition_created_table(target, connection: Connection, tables=(), **kw) -> None:
+    """`db.create_all()` leaves a new job_logs without partitions, where no row can be inserted."""
+    if JobLog.__table__ in tables:
+        _begin_maintenance(connection)
+        _ensure_partitions(connection, datetime.now(timezone.utc))
+
+
+def maintain_partitions(engine: Engine, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Keeps partitions created ahead of time and, with JOB_LOG_RETENTION_DAYS, drops expired ones."""
+    now = now or datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        if _relkind(conn) != "p":
+            print(f"Job log maintenance: '{TABLE}' is not partitioned; run `flask job-logs partition` first.")
+            return {"partitioned": False, "created": [], "dropped": []}
+        _begin_maintenance(conn)
+        created = _ensure_partitions(conn, now)
+        dropped = _drop_expired(conn, now) if settings.JOB_LOG_RETENTION_DAYS else []
+    return {"partitioned": True, "created": created, "dropped": dropped}
+
+
+def partition_existing_table(engine: Engine) -> bool:
+    """
+    Converts a plain job_logs table into the partitioned one, without copying rows: the old
+    table becomes the partition for everything before a period boundary past its newest row
+    (and is dropped by retention once that boundary has expired). Everything that scans the
+    table happens first, while logs keep being written: the (id, timestamp) key is built
+    CONCURRENTLY and a CHECK on that boundary is validated, so attaching the table needs
+    neither a scan nor an index build. Only then is job_logs locked exclusively, for a
+    handful of catalog changes. Returns False if there was nothing to convert.
+    """
+    with engine.begin() as conn:
+        kind = _relkind(conn)
+        if kind is None:
+            _begin_maintenance(conn)
+            JobLog.__table__.create(conn)
+            _ensure_partitions(conn, datetime.now(timezone.utc))
+            return True
+    if kind == "p":
+        return False
+
+    key_index = f"{TABLE}_id_timestamp_key"
+    bound_check = f"{TABLE}_legacy_bound"
+    with database.maintenance_connection(engine) as conn:
+        conn.execute(text("SET TimeZone = 'UTC'"))
+        newest = conn.execute(text(f'SELECT max("timestamp") FROM {TABLE}')).scalar()
+        now = datetime.now(timezone.utc)
+        # Logs keep arriving until the lock is taken; the margin keeps them below the boundary.
+        latest = max(now, newest or now) + _BOUNDARY_MARGIN
+        boundary = _period_start(latest.date()) + timedelta(days=max(1, settings.JOB_LOG_PARTITION_DAYS))
+        # Leftovers of an interrupted run are rebuilt.
+        conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{key_index}"'))
+        conn.execute(text(f'ALTER TABLE {TABLE} DROP CONSTRAINT IF EXISTS "{bound_check}"'))
+        conn.execute(text(f'CREATE UNIQUE INDEX CONCURRENTLY "{key_index}" ON {TABLE} (id, "timestamp")'))
+        conn.execute(text(
+            f'ALTER TABLE {TABLE} ADD CONSTRAINT "{bound_check}" CHECK ("timestamp" < \'{boundary.isoformat()}\') NOT VALID'
+        ))
+        conn.execute(text(f'ALTER TABLE {TABLE} VALIDATE CONSTRAINT "{bound_check}"'))
+
+    with engine.begin() as conn:
+        database.set_maintenance_timeouts(conn)
+        if _relkind(conn) == "p":
+            return False
+        _begin_maintenance(conn)
+        conn.execute(text(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE"))
+        sequence = conn.execute(text("SELECT pg_get_serial_sequence(:t, 'id')"), {"t": TABLE}).scalar()
+        primary_key = conn.execute(text(
+            "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:t) AND contype = 'p'"
+        ), {"t": TABLE}).scalar()
+        if primary_key:
+            conn.execute(text(f'ALTER TABLE {TABLE} DROP CONSTRAINT "{primary_key}"'))
+        conn.execute(text(f'ALTER TABLE {TABLE} ADD CONSTRAINT "{TABLE}_pkey_legacy" PRIMARY KEY USING INDEX "{key_index}"'))
+        # The foreign key stays, so ATTACH reuses it instead of validating a new one; renamed
+        # like the indexes, so the parent's constraint keeps the usual name.
+        for (name,) in conn.execute(text(
+            "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:t) AND contype = 'f'"
+        ), {"t": TABLE}).all():
+            if not name.endswith("_legacy"):
+                conn.execute(text(f'ALTER TABLE {TABLE} RENAME CONSTRAINT "{name}" TO "{name}_legacy"'))
+        for (index,) in conn.execute(text("SELECT indexname FROM pg_indexes WHERE tablename = :t"), {"t": TABLE}).all():
+            if not index.endswith("_legacy"):
+                conn.execute(text(f'ALTER INDEX "{index}" RENAME TO "{index}_legacy"'))
+        conn.execute(text(f'ALTER TABLE {TABLE} RENAME TO "{LEGACY_PARTITION}"'))
+        conn.execute(text(f'ALTER TABLE "{LEGACY_PARTITION}" ALTER COLUMN id DROP DEFAULT'))
+
+        JobLog.__table__.create(conn)
+        if sequence:
+            # Keep numbering where the old table left off, so log ids (and stream cursors) stay increasing.
+            new_sequence = conn.execute(text("SELECT pg_get_serial_sequence(:t, 'id')"), {"t": TABLE}).scalar()
+            conn.execute(text(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{sequence}'::regclass)"))
+            conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {TABLE}.id"))
+            if new_sequence and new_sequence != sequence:
+                conn.execute(text(f"DROP SEQUENCE {new_sequence}"))
+
+        # The validated CHECK implies the partition bound, so this doesn't scan the table.
+        conn.execute(text(
+            f"ALTER TABLE {TABLE} ATTACH PARTITION \"{LEGACY_PARTITION}\" FOR VALUES FROM (MINVALUE) TO ('{boundary.isoformat()}')"
+        ))
+        conn.execute(text(f'ALTER TABLE "{LEGACY_PARTITION}" DROP CONSTRAINT "{bound_check}"'))
+        _ensure_partitions(conn, datetime.now(timezone.utc))
+    return True
+
+
+def _encode(rows: Sequence[Any]) -> Tuple[str, bytes]:
+    lines = "".join(
+        json.dumps({
+            "id": row.id,
+            "timestamp": row.timestamp.isoformat(),
+            "log_level": row.log_level,
+            "message": row.message,
+            "source": row.source,
+        }, separators=(",", ":")) + "\n"
+        for row in rows
+    ).encode("utf-8")
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor().compress(lines)
+    return "gzip", gzip.compress(lines)
+
+
+@lru_cache(maxsize=16)
+def _decode(codec: str, data: bytes) -> Tuple[List[int], List[Dict[str, Any]]]:
+    """(ids, entries) of an archive; recently read archives stay decoded for paging through them."""
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Job log archive is zstd-compressed but the 'zstandard' package is not installed.")
+        raw = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    else:
+        raw = gzip.decompress(data)
+    entries = []
+    for line in raw.decode("utf-8").splitlines():
+        entry = json.loads(line)
+        entry["timestamp"] = datetime.fromisoformat(entry["timestamp"])
+        entries.append(entry)
+    return [entry["id"] for entry in entries], entries
+
+
+def archived_logs(db: Session, job_id: UUID, after_id: Optional[int], limit: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    Entries of the job's compacted logs after log id `after_id` (at most `limit`), and
+    the last log id the archive covers (None without an archive). Entries are dicts with
+    the JobLog columns, so they serialize with `job_logs_schema` like live rows.
+    """
+    last_log_id = db.query(JobLogArchive.last_log_id).filter(JobLogArchive.job_id == job_id).scalar()
+    if last_log_id is None or (after_id is not None and after_id >= last_log_id):
+        return [], last_log_id
+    codec, data = db.query(JobLogArchive.codec, JobLogArchive.data).filter(JobLogArchive.job_id == job_id).one()
+    ids, entries = _decode(codec, bytes(data))
+    start = bisect.bisect_right(ids, after_id) if after_id is not None else 0
+    return [dict(entry, job_id=job_id) for entry in entries[start:start + limit]], last_log_id
+
+
+def compact_finished_jobs(engine: Engine, limit: Optional[int] = None, now: Optional[datetime] = None) -> int:
+    """
+    Moves the logs of up to `limit` jobs that finished more than JOB_LOG_COMPACT_AFTER
+    seconds ago into one compressed JSONL blob each (zstd, or gzip without `zstandard`).
+    Jobs are claimed with SKIP LOCKED, so dispatcher replicas share the work.
+    Returns the number of jobs processed.
+    """
+    limit = limit or settings.JOB_LOG_COMPACTION_BATCH_SIZE
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(seconds=settings.JOB_LOG_COMPACT_AFTER)
+    table = JobLog.__table__
+    with engine.begin() as conn:
+        job_ids = conn.execute(
+            select(Job.id)
+            .where(Job.completed_at.isnot(None), Job.logs_compacted_at.is_(None), Job.completed_at < cutoff)
+            .order_by(Job.completed_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        for job_id in job_ids:
+            rows = conn.execute(
+                select(table.c.id, table.c.timestamp, table.c.log_level, table.c.message, table.c.source)
+                .where(table.c.job_id == job_id)
+                .order_by(table.c.id)
+            ).all()
+            if not rows:
+                continue
+            codec, data = _encode(rows)
+            conn.execute(insert(JobLogArchive).values(
+                job_id=job_id, codec=codec, data=data, line_count=len(rows),
+                first_log_id=rows[0].id, last_log_id=rows[-1].id, last_timestamp=rows[-1].timestamp,
+                created_at=func.now(),
+            ))
+            conn.execute(delete(table).where(table.c.job_id == job_id, table.c.id <= rows[-1].id))
+        if job_ids:
+            conn.execute(
+                update(Job).where(Job.id.in_(job_ids)).values(logs_compacted_at=func.now())
+                .execution_options(synchronize_session=False)
+            )
+    return len(job_ids)
@@ -0,0 +1,198 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Union
+from uuid import UUID
+
+import redis
+from sqlalchemy import exc
+
+from app.extensions import db
+from app.models.job_model import JobLog
+from app.schemas.job_schema import job_logs_schema
+from app.services import job_log_maintenance
+from core import metrics
+from core.config import settings
+from core.redis_client import get_redis
+
+
+# check_violation: raised for a row no partition of job_logs accepts.
+_NO_PARTITION_PGCODE = "23514"
+
+
+def job_log_channel(job_id: Union[UUID, str]) -> str:
+    """Redis pub/sub channel carrying the live log tail of one job."""
+    return f"job_logs:{job_id}"
+
+
+def _publish(job_id: UUID, events: List[Dict[str, Any]]) -> None:
+    if not settings.JOB_LOG_STREAM_ENABLED or not events:
+        return
+    channel = job_log_channel(job_id)
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for event in events:
+            pipe.publish(channel, json.dumps(event))
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Error publishing {len(events)} job log events for job {job_id}: {e}")
+
+
+def subscribe_job_logs(job_id: Union[UUID, str]) -> Optional["redis.client.PubSub"]:
+    """Subscribes to the live log channel of `job_id`. Returns None if streaming is unavailable."""
+    if not settings.JOB_LOG_STREAM_ENABLED:
+        return None
+    try:
+        pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(job_log_channel(job_id))
+        return pubsub
+    except redis.RedisError as e:
+        print(f"Error subscribing to job log channel for job {job_id}: {e}")
+        return None
+
+
+def publish_job_end(job_id: Union[UUID, str], status: Optional[str]) -> None:
+    """Tells live log streams of `job_id` that no further entries will follow."""
+    _publish(_as_uuid(job_id), [{"event": "end", "status": status}])
+
+
+class JobLogBuffer:
+    """
+    Collects JobLog rows for one job in memory and writes them to `job_logs`
+    with a single multi-row INSERT once `max_size` rows are pending or
+    `flush_interval` seconds have passed since the last flush.
+
+    Flushes run on their own connection from the engine pool, so they never
+    commit (or roll back) whatever is pending in `db.session`. Flushed rows,
+    with their new ids, are then published to the job's Redis log channel.
+    """
+
+    def __init__(self, job_id: UUID, max_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        self.job_id = job_id
+        self.max_size = max_size if max_size is not None else settings.JOB_LOG_BUFFER_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else settings.JOB_LOG_FLUSH_INTERVAL
+        self._engine = db.engine
+        self._rows: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def add(self, level: str, message: str, source: Optional[str] = "worker") -> None:
+        row = {
+            "job_id": self.job_id,
+            "timestamp": datetime.now(timezone.utc),
+            "log_level": level,
+            "message": message,
+            "source": source,
+        }
+        with self._lock:
+            self._rows.append(row)
+            due = len(self._rows) >= self.max_size or self.flush_due()
+        if due:
+            self.flush()
+
+    def flush_due(self) -> bool:
+        return bool(self._rows) and time.monotonic() - self._last_flush >= self.flush_interval
+
+    def _insert(self, rows: List[Dict[str, Any]]) -> List[int]:
+        table = JobLog.__table__
+        with self._engine.begin() as connection:
+            return connection.execute(
+                table.insert().returning(table.c.id, sort_by_parameter_order=True), rows
+            ).scalars().all()
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+                self._last_flush = time.monotonic()
+            if not rows:
+                return 0
+            try:
+                try:
+                    ids = self._insert(rows)
+                except exc.IntegrityError as e:
+                    if getattr(e.orig, "pgcode", None) != _NO_PARTITION_PGCODE:
+                        raise
+                    # No partition covers these timestamps (maintenance hasn't run yet); create it and retry.
+                    job_log_maintenance.ensure_partitions(self._engine)
+                    ids = self._insert(rows)
+            except Exception as e:
+                metrics.JOB_LOG_WRITE_ERRORS.inc(len(rows))
+                print(f"Error flushing {len(rows)} job logs for job {self.job_id}: {e}")
+                return 0
+            metrics.JOB_LOG_WRITES.inc(len(rows))
+            for row, log_id in zip(rows, ids):
+                row["id"] = log_id
+            _publish(self.job_id, [{"event": "log", "log": entry} for entry in job_logs_schema.dump(rows)])
+            return len(rows)
+
+
+_open_buffers: Dict[UUID, JobLogBuffer] = {}
+_flusher_lock = threading.Lock()
+_flusher_pid: Optional[int] = None
+
+
+def _flush_idle_buffers() -> None:
+    while True:
+        time.sleep(settings.JOB_LOG_FLUSH_INTERVAL)
+        for buffer in list(_open_buffers.values()):
+            if buffer.flush_due():
+                buffer.flush()
+
+
+def _ensure_background_flusher() -> None:
+    """Starts (once per process) a daemon that flushes buffers of jobs that went quiet."""
+    global _flusher_pid
+    if _flusher_pid == os.getpid():
+        return
+    with _flusher_lock:
+        if _flusher_pid != os.getpid():
+            threading.Thread(target=_flush_idle_buffers, name="job-log-flusher", daemon=True).start()
+            _flusher_pid = os.getpid()
+
+
+def _as_uuid(job_id: Union[UUID, str]) -> UUID:
+    return job_id if isinstance(job_id, UUID) else UUID(str(job_id))
+
+
+@contextmanager
+def job_log_buffer(job_id: Union[UUID, str]) -> Iterator[JobLogBuffer]:
+    """
+    Routes every `add_job_log` call for `job_id` into one buffer for the
+    duration of the block and flushes whatever is left when it exits.
+    """
+    job_id = _as_uuid(job_id)
+    buffer = JobLogBuffer(job_id)
+    _open_buffers[job_id] = buffer
+    _ensure_background_flusher()
+    try:
+        yield buffer
+    finally:
+        if _open_buffers.get(job_id) is buffer:
+            del _open_buffers[job_id]
+        buffer.flush()
+
+
+def add_job_log(job_id: Union[UUID, str], level: str, message: str, source: Optional[str] = "worker") -> None:
+    """
+    Adds a log entry for a given job. Entries for jobs with an open
+    `job_log_buffer` are batched; anything else is written immediately.
+    """
+    try:
+        job_id = _as_uuid(job_id)
+    except ValueError as e:
+        print(f"Error adding job log for job {job_id}: {e}")
+        return
+
+    buffer = _open_buffers.get(job_id)
+    if buffer is not None:
+        buffer.add(level, message, source)
+        return
+
+    buffer = JobLogBuffer(job_id)
+    buffer.add(level, message, source)
+    buffer.flush()
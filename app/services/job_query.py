@@ -0,0 +1,100 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.job_model import STATUS_COUNTER_TRIGGERS, Job, JobStatusCounter
+from core import database
+
+
+def list_jobs(db: Session, bot_config_id: Optional[UUID] = None, statuses: Optional[Sequence[str]] = None,
+              created_after: Optional[datetime] = None, created_before: Optional[datetime] = None,
+              before: Optional[Tuple[datetime, UUID]] = None, limit: int = 50) -> List[Job]:
+    """
+    Jobs newest first, ordered by (created_at, id) and continuing below the keyset position
+    `before`. Every filter combination is served by one of the (bot_config_id, status,
+    created_at, id), (status, created_at, id) or (created_at, id) indexes.
+    """
+    query = db.query(Job)
+    if bot_config_id is not None:
+        query = query.filter(Job.bot_config_id == bot_config_id)
+    if statuses:
+        query = query.filter(Job.status == statuses[0]) if len(statuses) == 1 else query.filter(Job.status.in_(statuses))
+    if created_after is not None:
+        query = query.filter(Job.created_at >= created_after)
+    if created_before is not None:
+        query = query.filter(Job.created_at < created_before)
+    if before is not None:
+        query = query.filter(tuple_(Job.created_at, Job.id) < tuple_(*before))
+    return query.order_by(Job.created_at.desc(), Job.id.desc()).limit(limit).all()
+
+
+def list_dead_letter_jobs(db: Session, bot_config_id: Optional[UUID] = None,
+                          before: Optional[Tuple[datetime, UUID]] = None, limit: int = 50) -> List[Job]:
+    """Dead-lettered jobs, most recently dead-lettered first, through the partial (dead_lettered_at, id) index."""
+    query = db.query(Job).filter(Job.dead_lettered_at.isnot(None))
+    if bot_config_id is not None:
+        query = query.filter(Job.bot_config_id == bot_config_id)
+    if before is not None:
+        query = query.filter(tuple_(Job.dead_lettered_at, Job.id) < tuple_(*before))
+    return query.order_by(Job.dead_lettered_at.desc(), Job.id.desc()).limit(limit).all()
+
+
+def status_counts(db: Session, bot_config_id: Optional[UUID] = None) -> Dict[UUID, Dict[str, int]]:
+    """{bot id: {status: jobs}} from the counters table; reads O(bots) rows, never `jobs`."""
+    query = db.query(JobStatusCounter.bot_config_id, JobStatusCounter.status, func.sum(JobStatusCounter.count))
+    if bot_config_id is not None:
+        query = query.filter(JobStatusCounter.bot_config_id == bot_config_id)
+    rows = query.group_by(JobStatusCounter.bot_config_id, JobStatusCounter.status).all()
+    counts: Dict[UUID, Dict[str, int]] = defaultdict(dict)
+    for bot_id, status, count in rows:
+        if count:
+            counts[bot_id][status] = int(count)
+    return dict(counts)
+
+
+def status_total(db: Session, status: str) -> int:
+    """Number of jobs in `status` across all bots."""
+    return int(db.query(func.coalesce(func.sum(JobStatusCounter.count), 0)).filter(JobStatusCounter.status == status).scalar())
+
+
+def bots_with_status(status: str):
+    """Subquery of the ids of bots that have at least one job in `status`."""
+    return (
+        select(JobStatusCounter.bot_config_id)
+        .where(JobStatusCounter.status == status)
+        .group_by(JobStatusCounter.bot_config_id)
+        .having(func.sum(JobStatusCounter.count) > 0)
+    )
+
+
+def rebuild_status_counters(engine: Engine) -> int:
+    """
+    Recounts `job_status_counters` from `jobs`. Blocks job writes while it runs (SHARE lock),
+    so the recount and the triggers can't disagree. Runs without a statement timeout, but gives
+    up if the lock isn't granted within MAINTENANCE_LOCK_TIMEOUT_MS. Returns the number of
+    counter rows.
+    """
+    with engine.begin() as conn:
+        database.set_maintenance_timeouts(conn)
+        conn.execute(text("LOCK TABLE jobs IN SHARE MODE"))
+        conn.execute(JobStatusCounter.__table__.delete())
+        result = conn.execute(text(
+            "INSERT INTO job_status_counters (bot_config_id, status, shard, count) "
+            "SELECT bot_config_id, status, 0, count(*) FROM jobs GROUP BY bot_config_id, status"
+        ))
+        return result.rowcount
+
+
+def install_status_counters(engine: Engine) -> int:
+    """Creates the counters table and triggers on an existing database, then counts existing jobs."""
+    with engine.begin() as conn:
+        database.set_maintenance_timeouts(conn)
+        JobStatusCounter.__table__.create(conn, checkfirst=True)
+        conn.execute(text("LOCK TABLE jobs IN SHARE ROW EXCLUSIVE MODE"))
+        conn.exec_driver_sql(STATUS_COUNTER_TRIGGERS)
+    return rebuild_status_counters(engine)
@@ -0,0 +1,118 @@
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+import redis
+from sqlalchemy.orm import Session
+
+from app.models.bot_model import BotConfiguration
+from app.models.job_model import Job
+from core.config import settings
+from core.redis_client import get_redis
+
+# Statuses of a job that has been submitted but hasn't finished, i.e. that identical
+# submissions can still be coalesced onto.
+IN_FLIGHT_STATUSES = ("pending", "queued", "dispatched", "running", "cancelling")
+
+# Deletes an in-flight key only if it still names the finishing job.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_release = None
+
+
+def _release_script():
+    global _release
+    if _release is None or _release.registered_client is not get_redis():
+        _release = get_redis().register_script(_RELEASE_SCRIPT)
+    return _release
+
+
+def cache_key(bot_config: BotConfiguration, parameters: Optional[Dict[str, Any]],
+              input_files: Optional[List[Dict[str, Any]]]) -> str:
+    """
+    Canonical hash of everything that determines a job's outcome: the bot and its version
+    (`updated_at`), the script, the parameters and the content hashes of the input files.
+    """
+    payload = {
+        "bot": str(bot_config.id),
+        "version": bot_config.updated_at.isoformat() if bot_config.updated_at else None,
+        "script": bot_config.script_identifier,
+        "parameters": parameters or {},
+        "inputs": [entry.get("sha256") for entry in input_files or []],
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def find_cached_result(db: Session, bot_config: BotConfiguration, key: str) -> Optional[Job]:
+    """The latest successful job for `key` completed within the bot's `result_cache_ttl`, if any."""
+    if not bot_config.result_cache_ttl:
+        return None
+    not_before = datetime.now(timezone.utc) - timedelta(seconds=bot_config.result_cache_ttl)
+    return (
+        db.query(Job)
+        .filter(Job.result_cache_key == key, Job.status == "success", Job.completed_at >= not_before)
+        .order_by(Job.completed_at.desc())
+        .first()
+    )
+
+
+def _in_flight_key(key: str) -> str:
+    return f"job_inflight:{key}"
+
+
+def claim_in_flight(db: Session, candidates: Dict[str, UUID]) -> Dict[str, UUID]:
+    """
+    Registers each new job in `candidates` (cache key -> job id) as the execution for its key.
+    Returns the keys that already have a live job, mapped to that job's id; the caller reuses
+    it instead of creating a new one. Best effort: if Redis is unavailable nothing is coalesced.
+    """
+    if not candidates:
+        return {}
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for key, job_id in candidates.items():
+            pipe.set(_in_flight_key(key), str(job_id), nx=True, ex=settings.JOB_RESULT_IN_FLIGHT_TTL)
+            pipe.get(_in_flight_key(key))
+        replies = pipe.execute()
+    except redis.RedisError as e:
+        print(f"Error registering {len(candidates)} in-flight jobs: {e}")
+        return {}
+
+    holders = {}
+    for i, key in enumerate(candidates):
+        acquired, held = replies[2 * i], replies[2 * i + 1]
+        if not acquired and held:
+            holders[key] = UUID(held.decode())
+    if not holders:
+        return {}
+
+    live = {
+        job_id for (job_id,) in
+        db.query(Job.id).filter(Job.id.in_(list(holders.values())), Job.status.in_(IN_FLIGHT_STATUSES)).all()
+    }
+    stale = [key for key, job_id in holders.items() if job_id not in live]
+    if stale:
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for key in stale:
+                pipe.set(_in_flight_key(key), str(candidates[key]), ex=settings.JOB_RESULT_IN_FLIGHT_TTL)
+            pipe.execute()
+        except redis.RedisError as e:
+            print(f"Error replacing {len(stale)} stale in-flight jobs: {e}")
+    return {key: job_id for key, job_id in holders.items() if job_id in live}
+
+
+def release_in_flight(key: str, job_id: UUID) -> None:
+    """Lets later submissions with `key` create a new job again, once `job_id` has finished."""
+    try:
+        _release_script()(keys=[_in_flight_key(key)], args=[str(job_id)])
+    except redis.RedisError as e:
+        print(f"Error releasing in-flight key of job {job_id}: {e}")
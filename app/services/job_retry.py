@@ -0,0 +1,51 @@
+import random
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from app.models.bot_model import BotConfiguration
+from core.config import settings
+
+# Last line of a formatted traceback: "ValueError: message" or "package.module.Error: message".
+_TRACEBACK_EXCEPTION = re.compile(r"^([A-Za-z_][\w.]*)(?::|$)")
+
+
+def exception_type_names(exc: BaseException) -> List[str]:
+    """
+    Class names `exc` matches in a bot's `retry_on`: the class and its bases, or, for a
+    script that failed in another thread or process, the exception named in its traceback.
+    """
+    names = [cls.__name__ for cls in type(exc).__mro__]
+    remote_traceback = getattr(exc, "remote_traceback", None)
+    if remote_traceback:
+        lines = [line for line in remote_traceback.strip().splitlines() if line and not line.startswith(" ")]
+        match = _TRACEBACK_EXCEPTION.match(lines[-1]) if lines else None
+        if match:
+            qualified = match.group(1)
+            names = [qualified, qualified.rsplit(".", 1)[-1]] + names
+    return names
+
+
+def is_retryable(bot_config: BotConfiguration, exc: BaseException) -> bool:
+    """Whether the bot's retry policy covers `exc` (retry attempts aside)."""
+    if not bot_config.max_retries:
+        return False
+    if not bot_config.retry_on:
+        return True
+    return bool(set(bot_config.retry_on) & set(exception_type_names(exc)))
+
+
+def retry_delay(bot_config: BotConfiguration, attempt: int) -> float:
+    """
+    Seconds before retry number `attempt` (1-based): the backoff base doubled per attempt,
+    capped, with "equal jitter" (half fixed, half random) so retries of jobs that failed
+    together, e.g. during an outage of the system they drive, don't return together.
+    """
+    base = bot_config.retry_backoff_seconds or settings.JOB_RETRY_BACKOFF_SECONDS
+    cap = bot_config.retry_backoff_max_seconds or settings.JOB_RETRY_BACKOFF_MAX_SECONDS
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def next_attempt_at(bot_config: BotConfiguration, attempt: int, now: Optional[datetime] = None) -> datetime:
+    return (now or datetime.now(timezone.utc)) + timedelta(seconds=retry_delay(bot_config, attempt))
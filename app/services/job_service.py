@@ -1,3 +1,472 @@
+import time
 
+from sqlalchemy import String, cast, insert, select, update, func, tuple_
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional, Tuple, Union
+from uuid import UUID, uuid4
+from datetime import datetime, timezone
 
+import redis
+from celery import group
 
+from app.celery_app import celery
+from app import job_control, script_registry
+from app.models.job_model import Job, JobLog
+from app.models.bot_model import BotConfiguration
+from app.services import job_log_maintenance, job_query, job_result_cache
+from core import task_queue
+from core.config import settings
+from core.redis_client import get_redis
+
+EXECUTE_TASK_NAME = "app.tasks.execute_rpa_bot"
+
+CLAIMABLE_STATUSES = ("pending", "queued", "dispatched")
+TERMINAL_STATUSES = ("success", "failed", "cancelled")
+CANCELLABLE_STATUSES = ("scheduled",) + CLAIMABLE_STATUSES
+# Held by a worker: a redelivered task for such a job waits until the worker is alive or stale.
+ACTIVE_STATUSES = ("running", "cancelling")
+
+# Redis sorted set of scheduled job ids scored by due time (epoch seconds); the hot
+# index the dispatcher polls. The partial index on jobs.scheduled_at is the source of truth.
+SCHEDULED_JOBS_KEY = "scheduled_jobs"
+
+
+def get_job_by_id(db: Session, job_id: UUID) -> Optional[Job]:
+    return db.get(Job, job_id)
+
+
+def get_job_logs(db: Session, job_id: UUID, after_id: Optional[int] = None, limit: int = 500) -> List[Union[JobLog, Dict[str, Any]]]:
+    """
+    Returns log entries of a job in insertion order, starting after log id `after_id`.
+    Entries compacted into the job's archive come first (as dicts), then live rows.
+    """
+    archived, archived_up_to = job_log_maintenance.archived_logs(db, job_id, after_id, limit)
+    if len(archived) >= limit:
+        return archived
+    if archived_up_to is not None:
+        after_id = max(after_id or 0, archived_up_to)
+    query = db.query(JobLog).filter(JobLog.job_id == job_id)
+    if after_id is not None:
+        query = query.filter(JobLog.id > after_id)
+    return archived + query.order_by(JobLog.id).limit(limit - len(archived)).all()
+
+
+def claim_job(db: Session, job_id: UUID, celery_task_id: str) -> Optional[Tuple[Job, BotConfiguration]]:
+    """
+    Atomically moves a claimable job to 'running' and returns it together with its
+    enabled BotConfiguration, in a single UPDATE ... FROM ... RETURNING round trip.
+    Returns None if the job does not exist, is no longer claimable (e.g. another
+    worker already claimed a redelivered task) or its bot is missing or disabled.
+    """
+    return _claim(db, job_id, celery_task_id, Job.status.in_(CLAIMABLE_STATUSES))
+
+
+def take_over_stale_job(db: Session, job_id: UUID, celery_task_id: str) -> Optional[Tuple[Job, BotConfiguration]]:
+    """
+    `claim_job` for a job left 'running' by a worker that died mid-run, whose task message
+    Celery redelivered (acks_late): claims it again once its heartbeat is older than
+    `JOB_HEARTBEAT_STALE_SECONDS`. A job left 'cancelling' that way is marked cancelled.
+    Returns None while the job is alive or in any other status.
+    """
+    row = db.execute(select(Job.status, Job.bot_config_id, Job.started_at).where(Job.id == job_id)).one_or_none()
+    db.commit()
+    if row is None or row.status not in ACTIVE_STATUSES:
+        return None
+    try:
+        heartbeat = job_control.get_heartbeat(job_id)
+    except redis.RedisError as e:
+        print(f"Error reading the heartbeat of job {job_id}: {e}")
+        return None
+    last_seen = heartbeat["timestamp"] if heartbeat and heartbeat["timestamp"] else None
+    if last_seen is None and row.started_at is not None:
+        last_seen = row.started_at.timestamp()
+    if last_seen is not None and time.time() - last_seen < settings.JOB_HEARTBEAT_STALE_SECONDS:
+        return None
+    if row.status == "cancelling":
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "cancelling", Job.started_at == row.started_at)
+            .values(status="cancelled", error_message="Cancelled; its worker stopped while cancelling.", completed_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if result.rowcount:
+            try:
+                task_queue.release_slot(bot_slot_key(row.bot_config_id), str(job_id))
+            except redis.RedisError as e:
+                print(f"Error releasing concurrency slot of cancelled job {job_id}: {e}")
+        return None
+    # Matching `started_at` makes sure no other redelivery took the job over meanwhile.
+    return _claim(db, job_id, celery_task_id, Job.status == "running", Job.started_at == row.started_at)
+
+
+def _claim(db: Session, job_id: UUID, celery_task_id: str, *conditions) -> Optional[Tuple[Job, BotConfiguration]]:
+    stmt = (
+        update(Job)
+        .where(
+            Job.id == job_id,
+            *conditions,
+            Job.bot_config_id == BotConfiguration.id,
+            BotConfiguration.is_enabled.is_(True),
+        )
+        .values(status="running", started_at=func.now(), celery_task_id=celery_task_id)
+        .returning(Job, BotConfiguration)
+        .execution_options(synchronize_session=False)
+    )
+    row = db.execute(stmt).one_or_none()
+    if row is None:
+        db.commit()
+        return None
+    job, bot_config = row
+    # Detach before committing so expire_on_commit doesn't force a reload of the
+    # rows RETURNING just handed back; the job is re-attached for the final update.
+    db.expunge(job)
+    db.expunge(bot_config)
+    db.commit()
+    db.add(job)
+    return job, bot_config
+
+
+def fail_unclaimable_job(db: Session, job_id: UUID, error_message: str) -> bool:
+    """Marks a job that could not be claimed as failed, unless another worker has taken it meanwhile."""
+    result = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status.in_(CLAIMABLE_STATUSES))
+        .values(status="failed", error_message=error_message, completed_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount > 0
+
+
+def enqueue_jobs(db: Session, jobs: List[Tuple[UUID, str]]) -> None:
+    """
+    Publishes one execute_rpa_bot message per (job_id, celery_task_id), in Celery groups of
+    `JOB_ENQUEUE_CHUNK_SIZE` so a large fan-out reuses one producer connection per chunk.
+    Jobs whose chunk could not be published are marked failed. With `ASYNC_SCRIPTS_QUEUE`
+    set, jobs of `async def` scripts are published to that queue instead.
+    """
+    async_job_ids = _async_script_job_ids(db, [job_id for job_id, _ in jobs]) if settings.ASYNC_SCRIPTS_QUEUE else set()
+    chunk_size = settings.JOB_ENQUEUE_CHUNK_SIZE
+    for start in range(0, len(jobs), chunk_size):
+        chunk = jobs[start:start + chunk_size]
+        try:
+            group(
+                celery.signature(EXECUTE_TASK_NAME, args=(str(job_id),), task_id=task_id,
+                                 **({"queue": settings.ASYNC_SCRIPTS_QUEUE} if job_id in async_job_ids else {}))
+                for job_id, task_id in chunk
+            ).apply_async()
+        except Exception as e:
+            print(f"Error enqueueing {len(chunk)} jobs: {e}")
+            db.rollback()
+            db.execute(
+                update(Job)
+                .where(Job.id.in_([job_id for job_id, _ in chunk]), Job.status.in_(CLAIMABLE_STATUSES))
+                .values(status="failed", error_message=f"Failed to enqueue job: {e}", completed_at=func.now())
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+
+def _async_script_job_ids(db: Session, job_ids: List[UUID]) -> set:
+    """
+    The jobs among `job_ids` whose bot runs an `async def` script on the worker's event loop
+    (any mode but 'subprocess'). A gevent worker multiplexes those; a prefork one would not.
+    """
+    if not job_ids:
+        return set()
+    rows = db.execute(
+        select(Job.id, BotConfiguration.script_identifier)
+        .join(BotConfiguration, Job.bot_config_id == BotConfiguration.id)
+        .where(Job.id.in_(job_ids), func.coalesce(BotConfiguration.execution_mode, "inline") != "subprocess")
+    ).all()
+    async_ids = set()
+    for job_id, script_identifier in rows:
+        try:
+            if script_registry.is_async(script_identifier):
+                async_ids.add(job_id)
+        except script_registry.InvalidScriptIdentifier:
+            pass  # Left to the worker, which fails the job with the reason.
+    return async_ids
+
+
+def create_jobs_batch(db: Session, bot_config: BotConfiguration, parameter_sets: List[Optional[Dict[str, Any]]],
+                      triggered_by_user_id: Optional[UUID] = None,
+                      input_files: Optional[List[Dict[str, Any]]] = None) -> Tuple[UUID, List[UUID]]:
+    """
+    Creates one queued Job per parameter set with a single multi-row INSERT, commits,
+    then enqueues them all. Returns the batch id and the job ids in input order.
+    For bots with a `result_cache_ttl`, a parameter set identical to an earlier one in the
+    batch, or to a job still in flight, gets that job's id instead of a new job.
+    """
+    batch_id = uuid4()
+    now = datetime.now(timezone.utc)
+    job_ids: List[UUID] = []
+    rows_by_key: Dict[str, Dict[str, Any]] = {}
+    rows = []
+    for parameters in parameter_sets:
+        key = job_result_cache.cache_key(bot_config, parameters, input_files) if bot_config.result_cache_ttl else None
+        if key is not None and key in rows_by_key:
+            job_ids.append(rows_by_key[key]["id"])
+            continue
+        row = {
+            "id": uuid4(),
+            "bot_config_id": bot_config.id,
+            "status": "queued",
+            "parameters_used": parameters,
+            "input_files": input_files,
+            "celery_task_id": str(uuid4()),
+            "batch_id": batch_id,
+            "enqueued_at": now,
+            "triggered_by_user_id": triggered_by_user_id,
+            "result_cache_key": key,
+        }
+        if key is not None:
+            rows_by_key[key] = row
+        rows.append(row)
+        job_ids.append(row["id"])
+
+    in_flight = job_result_cache.claim_in_flight(db, {key: row["id"] for key, row in rows_by_key.items()})
+    if in_flight:
+        replaced = {rows_by_key[key]["id"]: job_id for key, job_id in in_flight.items()}
+        rows = [row for row in rows if row["id"] not in replaced]
+        job_ids = [replaced.get(job_id, job_id) for job_id in job_ids]
+
+    if rows:
+        db.execute(insert(Job), rows)
+        db.commit()
+
+    if rows and settings.JOB_DISPATCH_MODE != "fair":
+        enqueue_jobs(db, [(row["id"], row["celery_task_id"]) for row in rows])
+    return batch_id, job_ids
+
+
+def get_batch_status_counts(db: Session, batch_id: UUID) -> Dict[str, int]:
+    rows = (
+        db.query(Job.status, func.count(Job.id))
+        .filter(Job.batch_id == batch_id)
+        .group_by(Job.status)
+        .all()
+    )
+    return {status: count for status, count in rows}
+
+
+def bot_slot_key(bot_config_id: UUID) -> str:
+    """Redis semaphore bounding concurrently running jobs of one bot (see core.task_queue)."""
+    return f"bot_slots:{bot_config_id}"
+
+
+def count_jobs_with_status(db: Session, status: str) -> int:
+    return job_query.status_total(db, status)
+
+
+def get_bots_with_queued_jobs(db: Session) -> List[Any]:
+    """(id, max_concurrency, dispatch_weight) of every enabled bot that has queued jobs, ordered by id."""
+    return (
+        db.query(BotConfiguration.id, BotConfiguration.max_concurrency, BotConfiguration.dispatch_weight)
+        .filter(BotConfiguration.id.in_(job_query.bots_with_status("queued")), BotConfiguration.is_enabled.is_(True))
+        .order_by(BotConfiguration.id)
+        .all()
+    )
+
+
+def claim_queued_jobs(db: Session, bot_config_id: UUID, limit: int) -> List[Tuple[UUID, str]]:
+    """
+    Moves up to `limit` of a bot's oldest queued jobs to 'dispatched' and returns their
+    (job_id, celery_task_id). SKIP LOCKED lets several dispatchers run side by side.
+    """
+    oldest_queued = (
+        select(Job.id)
+        .where(Job.bot_config_id == bot_config_id, Job.status == "queued")
+        .order_by(Job.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    rows = db.execute(
+        update(Job)
+        .where(Job.id.in_(oldest_queued.scalar_subquery()))
+        .values(status="dispatched")
+        .returning(Job.id, Job.celery_task_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    return [(job_id, task_id or str(job_id)) for job_id, task_id in rows]
+
+
+def requeue_dispatched_jobs(db: Session, job_ids: List[UUID]) -> None:
+    """Returns dispatched jobs that were never sent to Celery to the queue."""
+    if not job_ids:
+        return
+    db.execute(
+        update(Job)
+        .where(Job.id.in_(job_ids), Job.status == "dispatched")
+        .values(status="queued")
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def requeue_dead_letter_jobs(db: Session, job_ids: Optional[List[UUID]] = None,
+                             bot_config_id: Optional[UUID] = None) -> List[UUID]:
+    """
+    Queues dead-lettered jobs (the given ids, a bot's, or all, up to JOB_BATCH_MAX_SIZE) for a
+    fresh run with their retry budget reset, in one UPDATE. Returns the ids that were requeued.
+    """
+    due = (
+        select(Job.id)
+        .where(Job.dead_lettered_at.isnot(None))
+        .order_by(Job.dead_lettered_at)
+        .limit(settings.JOB_BATCH_MAX_SIZE)
+        .with_for_update(skip_locked=True)
+    )
+    if job_ids is not None:
+        due = due.where(Job.id.in_(job_ids))
+    if bot_config_id is not None:
+        due = due.where(Job.bot_config_id == bot_config_id)
+    rows = db.execute(
+        update(Job)
+        .where(Job.id.in_(due.scalar_subquery()), Job.dead_lettered_at.isnot(None))
+        .values(
+            status="queued", retry_count=0, dead_lettered_at=None, error_message=None, error_details=None,
+            started_at=None, completed_at=None, enqueued_at=func.now(), celery_task_id=cast(func.gen_random_uuid(), String),
+        )
+        .returning(Job.id, Job.celery_task_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    if rows and settings.JOB_DISPATCH_MODE != "fair":
+        enqueue_jobs(db, [(job_id, task_id) for job_id, task_id in rows])
+    return [job_id for job_id, _ in rows]
+
+
+def request_cancel_job(db: Session, job_id: UUID) -> Optional[str]:
+    """
+    Cancels a job that hasn't started yet outright; for a running job, raises the Redis
+    cancel flag its JobControl polls and marks it 'cancelling'. Returns the resulting
+    status (a terminal status means there was nothing to cancel), or None if not found.
+    """
+    job = db.get(Job, job_id)
+    if not job:
+        return None
+
+    if job.status in CANCELLABLE_STATUSES:
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status.in_(CANCELLABLE_STATUSES))
+            .values(status="cancelled", error_message="Cancelled before start.", completed_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if result.rowcount:
+            try:
+                task_queue.release_slot(bot_slot_key(job.bot_config_id), str(job_id))
+                get_redis().zrem(SCHEDULED_JOBS_KEY, str(job_id))
+            except redis.RedisError as e:
+                print(f"Error releasing Redis state of cancelled job {job_id}: {e}")
+            return "cancelled"
+        db.refresh(job)
+
+    if job.status in ("running", "cancelling"):
+        job_control.request_cancel(job_id)
+        db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "running")
+            .values(status="cancelling")
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return "cancelling"
+
+    return job.status
+
+
+def schedule_job(db: Session, bot_config: BotConfiguration, run_at: datetime,
+                 parameters: Optional[Dict[str, Any]] = None,
+                 triggered_by_user_id: Optional[UUID] = None,
+                 input_files: Optional[List[Dict[str, Any]]] = None) -> Job:
+    """Creates a job with status 'scheduled' that the dispatcher queues once `run_at` has passed."""
+    job = Job(
+        bot_config_id=bot_config.id,
+        status="scheduled",
+        scheduled_at=run_at,
+        parameters_used=parameters,
+        input_files=input_files,
+        celery_task_id=str(uuid4()),
+        triggered_by_user_id=triggered_by_user_id,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    index_scheduled_jobs([(job.id, run_at)])
+    return job
+
+
+def index_scheduled_jobs(jobs: List[Tuple[UUID, datetime]]) -> None:
+    """
+    Adds (job_id, scheduled_at) pairs to the Redis due-time index. A failure is only
+    logged: the dispatcher's periodic scan of the partial index still finds the jobs.
+    """
+    if not jobs:
+        return
+    try:
+        get_redis().zadd(SCHEDULED_JOBS_KEY, {str(job_id): run_at.timestamp() for job_id, run_at in jobs})
+    except redis.RedisError as e:
+        print(f"Error indexing {len(jobs)} scheduled jobs in Redis: {e}")
+
+
+def get_due_scheduled_job_ids(now: datetime, limit: int) -> List[UUID]:
+    """Ids of indexed scheduled jobs due at `now`, earliest first. Raises redis.RedisError."""
+    members = get_redis().zrangebyscore(SCHEDULED_JOBS_KEY, "-inf", now.timestamp(), start=0, num=limit)
+    return [UUID(member.decode()) for member in members]
+
+
+def unindex_scheduled_jobs(job_ids: List[UUID]) -> None:
+    if not job_ids:
+        return
+    try:
+        get_redis().zrem(SCHEDULED_JOBS_KEY, *[str(job_id) for job_id in job_ids])
+    except redis.RedisError as e:
+        print(f"Error removing {len(job_ids)} jobs from the scheduled index: {e}")
+
+
+def rebuild_scheduled_index(db: Session, page_size: int = 5000) -> int:
+    """Re-populates the Redis due-time index from the partial index, e.g. after Redis lost its data."""
+    total, last = 0, None
+    while True:
+        query = db.query(Job.scheduled_at, Job.id).filter(Job.status == "scheduled", Job.scheduled_at.isnot(None))
+        if last is not None:
+            query = query.filter(tuple_(Job.scheduled_at, Job.id) > last)
+        rows = query.order_by(Job.scheduled_at, Job.id).limit(page_size).all()
+        db.commit()
+        if not rows:
+            return total
+        get_redis().zadd(SCHEDULED_JOBS_KEY, {str(job_id): run_at.timestamp() for run_at, job_id in rows})
+        total += len(rows)
+        last = tuple(rows[-1])
+
+
+def claim_due_scheduled_jobs(db: Session, now: datetime, limit: int,
+                             job_ids: Optional[List[UUID]] = None) -> List[Tuple[UUID, str]]:
+    """
+    Moves up to `limit` scheduled jobs due at `now` (restricted to `job_ids` if given) to
+    'queued' and returns their (job_id, celery_task_id). The due rows are read through the
+    partial index and locked with SKIP LOCKED, so dispatcher replicas never queue a job twice.
+    """
+    due = (
+        select(Job.id)
+        .where(Job.status == "scheduled", Job.scheduled_at <= now)
+        .order_by(Job.scheduled_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    if job_ids is not None:
+        due = due.where(Job.id.in_(job_ids))
+    rows = db.execute(
+        update(Job)
+        .where(Job.id.in_(due.scalar_subquery()), Job.status == "scheduled")
+        .values(status="queued", enqueued_at=func.now())
+        .returning(Job.id, Job.celery_task_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    return [(job_id, task_id or str(job_id)) for job_id, task_id in rows]
@@ -0,0 +1,169 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.models.bot_model import BotConfiguration
+from core.cache import TTLCache
+from core.config import settings
+
+MISSING_MESSAGE = "Missing data for required field."
+
+_TRUTHY = {"true", "t", "1", "yes", "y", "on"}
+_FALSY = {"false", "f", "0", "no", "n", "off"}
+
+
+class ParameterError(ValueError):
+    """
+    Job parameters don't match the bot's `parameter_schema`. `messages` maps each parameter
+    to its errors or, for a batch, each parameter set's index to those, like marshmallow.
+    """
+
+    def __init__(self, messages: Dict[Any, Any]):
+        super().__init__(_format_messages(messages))
+        self.messages = messages
+
+
+def _format_messages(messages: Dict[Any, Any]) -> str:
+    return "; ".join(
+        f"{key}: {_format_messages(value) if isinstance(value, dict) else ' '.join(value)}"
+        for key, value in messages.items()
+    )
+
+
+def _string(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    raise ValueError("Not a valid string.")
+
+
+def _integer(value: Any) -> int:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    raise ValueError("Not a valid integer.")
+
+
+def _boolean(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in _TRUTHY:
+            return True
+        if lowered in _FALSY:
+            return False
+    elif isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    raise ValueError("Not a valid boolean.")
+
+
+# "file" values are checked against the job's input files in `ParameterValidator.validate`.
+_COERCERS: Dict[str, Callable[[Any], Any]] = {
+    "string": _string,
+    "text": _string,
+    "integer": _integer,
+    "boolean": _boolean,
+    "file": _string,
+}
+
+
+class ParameterValidator:
+    """
+    A bot's `parameter_schema` compiled into one (name, coerce, options, required, is_file)
+    tuple per parameter, with the schema defaults and `default_parameters` merged up front.
+    Parameters the schema doesn't describe are passed through unchanged.
+    """
+
+    __slots__ = ("defaults", "fields")
+
+    def __init__(self, parameter_schema: Optional[Dict[str, Any]], default_parameters: Optional[Dict[str, Any]]):
+        defaults: Dict[str, Any] = {}
+        fields: List[Tuple[str, Callable[[Any], Any], Optional[frozenset], bool, bool]] = []
+        for name, item in (parameter_schema or {}).items():
+            # Stored through ParameterSchemaItemSchema, which loads `default` as `default_value`.
+            default = item.get("default_value", item.get("default"))
+            if default is not None:
+                defaults[name] = default
+            options = frozenset(item["options"]) if item.get("options") else None
+            fields.append((name, _COERCERS.get(item.get("type"), _string), options, bool(item.get("required")), item.get("type") == "file"))
+        defaults.update(default_parameters or {})
+        self.defaults = defaults
+        self.fields = fields
+
+    def validate(self, parameters: Optional[Dict[str, Any]],
+                 input_files: Optional[List[Dict[str, Any]]] = None) -> Tuple[Optional[Dict[str, Any]], Dict[str, List[str]]]:
+        """Returns the merged, coerced parameters and the errors per parameter (empty when valid)."""
+        if not self.fields and not self.defaults:
+            return parameters, {}
+        merged = dict(self.defaults)
+        if parameters:
+            merged.update(parameters)
+        errors: Dict[str, List[str]] = {}
+        file_names = None
+        for name, coerce, options, required, is_file in self.fields:
+            value = merged.get(name)
+            if value is None:
+                if required:
+                    errors[name] = [MISSING_MESSAGE]
+                continue
+            try:
+                value = coerce(value)
+            except ValueError as e:
+                errors[name] = [str(e)]
+                continue
+            if options is not None and (value if isinstance(value, str) else str(value)) not in options:
+                errors[name] = [f"Must be one of: {', '.join(sorted(options))}."]
+                continue
+            if is_file:
+                if file_names is None:
+                    file_names = {entry.get(key) for entry in input_files or () for key in ("upload_id", "original_filename")}
+                if value not in file_names:
+                    errors[name] = ["Must be the upload id or filename of one of the job's input files."]
+                    continue
+            merged[name] = value
+        return merged, errors
+
+
+_validators = TTLCache(max_entries=settings.PARAMETER_VALIDATOR_CACHE_SIZE, ttl=24 * 3600)
+
+
+def get_validator(bot_config: BotConfiguration) -> ParameterValidator:
+    """The compiled validator of the bot's current version; any update to the bot changes `updated_at`."""
+    key = (bot_config.id, bot_config.updated_at)
+    validator = _validators.get(key)
+    if validator is None:
+        validator = ParameterValidator(bot_config.parameter_schema, bot_config.default_parameters)
+        _validators.set(key, validator)
+    return validator
+
+
+def validate_parameters(bot_config: BotConfiguration, parameters: Optional[Dict[str, Any]],
+                        input_files: Optional[List[Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+    """The parameters of one job, merged with the bot's defaults and coerced. Raises ParameterError."""
+    merged, errors = get_validator(bot_config).validate(parameters, input_files)
+    if errors:
+        raise ParameterError(errors)
+    return merged
+
+
+def validate_parameter_sets(bot_config: BotConfiguration, parameter_sets: List[Optional[Dict[str, Any]]],
+                            input_files: Optional[List[Dict[str, Any]]] = None) -> List[Optional[Dict[str, Any]]]:
+    """
+    `validate_parameters` for every set of a batch. Raises ParameterError with the errors
+    of every invalid set under its index, so none of the batch is queued.
+    """
+    validate = get_validator(bot_config).validate
+    results = []
+    errors: Dict[int, Dict[str, List[str]]] = {}
+    for index, parameters in enumerate(parameter_sets):
+        merged, item_errors = validate(parameters, input_files)
+        if item_errors:
+            errors[index] = item_errors
+        results.append(merged)
+    if errors:
+        raise ParameterError(errors)
+    return results
@@ -0,0 +1,139 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from croniter import croniter
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.bot_model import BotConfiguration
+from app.models.job_model import Job
+from app.models.schedule_model import BotSchedule
+from app.services import parameter_validation
+from app.services.parameter_validation import ParameterError
+
+
+def validate_cron(cron_expression: str, tz_name: str = "UTC") -> None:
+    """Raises ValueError unless `cron_expression` is a valid 5-field cron expression and `tz_name` a known zone."""
+    if not croniter.is_valid(cron_expression):
+        raise ValueError(f"Invalid cron expression: '{cron_expression}'.")
+    try:
+        ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise ValueError(f"Unknown timezone: '{tz_name}'.") from e
+
+
+def next_run_after(cron_expression: str, tz_name: str, after: datetime) -> datetime:
+    """Next fire time of the cron expression strictly after `after`, evaluated in `tz_name`, as UTC."""
+    local_after = after.astimezone(ZoneInfo(tz_name))
+    return croniter(cron_expression, local_after).get_next(datetime).astimezone(timezone.utc)
+
+
+def get_schedules_for_bot(db: Session, bot_config_id: UUID) -> List[BotSchedule]:
+    return (
+        db.query(BotSchedule)
+        .filter(BotSchedule.bot_config_id == bot_config_id)
+        .order_by(BotSchedule.created_at)
+        .all()
+    )
+
+
+def get_schedule(db: Session, bot_config_id: UUID, schedule_id: UUID) -> Optional[BotSchedule]:
+    return (
+        db.query(BotSchedule)
+        .filter(BotSchedule.id == schedule_id, BotSchedule.bot_config_id == bot_config_id)
+        .first()
+    )
+
+
+def create_schedule(db: Session, bot_config_id: UUID, schedule_in_data: Dict[str, Any],
+                    creator_id: Optional[UUID] = None) -> BotSchedule:
+    tz_name = schedule_in_data.get("timezone") or "UTC"
+    validate_cron(schedule_in_data["cron_expression"], tz_name)
+    schedule = BotSchedule(
+        bot_config_id=bot_config_id,
+        cron_expression=schedule_in_data["cron_expression"],
+        timezone=tz_name,
+        parameters=schedule_in_data.get("parameters"),
+        is_enabled=schedule_in_data.get("is_enabled", True),
+        next_run_at=next_run_after(schedule_in_data["cron_expression"], tz_name, datetime.now(timezone.utc)),
+        created_by=creator_id,
+    )
+    db.add(schedule)
+    db.commit()
+    db.refresh(schedule)
+    return schedule
+
+
+def update_schedule(db: Session, schedule: BotSchedule, schedule_in_data: Dict[str, Any]) -> BotSchedule:
+    # Keys absent from the partial load are left alone; an explicit None clears `parameters`.
+    update_data = dict(schedule_in_data)
+    cron_expression = update_data.get("cron_expression", schedule.cron_expression)
+    tz_name = update_data.get("timezone", schedule.timezone)
+    validate_cron(cron_expression, tz_name)
+    for key, value in update_data.items():
+        setattr(schedule, key, value)
+    if {"cron_expression", "timezone", "is_enabled"} & update_data.keys():
+        schedule.next_run_at = next_run_after(cron_expression, tz_name, datetime.now(timezone.utc))
+    db.commit()
+    db.refresh(schedule)
+    return schedule
+
+
+def delete_schedule(db: Session, schedule: BotSchedule) -> None:
+    db.delete(schedule)
+    db.commit()
+
+
+def fire_due_schedules(db: Session, now: datetime, limit: int) -> List[Tuple[UUID, str]]:
+    """
+    Creates a queued job for every enabled schedule (of an enabled bot) due at `now` and
+    advances its `next_run_at`, all in one transaction. Due schedules are locked with
+    SKIP LOCKED, so each fire time produces exactly one job across dispatcher replicas.
+    Runs missed while no dispatcher was up fire once, not once per missed slot.
+    Parameters are merged with the bot's defaults; a run whose parameters no longer match
+    the bot's `parameter_schema` is recorded as a failed job instead of being queued.
+    Returns (job_id, celery_task_id) of the queued jobs.
+    """
+    schedules = (
+        db.query(BotSchedule, BotConfiguration)
+        .join(BotConfiguration, BotConfiguration.id == BotSchedule.bot_config_id)
+        .filter(
+            BotSchedule.is_enabled.is_(True),
+            BotSchedule.next_run_at <= now,
+            BotConfiguration.is_enabled.is_(True),
+        )
+        .order_by(BotSchedule.next_run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True, of=BotSchedule)
+        .all()
+    )
+    if not schedules:
+        db.commit()
+        return []
+
+    rows = []
+    for schedule, bot_config in schedules:
+        row = {
+            "id": uuid4(),
+            "bot_config_id": schedule.bot_config_id,
+            "status": "queued",
+            "parameters_used": schedule.parameters,
+            "celery_task_id": str(uuid4()),
+            "schedule_id": schedule.id,
+            "scheduled_at": schedule.next_run_at,
+            "enqueued_at": now,
+            "error_message": None,
+            "completed_at": None,
+        }
+        try:
+            row["parameters_used"] = parameter_validation.validate_parameters(bot_config, schedule.parameters)
+        except ParameterError as e:
+            row.update(status="failed", error_message=f"Invalid schedule parameters: {e}", completed_at=now)
+        rows.append(row)
+        schedule.last_run_at = schedule.next_run_at
+        schedule.next_run_at = next_run_after(schedule.cron_expression, schedule.timezone, now)
+    db.execute(insert(Job), rows)
+    db.commit()
+    return [(row["id"], row["celery_task_id"]) for row in rows if row["status"] == "queued"]
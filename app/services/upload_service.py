@@ -0,0 +1,249 @@
+import fcntl
+import hashlib
+import os
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.upload_model import FileBlob, Upload
+from core.cache import TTLCache
+from core.config import settings
+
+BLOBS_DIR = "blobs"
+PARTIAL_DIR = "partial"
+
+# Running SHA-256 state of in-progress uploads, keyed by upload id, so each chunk is hashed as it
+# arrives. An upload resumed on another process (or after eviction) re-hashes its partial file once.
+_hashers = TTLCache(max_entries=256, ttl=3600)
+
+
+class UploadError(ValueError):
+    """The upload cannot accept the request (wrong state, too large, hash mismatch, ...)."""
+
+
+class UploadOffsetMismatch(UploadError):
+    def __init__(self, offset: int):
+        super().__init__(f"Chunk offset does not match the upload offset {offset}.")
+        self.offset = offset
+
+
+class UploadBusy(UploadError):
+    """Another request is currently writing to the same upload."""
+
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(settings.UPLOAD_FOLDER, BLOBS_DIR, sha256[:2], sha256[2:4], sha256)
+
+
+def _partial_path(upload_id: UUID) -> str:
+    return os.path.join(settings.UPLOAD_FOLDER, PARTIAL_DIR, str(upload_id))
+
+
+def _move_into_store(path: str, sha256: str) -> None:
+    target = blob_path(sha256)
+    if os.path.exists(target):
+        os.remove(path)
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+
+
+def ensure_blob_row(db: Session, sha256: str, size: int) -> None:
+    """Records a stored blob in `file_blobs` (and commits) unless it is already there."""
+    if db.get(FileBlob, sha256) is not None:
+        return
+    db.add(FileBlob(sha256=sha256, size=size))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Stored concurrently by an identical file.
+        db.rollback()
+
+
+def write_blob(stream: BinaryIO) -> Tuple[str, int]:
+    """
+    Streams `stream` into the blob store, hashing it on the way, and returns (sha256, size).
+    Content that is already stored is not written twice. Callers record it with `ensure_blob_row`.
+    """
+    path = _partial_path(uuid4())
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with open(path, "wb") as f:
+            while True:
+                buf = stream.read(settings.UPLOAD_STREAM_BUFFER_SIZE)
+                if not buf:
+                    break
+                f.write(buf)
+                hasher.update(buf)
+                size += len(buf)
+        sha256 = hasher.hexdigest()
+        _move_into_store(path, sha256)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    return sha256, size
+
+
+def get_upload(db: Session, upload_id: UUID) -> Optional[Upload]:
+    return db.get(Upload, upload_id)
+
+
+def create_upload(db: Session, filename: str, content_type: Optional[str] = None, size: Optional[int] = None,
+                  sha256: Optional[str] = None, creator_id: Optional[UUID] = None) -> Upload:
+    """
+    Starts an upload. When the client announces a `sha256` whose content is already stored,
+    the upload completes immediately and no bytes need to be sent.
+    """
+    if size is not None and size > settings.UPLOAD_MAX_FILE_SIZE:
+        raise UploadError(f"File exceeds the maximum upload size of {settings.UPLOAD_MAX_FILE_SIZE} bytes.")
+    upload = Upload(filename=filename, content_type=content_type, size=size,
+                    expected_sha256=sha256.lower() if sha256 else None, created_by=creator_id)
+
+    blob = db.get(FileBlob, upload.expected_sha256) if upload.expected_sha256 else None
+    if blob is not None and (size is None or size == blob.size) and os.path.exists(blob_path(blob.sha256)):
+        upload.sha256 = blob.sha256
+        upload.size = upload.offset = blob.size
+        upload.status = "complete"
+    else:
+        upload.offset = 0
+    db.add(upload)
+    db.commit()
+
+    if upload.status == "uploading":
+        os.makedirs(os.path.dirname(_partial_path(upload.id)), exist_ok=True)
+        open(_partial_path(upload.id), "wb").close()
+    return upload
+
+
+def _resume_hasher(upload_id: UUID, offset: int, f: BinaryIO):
+    cached = _hashers.get(upload_id)
+    if cached is not None and cached[0] == offset:
+        return cached[1]
+    hasher = hashlib.sha256()
+    f.seek(0)
+    remaining = offset
+    while remaining:
+        buf = f.read(min(settings.UPLOAD_STREAM_BUFFER_SIZE, remaining))
+        if not buf:
+            break
+        hasher.update(buf)
+        remaining -= len(buf)
+    return hasher
+
+
+def append_chunk(db: Session, upload: Upload, offset: int, stream: BinaryIO) -> Upload:
+    """
+    Streams `stream` onto the upload's partial file at `offset`, hashing it on the way,
+    holding at most `UPLOAD_STREAM_BUFFER_SIZE` bytes in memory. Bytes received before a
+    client disconnect are kept, so the upload resumes from the recorded offset. Once a
+    known `size` is reached the upload is finalized into the content-addressed store.
+    """
+    if upload.status != "uploading":
+        raise UploadError(f"Upload is {upload.status} and does not accept data.")
+
+    fd = os.open(_partial_path(upload.id), os.O_RDWR | os.O_CREAT, 0o644)
+    with os.fdopen(fd, "r+b") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadBusy("Another chunk is being written to this upload.")
+
+        db.refresh(upload)
+        if offset != upload.offset:
+            raise UploadOffsetMismatch(upload.offset)
+        limit = upload.size if upload.size is not None else settings.UPLOAD_MAX_FILE_SIZE
+
+        hasher = _resume_hasher(upload.id, offset, f)
+        # Drop anything past the recorded offset, e.g. from a chunk whose commit never happened.
+        f.truncate(offset)
+        f.seek(offset)
+        written = 0
+        try:
+            while True:
+                buf = stream.read(settings.UPLOAD_STREAM_BUFFER_SIZE)
+                if not buf:
+                    break
+                if offset + written + len(buf) > limit:
+                    raise UploadError(f"Chunk exceeds the upload size of {limit} bytes.")
+                f.write(buf)
+                hasher.update(buf)
+                written += len(buf)
+        finally:
+            if written:
+                f.flush()
+                os.fsync(f.fileno())
+                upload.offset = offset + written
+                db.commit()
+                _hashers.set(upload.id, (upload.offset, hasher))
+
+    if upload.size is not None and upload.offset == upload.size:
+        return complete_upload(db, upload)
+    return upload
+
+
+def complete_upload(db: Session, upload: Upload) -> Upload:
+    """
+    Moves a fully received upload into the blob store under its SHA-256. If that content is
+    already stored, the partial file is simply dropped and the existing blob is shared.
+    """
+    if upload.status == "complete":
+        return upload
+    if upload.status != "uploading":
+        raise UploadError(f"Upload is {upload.status} and cannot be completed.")
+    if upload.size is not None and upload.offset != upload.size:
+        raise UploadError(f"Upload is incomplete: {upload.offset} of {upload.size} bytes received.")
+
+    partial = _partial_path(upload.id)
+    with open(partial, "rb") as f:
+        sha256 = _resume_hasher(upload.id, upload.offset, f).hexdigest()
+    _hashers.pop(upload.id)
+
+    if upload.expected_sha256 and sha256 != upload.expected_sha256:
+        upload.status = "failed"
+        db.commit()
+        os.remove(partial)
+        raise UploadError(f"Content hash {sha256} does not match the announced {upload.expected_sha256}.")
+
+    _move_into_store(partial, sha256)
+    ensure_blob_row(db, sha256, upload.offset)
+
+    upload.sha256 = sha256
+    upload.size = upload.offset
+    upload.status = "complete"
+    db.commit()
+    return upload
+
+
+def get_input_files(db: Session, upload_ids: List[UUID]) -> List[Dict[str, Any]]:
+    """
+    Job `input_files` entries for completed uploads, in the given order. Entries reference
+    the blob by hash; the worker resolves the storage path (see `input_files_metadata`).
+    """
+    uploads = {u.id: u for u in db.query(Upload).filter(Upload.id.in_(upload_ids)).all()} if upload_ids else {}
+    missing = [str(upload_id) for upload_id in upload_ids if upload_id not in uploads or uploads[upload_id].status != "complete"]
+    if missing:
+        raise UploadError(f"Uploads not found or not complete: {', '.join(missing)}.")
+    return [
+        {
+            "upload_id": str(upload_id),
+            "original_filename": uploads[upload_id].filename,
+            "mimetype": uploads[upload_id].content_type,
+            "size": uploads[upload_id].size,
+            "sha256": uploads[upload_id].sha256,
+        }
+        for upload_id in upload_ids
+    ]
+
+
+def input_files_metadata(input_files: Optional[List[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+    """Adds the local `storage_path` of each referenced blob to a job's `input_files`."""
+    if not input_files:
+        return input_files
+    return [
+        dict(entry, storage_path=blob_path(entry["sha256"])) if entry.get("sha256") else entry
+        for entry in input_files
+    ]
@@ -1,27 +1,119 @@
 from .celery_app import celery
 from .extensions import db
-from app.models.job_model import Job, JobLog
 from app.models.bot_model import BotConfiguration
+from app.services import artifact_service, health_service, job_log_service, job_result_cache, job_retry, job_service, upload_service
+from app import executors, script_registry
+from app.job_control import JobControl, JobCancelled
+from celery.signals import worker_init, worker_process_init, worker_ready, worker_shutdown
+from core import metrics, task_queue
+from core.config import settings
+from sqlalchemy.orm import configure_mappers
+import gc
+import redis
 import time
-import importlib
 from datetime import datetime, timezone
 import os
 import traceback 
-from uuid import UUID 
+from uuid import UUID, uuid4
 
 
 def _add_job_log(job_id: UUID, level: str, message: str, source: str = "worker"):
-    """Adds a log entry for a given job."""
+    """
+    Adds a log entry for a given job. Inside `execute_rpa_bot_task` entries are
+    buffered and written in bulk on a separate connection (see `job_log_service`).
+    """
+    job_log_service.add_job_log(job_id, level, message, source=source)
+
+
+def _release_bot_slot(bot_config_id: UUID, job_id: UUID):
+    """Frees the bot concurrency slot the dispatcher took for this job, if any."""
     try:
-        log_entry = JobLog(job_id=job_id, log_level=level, message=message, source=source)
-        db.session.add(log_entry)
-        db.session.commit()
-    except Exception as e:
-        print(f"Error adding job log for job {job_id}: {e}")
-        db.session.rollback()
+        task_queue.release_slot(job_service.bot_slot_key(bot_config_id), str(job_id))
+    except redis.RedisError as e:
+        print(f"Error releasing concurrency slot of bot {bot_config_id} for job {job_id}: {e}")
+
+
+def _is_prefork(worker) -> bool:
+    pool_cls = getattr(worker, "pool_cls", None)
+    return getattr(pool_cls, "__module__", str(pool_cls)).endswith("prefork")
+
+
+@worker_init.connect
+def _preload_worker(sender=None, **kwargs):
+    """
+    Imports all RPA script modules and configures the ORM mappers in the main worker
+    process, before the first task arrives. Prefork children are forked from it afterwards
+    and share that state; gc.freeze() keeps the collector from touching (and so copying)
+    the inherited objects' pages.
+    """
+    script_registry.warm()
+    configure_mappers()
+    if _is_prefork(sender):
+        gc.freeze()
+    elif settings.EXECUTOR_PREWARM_POOL:
+        executors.get_process_pool().prewarm()
+
+
+@worker_process_init.connect
+def _prewarm_process_pool(**kwargs):
+    """Starts each prefork child's script process pool (it can't be inherited across the fork)."""
+    if settings.EXECUTOR_PREWARM_POOL:
+        executors.get_process_pool().prewarm()
+
+
+@worker_init.connect
+def _start_metrics_exporter(**kwargs):
+    """Serves the worker's metrics on METRICS_EXPORTER_PORT (prefork children need PROMETHEUS_MULTIPROC_DIR)."""
+    if settings.METRICS_ENABLED and settings.METRICS_EXPORTER_PORT:
+        metrics.start_exporter(settings.METRICS_EXPORTER_PORT)
+
+
+@worker_ready.connect
+def _start_heartbeat(sender=None, **kwargs):
+    """Lets readiness probes see this worker (see health_service.WORKER_HEARTBEATS_KEY)."""
+    health_service.start_worker_heartbeat(sender.hostname)
+
+
+@worker_shutdown.connect
+def _stop_heartbeat(sender=None, **kwargs):
+    health_service.stop_worker_heartbeat(sender.hostname)
+
+
+def _reject_unclaimed_job(task, job_id: UUID, job_id_str: str):
+    """Explains why `claim_job` found nothing to run. Only reached off the hot path."""
+    job = job_service.get_job_by_id(db.session, job_id)
+
+    if not job:
+        print(f"CRITICAL: Job with ID {job_id_str} not found in execute_rpa_bot_task.")
+        return {"status": "error", "message": "Job not found in database"}
+
+    if job.status in job_service.ACTIVE_STATUSES and not task.request.is_eager:
+        # Either a duplicate delivery of a job that is still running, or the redelivery of one
+        # whose worker just died (reject_on_worker_lost) and whose heartbeat isn't stale yet.
+        # Acking it as skipped would strand the latter, so look again once it could be stale.
+        print(f"Job {job_id_str} is '{job.status}' with a recent heartbeat; checking again in {settings.JOB_HEARTBEAT_STALE_SECONDS:g}s.")
+        raise task.retry(countdown=settings.JOB_HEARTBEAT_STALE_SECONDS)
+
+    if job.status not in job_service.CLAIMABLE_STATUSES:
+        message = f"Job {job_id_str} is already '{job.status}' (Celery Task ID: {job.celery_task_id}). Skipping duplicate execution."
+        print(f"WARNING: {message}")
+        _add_job_log(job_id, "WARNING", message)
+        return {"status": "skipped", "message": message, "job_id": job_id_str}
+
+    bot_config = db.session.get(BotConfiguration, job.bot_config_id)
+    if not bot_config:
+        error_message = f"BotConfiguration with ID {job.bot_config_id} not found for Job {job_id_str}."
+    else:
+        error_message = f"Bot '{bot_config.name}' (ID: {bot_config.id}) is disabled. Job {job_id_str} cannot run."
+
+    if job_service.fail_unclaimable_job(db.session, job_id, error_message):
+        _add_job_log(job_id, "ERROR", error_message)
+        _release_bot_slot(job.bot_config_id, job_id)
+    return {"status": "error", "message": error_message, "job_id": job_id_str}
 
 
-@celery.task(bind=True, name="app.tasks.execute_rpa_bot", acks_late=True, reject_on_worker_lost=True)
+# max_retries=None: `_reject_unclaimed_job` retries a redelivered task until its job's worker is known to be alive or dead.
+@celery.task(bind=True, name="app.tasks.execute_rpa_bot", acks_late=True, reject_on_worker_lost=True, max_retries=None)
 def execute_rpa_bot_task(self, job_id_str: str):
     """
     Celery task to execute an RPA bot.
@@ -30,92 +122,166 @@ def execute_rpa_bot_task(self, job_id_str: str):
     `reject_on_worker_lost=True` works with acks_late to ensure redelivery if worker dies.
     """
     job_id = UUID(job_id_str) 
-    job = db.session.get(Job, job_id)
+    with job_log_service.job_log_buffer(job_id):
+        result = _run_job(self, job_id, job_id_str)
+    metrics.JOB_OUTCOMES.labels(result.get("status")).inc()
+    if result.get("status") != "skipped":
+        job_log_service.publish_job_end(job_id, result.get("status"))
+    return result
 
-    if not job:
-        print(f"CRITICAL: Job with ID {job_id_str} not found in execute_rpa_bot_task.")
-        return {"status": "error", "message": "Job not found in database"}
 
-    bot_config = db.session.get(BotConfiguration, job.bot_config_id)
-    if not bot_config:
-        job.status = "failed"
-        job.error_message = f"BotConfiguration with ID {job.bot_config_id} not found for Job {job_id_str}."
-        job.completed_at = datetime.now(timezone.utc)
-        db.session.commit()
-        _add_job_log(job_id, "ERROR", job.error_message)
-        return {"status": "error", "message": job.error_message, "job_id": job_id_str}
+RESULT_ARTIFACT_NAME = "result_summary.txt"
 
-    if not bot_config.is_enabled:
-        job.status = "failed"
-        job.error_message = f"Bot '{bot_config.name}' (ID: {bot_config.id}) is disabled. Job {job_id_str} cannot run."
-        job.completed_at = datetime.now(timezone.utc)
-        db.session.commit()
-        _add_job_log(job_id, "ERROR", job.error_message)
-        return {"status": "error", "message": job.error_message, "job_id": job_id_str}
-
-    job.status = "running"
-    job.started_at = datetime.now(timezone.utc)
-    job.celery_task_id = self.request.id 
-    db.session.commit()
-    _add_job_log(job_id, "INFO", f"Job {job_id_str} status: RUNNING. Bot: {bot_config.name}. Celery Task ID: {self.request.id}")
 
+def _summarize_result(control: JobControl, result_summary) -> str:
+    """
+    The text stored in `Job.result_summary`. Results longer than `JOB_RESULT_SUMMARY_MAX_LENGTH`
+    are saved in full as an artifact and truncated in the row, which keeps `jobs` rows small.
+    """
+    if not result_summary:
+        return "Execution completed without explicit result summary."
+    summary = str(result_summary)
+    max_length = settings.JOB_RESULT_SUMMARY_MAX_LENGTH
+    if len(summary) <= max_length:
+        return summary
     try:
-        _add_job_log(job_id, "INFO", f"Attempting to run script: {bot_config.script_identifier} for Job {job_id_str}.")
+        control.save_artifact(RESULT_ARTIFACT_NAME, summary)
+    except Exception as e:
+        print(f"Error saving result artifact for job {control.job_id}: {e}")
+        return summary[:max_length] + " ... (truncated)"
+    return summary[:max_length] + f" ... (truncated; full result in artifact '{RESULT_ARTIFACT_NAME}')"
 
-        
-        
-        if not bot_config.script_identifier or '.' not in bot_config.script_identifier:
-            raise ValueError(f"Invalid script_identifier format: '{bot_config.script_identifier}'. Expected 'module_name.function_name'.")
 
-        module_name_rel, function_name = bot_config.script_identifier.rsplit('.', 1)
-        full_module_name = f"rpa_scripts.{module_name_rel}"
+def _complete_from_cache(job, bot_config: BotConfiguration, cached_job, job_id_str: str, in_flight_key):
+    """Finishes a job with the result and artifacts of an identical job, without running the script."""
+    job.status = "success"
+    job.result_summary = cached_job.result_summary
+    job.cached_from_job_id = cached_job.id
+    job.progress_percent = 100
+    job.completed_at = datetime.now(timezone.utc)
+    artifact_service.copy_artifacts(db.session, cached_job.id, job.id)
+    db.session.commit()
+    _add_job_log(job.id, "INFO", f"Job {job_id_str} completed from the result cache (same inputs as job {cached_job.id}). Result: {job.result_summary}")
+    if bot_config.max_concurrency:
+        _release_bot_slot(bot_config.id, job.id)
+    if in_flight_key:
+        job_result_cache.release_in_flight(in_flight_key, job.id)
+    return {"job_id": job_id_str, "status": job.status, "result": job.result_summary, "cached_from": str(cached_job.id)}
 
-        _add_job_log(job_id, "DEBUG", f"Importing module: {full_module_name}, function: {function_name}")
-        
-        rpa_module = importlib.import_module(full_module_name)
-        rpa_function = getattr(rpa_module, function_name)
 
-        _add_job_log(job_id, "INFO", f"Successfully imported RPA function. Executing now for Job {job_id_str}.")
+def _retry_or_dead_letter(job, bot_config: BotConfiguration, job_id_str: str) -> None:
+    """
+    Parks a retryable failure as a 'scheduled' job that the dispatcher re-queues after the
+    backoff, so waiting never holds a worker slot or a prefetched message. Once the bot's
+    `max_retries` are used up the job stays failed and is marked dead-lettered.
+    """
+    attempt = (job.retry_count or 0) + 1
+    if attempt > bot_config.max_retries:
+        job.dead_lettered_at = datetime.now(timezone.utc)
+        _add_job_log(job.id, "ERROR", f"Job {job_id_str} failed after {bot_config.max_retries} retries; moved to the dead-letter queue.")
+        return
+    job.status = "scheduled"
+    job.retry_count = attempt
+    job.scheduled_at = job_retry.next_attempt_at(bot_config, attempt)
+    # A fresh task id, so revoking or tracking the retry doesn't hit the finished attempt's message.
+    job.celery_task_id = str(uuid4())
+    _add_job_log(job.id, "WARNING", f"Job {job_id_str}: retry {attempt} of {bot_config.max_retries} at {job.scheduled_at.isoformat()}.")
+
+
+def _run_job(task, job_id: UUID, job_id_str: str):
+    with metrics.job_phase("bootstrap"):
+        claimed = job_service.claim_job(db.session, job_id, celery_task_id=task.request.id)
+    if claimed is None:
+        claimed = job_service.take_over_stale_job(db.session, job_id, celery_task_id=task.request.id)
+        if claimed is None:
+            return _reject_unclaimed_job(task, job_id, job_id_str)
+        _add_job_log(job_id, "WARNING", f"Job {job_id_str}: its previous worker stopped sending heartbeats; running it again.")
+    job, bot_config = claimed
+    queued_since = job.enqueued_at or job.created_at
+    if job.started_at and queued_since:
+        metrics.JOB_QUEUE_WAIT_SECONDS.labels(bot_config.name).observe(max(0.0, (job.started_at - queued_since).total_seconds()))
+
+    _add_job_log(job_id, "INFO", f"Job {job_id_str} status: RUNNING. Bot: {bot_config.name}. Celery Task ID: {task.request.id}")
+
+    # The key the job was submitted under (for coalescing) may predate a bot update; the
+    # result is cached under the key for the bot version that actually runs it.
+    in_flight_key = job.result_cache_key
+    if bot_config.result_cache_ttl:
+        job.result_cache_key = job_result_cache.cache_key(bot_config, job.parameters_used, job.input_files)
+        cached_job = job_result_cache.find_cached_result(db.session, bot_config, job.result_cache_key)
+        if cached_job is not None:
+            return _complete_from_cache(job, bot_config, cached_job, job_id_str, in_flight_key)
+
+    control = JobControl(job_id, slot_key=job_service.bot_slot_key(bot_config.id) if bot_config.max_concurrency else None)
+    control.start()
+    run_started = None
+
+    try:
+        _add_job_log(job_id, "INFO", f"Running script: {bot_config.script_identifier} for Job {job_id_str} ({bot_config.execution_mode or 'inline'} mode).")
+
+        with metrics.job_phase("import"):
+            script = script_registry.get(bot_config.script_identifier)
 
-        result_summary = rpa_function(
-            job_id_str=str(job.id),
-            parameters=job.parameters_used,
-            input_files_metadata=job.input_files, 
-            job_log_func=_add_job_log
-        )
+        run_started = time.perf_counter()
+        with metrics.job_phase("run"):
+            result_summary = executors.run_script(
+                bot_config,
+                control,
+                script=script,
+                job_id_str=str(job.id),
+                parameters=job.parameters_used,
+                input_files_metadata=upload_service.input_files_metadata(job.input_files),
+                job_log_func=_add_job_log,
+            )
 
         job.status = "success"
-        job.result_summary = str(result_summary) if result_summary else "Execution completed without explicit result summary."
+        job.result_summary = _summarize_result(control, result_summary)
         _add_job_log(job_id, "INFO", f"Job {job_id_str} completed successfully. Result: {job.result_summary}")
 
-    except ModuleNotFoundError as e:
-        job.status = "failed"
-        error_msg = f"Failed to import RPA script module: {str(e)}. Ensure '{full_module_name}' exists and rpa_scripts directory is in PYTHONPATH."
-        job.error_message = error_msg
-        job.error_details = {"traceback": traceback.format_exc(), "module_path_searched": full_module_name}
-        _add_job_log(job_id, "ERROR", error_msg)
-        _add_job_log(job_id, "DEBUG", f"Traceback: {traceback.format_exc()}")
-        print(f"ModuleNotFoundError in task for job {job_id_str}: {e}\n{traceback.format_exc()}")
+    except JobCancelled as e:
+        job.status = "cancelled"
+        job.error_message = str(e)
+        _add_job_log(job_id, "WARNING", f"Job {job_id_str} cancelled by request.")
 
-    except AttributeError as e:
+    except script_registry.InvalidScriptIdentifier as e:
         job.status = "failed"
-        error_msg = f"Failed to find function '{function_name}' in module '{full_module_name}': {str(e)}."
+        error_msg = str(e)
         job.error_message = error_msg
-        job.error_details = {"traceback": traceback.format_exc()}
+        job.error_details = {"traceback": traceback.format_exc(), "script_identifier": bot_config.script_identifier}
         _add_job_log(job_id, "ERROR", error_msg)
         _add_job_log(job_id, "DEBUG", f"Traceback: {traceback.format_exc()}")
-        print(f"AttributeError in task for job {job_id_str}: {e}\n{traceback.format_exc()}")
+        print(f"InvalidScriptIdentifier in task for job {job_id_str}: {e}\n{traceback.format_exc()}")
 
     except Exception as e:
         job.status = "failed"
         error_msg = f"Error during bot execution for Job {job_id_str}: {str(e)}"
         job.error_message = error_msg
-        job.error_details = {"traceback": traceback.format_exc()} 
+        error_traceback = getattr(e, "remote_traceback", None) or traceback.format_exc()
+        job.error_details = {"traceback": error_traceback}
         _add_job_log(job_id, "ERROR", error_msg)
-        _add_job_log(job_id, "DEBUG", f"Traceback: {traceback.format_exc()}")
-        print(f"Exception in task for job {job_id_str}: {e}\n{traceback.format_exc()}") 
+        _add_job_log(job_id, "DEBUG", f"Traceback: {error_traceback}")
+        print(f"Exception in task for job {job_id_str}: {e}\n{error_traceback}")
+        if job_retry.is_retryable(bot_config, e):
+            _retry_or_dead_letter(job, bot_config, job_id_str)
     finally:
-        job.completed_at = datetime.now(timezone.utc)
-        db.session.commit() 
+        if run_started is not None:
+            metrics.JOB_RUN_SECONDS.labels(bot_config.name, job.status).observe(time.perf_counter() - run_started)
+        with metrics.job_phase("finalize"):
+            if control.progress_percent is not None:
+                job.progress_percent = control.progress_percent
+            if control.progress_message is not None:
+                job.progress_message = control.progress_message
+            if job.status != "scheduled":
+                job.completed_at = datetime.now(timezone.utc)
+            db.session.commit() 
+            if job.status == "scheduled":
+                job_service.index_scheduled_jobs([(job.id, job.scheduled_at)])
+            control.close()
+            if bot_config.max_concurrency:
+                _release_bot_slot(bot_config.id, job_id)
+            if in_flight_key:
+                job_result_cache.release_in_flight(in_flight_key, job_id)
 
+    if job.status == "scheduled":
+        return {"job_id": str(job_id), "status": "retrying", "retry_count": job.retry_count, "retry_at": job.scheduled_at.isoformat()}
     return {"job_id": str(job_id), "status": job.status, "result": job.result_summary}
\ No newline at end of file
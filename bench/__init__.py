@@ -0,0 +1 @@
+"""Local load and latency benchmarks for the API and the worker pipeline (`python -m bench --help`)."""
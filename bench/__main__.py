@@ -0,0 +1,76 @@
+"""
+Runs the benchmark suites against the database and Redis configured in the environment
+(the same variables as the app) and writes the results as JSON:
+
+    python -m bench --out bench/results/$(git rev-parse --short HEAD).json
+    python -m bench --suites bots_crud,job_logs --compare bench/results/<baseline>.json
+
+Use a scratch database: each run creates `bench-<run id>-*` bots and jobs and deletes them afterwards.
+"""
+import argparse
+import json
+import sys
+
+from app import create_app
+from bench import harness, scripts
+from bench.suites import SUITES, BenchContext
+from core.config import settings
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="API and worker pipeline benchmarks.")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"Comma-separated subset of: {', '.join(SUITES)}.")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed operations per measurement.")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed operations before a measurement.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Client threads for the API suites.")
+    parser.add_argument("--batch-size", type=int, default=100, help="Jobs per request in job_submit's batch measurement.")
+    parser.add_argument("--log-lines", type=int, default=10000, help="Log lines written by job_logs.")
+    parser.add_argument("--celery", choices=("eager", "worker"), default="eager",
+                        help="job_e2e runs tasks in-process (eager) or on a worker started with bench.worker.")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds job_e2e waits for a worker.")
+    parser.add_argument("--out", help="Write the results document to this JSON file.")
+    parser.add_argument("--compare", help="Results JSON of an earlier run to compare against.")
+    return parser.parse_args(argv)
+
+
+def _print_comparison(rows) -> None:
+    for row in rows:
+        print(f"{row['suite']:<28} {row['metric']:<16} {row['baseline']:>12} -> {row['current']:>12}  {row['change_pct']:+.1f}%")
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    selected = [name.strip() for name in args.suites.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in SUITES]
+    if unknown:
+        print(f"Unknown suites: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    app = create_app(settings)
+    scripts.register()
+    options = {key: value for key, value in vars(args).items() if key not in ("out", "compare", "suites")}
+    ctx = BenchContext(app, options)
+
+    results = {}
+    try:
+        for name in selected:
+            print(f"Running {name}...", file=sys.stderr)
+            for measurement, metrics in SUITES[name](ctx).items():
+                results[f"{name}.{measurement}"] = metrics
+    finally:
+        ctx.cleanup()
+
+    document = {"environment": harness.environment(dict(options, suites=selected)), "results": results}
+    if args.out:
+        harness.write_results(args.out, document)
+    else:
+        print(json.dumps(document, indent=2, sort_keys=True))
+
+    if args.compare:
+        with open(args.compare) as f:
+            _print_comparison(harness.compare(json.load(f), document))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
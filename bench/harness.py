@@ -0,0 +1,109 @@
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+# Metrics where a lower value is better; everything else (rates) is better when higher.
+LOWER_IS_BETTER = ("_ms", "_seconds")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], elapsed: float, operations: Optional[int] = None) -> Dict[str, Any]:
+    """Throughput and latency distribution (in ms) of `latencies` (in seconds) measured over `elapsed` seconds."""
+    values = sorted(latencies)
+    count = operations if operations is not None else len(values)
+    return {
+        "count": count,
+        "elapsed_seconds": round(elapsed, 4),
+        "ops_per_sec": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p90_ms": round(percentile(values, 90) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def measure(operation: Callable[[int], Any], iterations: int, concurrency: int = 1, warmup: int = 0) -> Dict[str, Any]:
+    """
+    Calls `operation(i)` for i in range(iterations), from `concurrency` threads, after
+    `warmup` untimed calls. Each call is timed separately; an exception fails the run.
+    """
+    for i in range(warmup):
+        operation(-1 - i)
+
+    def timed(i: int) -> float:
+        started = time.perf_counter()
+        operation(i)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        latencies = [timed(i) for i in range(iterations)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(timed, range(iterations)))
+    result = summarize(latencies, time.perf_counter() - started)
+    result["concurrency"] = concurrency
+    return result
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(options: Dict[str, Any]) -> Dict[str, Any]:
+    """What a result file was measured on, so runs are only compared like for like."""
+    return {
+        "revision": _git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "options": options,
+    }
+
+
+def write_results(path: str, document: Dict[str, Any]) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Per-metric changes between two result documents. `change_pct` is signed so that a
+    positive value is always an improvement (higher throughput or lower latency).
+    """
+    rows = []
+    for suite, metrics in sorted(current.get("results", {}).items()):
+        for name, value in sorted(metrics.items()):
+            old = baseline.get("results", {}).get(suite, {}).get(name)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or name in ("count", "concurrency"):
+                continue
+            change = (value - old) / old * 100 if old else 0.0
+            if name.endswith(LOWER_IS_BETTER):
+                change = -change
+            rows.append({"suite": suite, "metric": name, "baseline": old, "current": value, "change_pct": round(change, 1)})
+    return rows
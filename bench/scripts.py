@@ -0,0 +1,26 @@
+"""
+RPA scripts used by the benchmarks. They are registered as `rpa_scripts._bench` by
+`register()` instead of living in rpa_scripts, so they never show up in a deployment.
+"""
+import sys
+
+from app import script_registry
+
+MODULE_NAME = f"{script_registry.SCRIPTS_PACKAGE}._bench"
+
+
+def register() -> None:
+    sys.modules.setdefault(MODULE_NAME, sys.modules[__name__])
+
+
+def noop(job_id_str, parameters, input_files_metadata, job_log_func):
+    """Returns at once: measures the pipeline around the script."""
+    return "ok"
+
+
+def chatty(job_id_str, parameters, input_files_metadata, job_log_func):
+    """Writes `parameters['lines']` log lines (default 100)."""
+    lines = int((parameters or {}).get("lines", 100))
+    for i in range(lines):
+        job_log_func(job_id_str, "INFO", f"bench log line {i}", source="bench")
+    return f"{lines} lines"
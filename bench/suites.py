@@ -0,0 +1,214 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List
+from uuid import UUID, uuid4
+
+from flask import Flask
+from sqlalchemy import delete, select
+
+from app.celery_app import celery
+from app.extensions import db
+from app.models.bot_model import BotConfiguration
+from app.models.job_model import Job
+from app.services import job_log_service, job_service
+from bench.harness import measure, summarize
+from core.config import settings
+
+BOTS_URL = f"{settings.API_V1_STR}/bots/"
+JOBS_URL = f"{settings.API_V1_STR}/jobs/"
+
+
+class BenchContext:
+    """State shared by the suites of one run: the app, per-thread test clients and what to clean up."""
+
+    def __init__(self, app: Flask, options: Dict[str, Any]):
+        self.app = app
+        self.options = options
+        self.run_id = uuid4().hex[:8]
+        self._local = threading.local()
+        self._bot_ids: List[UUID] = []
+        self._bot_ids_lock = threading.Lock()
+
+    @property
+    def client(self):
+        if not hasattr(self._local, "client"):
+            self._local.client = self.app.test_client()
+        return self._local.client
+
+    def request(self, method: str, url: str, expected_status: int, **kwargs):
+        response = self.client.open(url, method=method, **kwargs)
+        if response.status_code != expected_status:
+            raise RuntimeError(f"{method} {url} returned {response.status_code}: {response.get_data(as_text=True)[:500]}")
+        return response
+
+    def create_bot(self, name: str, script_identifier: str = "_bench.noop", **fields) -> UUID:
+        payload = {"name": f"bench-{self.run_id}-{name}", "script_identifier": script_identifier, **fields}
+        bot_id = UUID(self.request("POST", BOTS_URL, 201, json=payload).get_json()["id"])
+        with self._bot_ids_lock:
+            self._bot_ids.append(bot_id)
+        return bot_id
+
+    def forget_bot(self, bot_id: UUID) -> None:
+        with self._bot_ids_lock:
+            self._bot_ids.remove(bot_id)
+
+    def cleanup(self) -> None:
+        """Deletes every bot the run created, with its jobs (logs and artifacts cascade)."""
+        if not self._bot_ids:
+            return
+        with self.app.app_context():
+            db.session.execute(delete(Job).where(Job.bot_config_id.in_(self._bot_ids)))
+            db.session.execute(delete(BotConfiguration).where(BotConfiguration.id.in_(self._bot_ids)))
+            db.session.commit()
+        self._bot_ids.clear()
+
+
+def bots_crud(ctx: BenchContext) -> Dict[str, Dict[str, Any]]:
+    """Requests/sec and latency of each /api/v1/bots/ operation."""
+    iterations, concurrency = ctx.options["iterations"], ctx.options["concurrency"]
+    bot_ids: List[UUID] = [None] * iterations
+
+    def create(i):
+        if i >= 0:
+            bot_ids[i] = ctx.create_bot(f"crud-{i}")
+        else:
+            ctx.create_bot(f"crud-warmup{i}")
+
+    results = {"create": measure(create, iterations, concurrency, warmup=ctx.options["warmup"])}
+    results["list"] = measure(lambda i: ctx.request("GET", f"{BOTS_URL}?limit=50", 200), iterations, concurrency)
+    results["list_sparse"] = measure(
+        lambda i: ctx.request("GET", f"{BOTS_URL}?limit=50&fields=name,is_enabled", 200), iterations, concurrency
+    )
+    results["get"] = measure(lambda i: ctx.request("GET", f"{BOTS_URL}{bot_ids[i]}", 200), iterations, concurrency)
+    results["update"] = measure(
+        lambda i: ctx.request("PUT", f"{BOTS_URL}{bot_ids[i]}", 200, json={"description": f"updated {i}"}),
+        iterations, concurrency,
+    )
+
+    def remove(i):
+        ctx.request("DELETE", f"{BOTS_URL}{bot_ids[i]}", 204)
+        ctx.forget_bot(bot_ids[i])
+
+    results["delete"] = measure(remove, iterations, concurrency)
+    return results
+
+
+def job_submit(ctx: BenchContext) -> Dict[str, Dict[str, Any]]:
+    """
+    Throughput of POST /api/v1/jobs/batch. Jobs are left queued (as in fair dispatch mode)
+    so only the API and the INSERT are measured, not Celery.
+    """
+    batch_size = ctx.options["batch_size"]
+    bot_id = ctx.create_bot("submit")
+    payload = lambda i: {"bot_config_id": str(bot_id), "parameter_sets": [{"n": i, "k": k} for k in range(batch_size)]}
+
+    dispatch_mode = settings.JOB_DISPATCH_MODE
+    settings.JOB_DISPATCH_MODE = "fair"
+    try:
+        single = measure(
+            lambda i: ctx.request("POST", f"{JOBS_URL}batch", 202, json={"bot_config_id": str(bot_id), "parameter_sets": [{"n": i}]}),
+            ctx.options["iterations"], ctx.options["concurrency"], warmup=ctx.options["warmup"],
+        )
+        batches = measure(
+            lambda i: ctx.request("POST", f"{JOBS_URL}batch", 202, json=payload(i)),
+            max(1, ctx.options["iterations"] // 10), ctx.options["concurrency"],
+        )
+    finally:
+        settings.JOB_DISPATCH_MODE = dispatch_mode
+    batches["batch_size"] = batch_size
+    batches["jobs_per_sec"] = round(batches["ops_per_sec"] * batch_size, 2)
+    return {"single": single, "batch": batches}
+
+
+def _wait_for_jobs(ctx: BenchContext, job_ids: List[UUID], submitted_at: Dict[UUID, float],
+                   timeout: float) -> List[float]:
+    """Polls until every job is terminal; returns submit-to-completion latencies (s), as observed."""
+    pending = set(job_ids)
+    latencies = []
+    deadline = time.perf_counter() + timeout
+    with ctx.app.app_context():
+        while pending:
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"{len(pending)} jobs did not finish within {timeout}s; is a worker running?")
+            rows = db.session.execute(
+                select(Job.id, Job.status).where(Job.id.in_(list(pending)), Job.status.in_(job_service.TERMINAL_STATUSES))
+            ).all()
+            db.session.commit()
+            now = time.perf_counter()
+            for job_id, status in rows:
+                if status != "success":
+                    raise RuntimeError(f"Job {job_id} finished with status '{status}'.")
+                pending.discard(job_id)
+                latencies.append(now - submitted_at[job_id])
+            if pending:
+                time.sleep(0.005)
+    return latencies
+
+
+def job_e2e(ctx: BenchContext) -> Dict[str, Dict[str, Any]]:
+    """
+    Submission-to-completion latency of a no-op job. With `--celery eager` the task runs inside
+    the submitting request; with `--celery worker` it goes through Redis to a running worker.
+    """
+    iterations = ctx.options["iterations"]
+    bot_id = ctx.create_bot("e2e")
+
+    if ctx.options["celery"] == "eager":
+        eager = celery.conf.task_always_eager
+        celery.conf.task_always_eager = True
+        try:
+            def run(i):
+                response = ctx.request("POST", f"{JOBS_URL}batch", 202, json={"bot_config_id": str(bot_id), "parameter_sets": [{"n": i}]})
+                job_id = response.get_json()["job_ids"][0]
+                status = ctx.request("GET", f"{JOBS_URL}{job_id}/progress", 200).get_json()["status"]
+                if status != "success":
+                    raise RuntimeError(f"Job {job_id} finished with status '{status}'.")
+            return {"sequential": measure(run, iterations, 1, warmup=ctx.options["warmup"])}
+        finally:
+            celery.conf.task_always_eager = eager
+
+    submitted_at: Dict[UUID, float] = {}
+    started = time.perf_counter()
+    for i in range(iterations):
+        submitted = time.perf_counter()
+        response = ctx.request("POST", f"{JOBS_URL}batch", 202, json={"bot_config_id": str(bot_id), "parameter_sets": [{"n": i}]})
+        submitted_at[UUID(response.get_json()["job_ids"][0])] = submitted
+    latencies = _wait_for_jobs(ctx, list(submitted_at), submitted_at, ctx.options["timeout"])
+    return {"burst": summarize(latencies, time.perf_counter() - started)}
+
+
+def job_logs(ctx: BenchContext) -> Dict[str, Dict[str, Any]]:
+    """Log writes/sec through `_add_job_log`, buffered (as inside a task) and unbuffered."""
+    from app.tasks import _add_job_log
+
+    lines = ctx.options["log_lines"]
+    bot_id = ctx.create_bot("logs")
+    results = {}
+    with ctx.app.app_context():
+        job = Job(bot_config_id=bot_id, status="running")
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+
+        latencies = []
+        started = time.perf_counter()
+        with job_log_service.job_log_buffer(job_id):
+            for i in range(lines):
+                t = time.perf_counter()
+                _add_job_log(job_id, "INFO", f"bench log line {i}")
+                latencies.append(time.perf_counter() - t)
+        results["buffered"] = summarize(latencies, time.perf_counter() - started)
+
+        unbuffered_lines = max(1, lines // 20)
+        results["unbuffered"] = measure(
+            lambda i: _add_job_log(job_id, "INFO", f"bench unbuffered log line {i}"), unbuffered_lines,
+        )
+    return results
+
+
+SUITES: Dict[str, Callable[[BenchContext], Dict[str, Dict[str, Any]]]] = {
+    "bots_crud": bots_crud,
+    "job_submit": job_submit,
+    "job_e2e": job_e2e,
+    "job_logs": job_logs,
+}
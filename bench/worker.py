@@ -0,0 +1,14 @@
+"""
+Celery worker entry point for `python -m bench --celery worker`, with the benchmark scripts registered:
+
+    PYTHONPATH=$(pwd) celery -A bench.worker.celery worker -l warning -P gevent
+"""
+from app import create_app
+from app.celery_app import celery
+from bench import scripts
+from core.config import settings
+
+app = create_app(settings, role="worker")
+scripts.register()
+
+__all__ = ["app", "celery"]
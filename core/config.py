@@ -1,10 +1,16 @@
 # core/config.py
 import os
-from dotenv import load_dotenv
 from typing import List
 from urllib.parse import quote_plus
 
-load_dotenv()
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# python-dotenv takes tens of milliseconds to import; deployments configured through
+# the environment have no .env and skip it.
+_dotenv_path = os.path.join(PROJECT_ROOT, '.env')
+if os.path.exists(_dotenv_path):
+    from dotenv import load_dotenv
+    load_dotenv(_dotenv_path)
 
 class Config:
     PROJECT_NAME = os.getenv("PROJECT_NAME", "Girit RPA Service (Flask)")
@@ -29,20 +35,133 @@ class Config:
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # 'api' or 'worker' (Celery workers, dispatcher); selects which pool settings below apply.
+    PROCESS_ROLE = os.getenv('PROCESS_ROLE', 'api')
+    # Print how long each step of create_app took (see core.startup).
+    STARTUP_PROFILE = os.getenv('STARTUP_PROFILE', 'False').lower() in ('true', '1', 't')
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '30000'))
+    # Each worker process needs a connection per concurrently running job (plus log/control writers).
+    WORKER_DB_POOL_SIZE = int(os.getenv('WORKER_DB_POOL_SIZE', '5'))
+    WORKER_DB_MAX_OVERFLOW = int(os.getenv('WORKER_DB_MAX_OVERFLOW', '5'))
+    WORKER_DB_STATEMENT_TIMEOUT_MS = int(os.getenv('WORKER_DB_STATEMENT_TIMEOUT_MS', '0'))
+    # Maintenance commands (flask job-logs / jobs ...) run without a statement timeout, but give
+    # up on a table lock they can't get within this long rather than stall every writer behind them.
+    MAINTENANCE_LOCK_TIMEOUT_MS = int(os.getenv('MAINTENANCE_LOCK_TIMEOUT_MS', '10000'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'True').lower() in ('true', '1', 't')
+    # Behind PgBouncer in transaction mode: no client-side pool, no session-level settings or prepared statements.
+    USE_PGBOUNCER_TRANSACTION_MODE = os.getenv('USE_PGBOUNCER_TRANSACTION_MODE', 'False').lower() in ('true', '1', 't')
+
     _cors_origins_str = os.getenv("CORS_ORIGINS", "http://localhost:3000")
     CORS_ORIGINS: List[str] = [origin.strip() for origin in _cors_origins_str.split(',')]
 
     SECRET_KEY = os.getenv("SECRET_KEY", "default_secret_key_change_me_in_production")
 
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', '2.0'))
     CELERY_BROKER_URL = REDIS_URL
     CELERY_RESULT_BACKEND = REDIS_URL
 
     CELERY_TASK_ALWAYS_EAGER = os.getenv('CELERY_TASK_ALWAYS_EAGER', 'False').lower() in ('true', '1', 't')
     CELERY_TASK_EAGER_PROPAGATES = CELERY_TASK_ALWAYS_EAGER 
 
+    JOB_LOG_BUFFER_SIZE = int(os.getenv('JOB_LOG_BUFFER_SIZE', '200'))
+    JOB_LOG_FLUSH_INTERVAL = float(os.getenv('JOB_LOG_FLUSH_INTERVAL', '0.5'))
+    JOB_LOG_STREAM_ENABLED = os.getenv('JOB_LOG_STREAM_ENABLED', 'True').lower() in ('true', '1', 't')
+    JOB_LOG_STREAM_KEEPALIVE = float(os.getenv('JOB_LOG_STREAM_KEEPALIVE', '15'))
+    JOB_LOG_STREAM_BACKFILL_PAGE_SIZE = int(os.getenv('JOB_LOG_STREAM_BACKFILL_PAGE_SIZE', '500'))
+    # job_logs is range-partitioned by timestamp; the dispatcher keeps partitions ahead and drops expired ones.
+    JOB_LOG_PARTITION_DAYS = int(os.getenv('JOB_LOG_PARTITION_DAYS', '7'))
+    JOB_LOG_PARTITIONS_AHEAD = int(os.getenv('JOB_LOG_PARTITIONS_AHEAD', '2'))
+    JOB_LOG_RETENTION_DAYS = int(os.getenv('JOB_LOG_RETENTION_DAYS', '90'))  # 0 keeps logs forever
+    JOB_LOG_MAINTENANCE_INTERVAL = float(os.getenv('JOB_LOG_MAINTENANCE_INTERVAL', '3600'))  # 0 disables it
+    # Moves the logs of jobs finished this long ago into one compressed blob per job.
+    JOB_LOG_COMPACTION_ENABLED = os.getenv('JOB_LOG_COMPACTION_ENABLED', 'False').lower() in ('true', '1', 't')
+    JOB_LOG_COMPACT_AFTER = int(os.getenv('JOB_LOG_COMPACT_AFTER', '86400'))
+    JOB_LOG_COMPACTION_BATCH_SIZE = int(os.getenv('JOB_LOG_COMPACTION_BATCH_SIZE', '50'))
+
+    JOB_LIST_MAX_LIMIT = int(os.getenv('JOB_LIST_MAX_LIMIT', '500'))
+    JOB_BATCH_MAX_SIZE = int(os.getenv('JOB_BATCH_MAX_SIZE', '10000'))
+    JOB_ENQUEUE_CHUNK_SIZE = int(os.getenv('JOB_ENQUEUE_CHUNK_SIZE', '500'))
+
+    # 'direct' enqueues jobs on submission; 'fair' leaves them queued for the dispatcher process.
+    JOB_DISPATCH_MODE = os.getenv('JOB_DISPATCH_MODE', 'direct')
+    FAIR_DISPATCH_INTERVAL = float(os.getenv('FAIR_DISPATCH_INTERVAL', '0.5'))
+    FAIR_DISPATCH_QUANTUM = int(os.getenv('FAIR_DISPATCH_QUANTUM', '5'))
+    FAIR_DISPATCH_MAX_IN_FLIGHT = int(os.getenv('FAIR_DISPATCH_MAX_IN_FLIGHT', '200'))
+    # Renewed with every job heartbeat (at least every JOB_HEARTBEAT_INTERVAL while a job runs),
+    # so it only needs to outlast a worker that died without releasing its slot.
+    BOT_SLOT_LEASE_SECONDS = float(os.getenv('BOT_SLOT_LEASE_SECONDS', '300'))
+
+    SCHEDULER_INTERVAL = float(os.getenv('SCHEDULER_INTERVAL', '0.2'))
+    SCHEDULER_BATCH_SIZE = int(os.getenv('SCHEDULER_BATCH_SIZE', '500'))
+    # How often the dispatcher also scans the partial index directly, catching jobs missing from Redis.
+    SCHEDULER_RECONCILE_INTERVAL = float(os.getenv('SCHEDULER_RECONCILE_INTERVAL', '30'))
+
+    JOB_CANCEL_CHECK_INTERVAL = float(os.getenv('JOB_CANCEL_CHECK_INTERVAL', '1.0'))
+    # How long a cancelled 'thread' or 'subprocess' script gets to stop before it is abandoned or killed.
+    JOB_CANCEL_GRACE_SECONDS = float(os.getenv('JOB_CANCEL_GRACE_SECONDS', '10'))
+    JOB_HEARTBEAT_INTERVAL = float(os.getenv('JOB_HEARTBEAT_INTERVAL', '2.0'))
+    # A redelivered job still 'running' without a heartbeat for this long lost its worker and is run again.
+    JOB_HEARTBEAT_STALE_SECONDS = float(os.getenv('JOB_HEARTBEAT_STALE_SECONDS', '60'))
+    JOB_PROGRESS_FLUSH_INTERVAL = float(os.getenv('JOB_PROGRESS_FLUSH_INTERVAL', '5.0'))
+    JOB_CONTROL_KEY_TTL = int(os.getenv('JOB_CONTROL_KEY_TTL', '86400'))
+    JOB_RESULT_SUMMARY_MAX_LENGTH = int(os.getenv('JOB_RESULT_SUMMARY_MAX_LENGTH', '4000'))
+    # Retry backoff of bots that don't set their own (see BotConfiguration.max_retries).
+    JOB_RETRY_BACKOFF_SECONDS = int(os.getenv('JOB_RETRY_BACKOFF_SECONDS', '30'))
+    JOB_RETRY_BACKOFF_MAX_SECONDS = int(os.getenv('JOB_RETRY_BACKOFF_MAX_SECONDS', '3600'))
+    # Upper bound on how long an identical submission is coalesced onto a job that never reports back.
+    JOB_RESULT_IN_FLIGHT_TTL = int(os.getenv('JOB_RESULT_IN_FLIGHT_TTL', '3600'))
+
+    # Process pool for bots with execution_mode='subprocess' (started on first use, or at worker start with prewarm).
+    EXECUTOR_PROCESS_POOL_SIZE = int(os.getenv('EXECUTOR_PROCESS_POOL_SIZE', '4'))
+    EXECUTOR_PREWARM_POOL = os.getenv('EXECUTOR_PREWARM_POOL', 'False').lower() in ('true', '1', 't')
+    EXECUTOR_MAX_JOBS_PER_PROCESS = int(os.getenv('EXECUTOR_MAX_JOBS_PER_PROCESS', '50'))
+    EXECUTOR_MAX_RSS_MB = int(os.getenv('EXECUTOR_MAX_RSS_MB', '1024'))
+    # Celery queue for jobs of `async def` scripts, for a gevent worker (`-P gevent -Q <queue>`) to
+    # consume. Empty sends them to the default queue with every other job.
+    ASYNC_SCRIPTS_QUEUE = os.getenv('ASYNC_SCRIPTS_QUEUE', '')
+
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() in ('true', '1', 't')
+    # Per-phase timings of execute_rpa_bot_task (bootstrap, import, run, finalize).
+    METRICS_JOB_PHASE_TIMING = os.getenv('METRICS_JOB_PHASE_TIMING', 'False').lower() in ('true', '1', 't')
+    # Port of the exporter Celery workers and the dispatcher start; 0 disables it.
+    METRICS_EXPORTER_PORT = int(os.getenv('METRICS_EXPORTER_PORT', '0'))
+    METRICS_EXPORTER_ADDR = os.getenv('METRICS_EXPORTER_ADDR', '0.0.0.0')
+
+    # Readiness (/api/v1/health/ready) is checked in the background and served from memory.
+    HEALTH_CHECK_INTERVAL = float(os.getenv('HEALTH_CHECK_INTERVAL', '2.0'))
+    HEALTH_CHECK_TIMEOUT = float(os.getenv('HEALTH_CHECK_TIMEOUT', '2.0'))
+    HEALTH_REQUIRE_WORKERS = os.getenv('HEALTH_REQUIRE_WORKERS', 'False').lower() in ('true', '1', 't')
+    WORKER_HEARTBEAT_INTERVAL = float(os.getenv('WORKER_HEARTBEAT_INTERVAL', '10'))
+    WORKER_HEARTBEAT_TTL = float(os.getenv('WORKER_HEARTBEAT_TTL', '30'))
+
+    # Re-stats a script's module before each job to pick up edits; on by default only in development.
+    RPA_SCRIPTS_AUTO_RELOAD = os.getenv('RPA_SCRIPTS_AUTO_RELOAD', 'False').lower() in ('true', '1', 't')
+
+    BOT_CONFIG_CACHE_TTL = float(os.getenv('BOT_CONFIG_CACHE_TTL', '300'))
+    BOT_CONFIG_CACHE_MAX_ENTRIES = int(os.getenv('BOT_CONFIG_CACHE_MAX_ENTRIES', '1024'))
+    # Shares invalidations between processes through a Redis generation counter. Without it a
+    # process only sees another's bot updates when its own entries expire, so they are then
+    # kept for at most BOT_CONFIG_CACHE_LOCAL_ONLY_TTL seconds.
+    BOT_CONFIG_CACHE_USE_REDIS = os.getenv('BOT_CONFIG_CACHE_USE_REDIS', 'True').lower() in ('true', '1', 't')
+    BOT_CONFIG_CACHE_LOCAL_ONLY_TTL = float(os.getenv('BOT_CONFIG_CACHE_LOCAL_ONLY_TTL', '5'))
+    BOT_CONFIG_CACHE_GENERATION_CHECK_INTERVAL = float(os.getenv('BOT_CONFIG_CACHE_GENERATION_CHECK_INTERVAL', '1.0'))
+    # Compiled parameter_schema validators kept per process (one per bot version).
+    PARAMETER_VALIDATOR_CACHE_SIZE = int(os.getenv('PARAMETER_VALIDATOR_CACHE_SIZE', '512'))
+
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads') 
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024 
+    # Chunked uploads (PATCH /api/v1/uploads/<id>) stream to disk and have their own limits.
+    UPLOAD_MAX_FILE_SIZE = int(os.getenv('UPLOAD_MAX_FILE_SIZE', str(5 * 1024 * 1024 * 1024)))
+    UPLOAD_MAX_CHUNK_SIZE = int(os.getenv('UPLOAD_MAX_CHUNK_SIZE', str(64 * 1024 * 1024)))
+    UPLOAD_STREAM_BUFFER_SIZE = int(os.getenv('UPLOAD_STREAM_BUFFER_SIZE', str(1024 * 1024)))
+    # Let a fronting nginx/Apache send artifact files (X-Sendfile) instead of the WSGI server.
+    USE_X_SENDFILE = os.getenv('USE_X_SENDFILE', 'False').lower() in ('true', '1', 't')
+    JOB_ARTIFACT_MAX_AGE = int(os.getenv('JOB_ARTIFACT_MAX_AGE', '3600'))
 
     ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
 
@@ -52,6 +171,7 @@ class Config:
 class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_ECHO = os.getenv("SQLALCHEMY_ECHO", "False").lower() in ('true', '1', 't')
+    RPA_SCRIPTS_AUTO_RELOAD = os.getenv('RPA_SCRIPTS_AUTO_RELOAD', 'True').lower() in ('true', '1', 't')
 
 
 
@@ -70,9 +190,6 @@ settings = app_config
 
 
 
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Subdirectories are created on first write (see upload_service), not on import.
 ABSOLUTE_UPLOAD_FOLDER = os.path.join(PROJECT_ROOT, settings.UPLOAD_FOLDER)
-
-if not os.path.exists(ABSOLUTE_UPLOAD_FOLDER):
-    os.makedirs(ABSOLUTE_UPLOAD_FOLDER, exist_ok=True)
 settings.UPLOAD_FOLDER = ABSOLUTE_UPLOAD_FOLDER # Store the absolute path
\ No newline at end of file
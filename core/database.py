@@ -1,9 +1,114 @@
 import os
-from sqlalchemy import create_engine, NullPool
+import weakref
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from sqlalchemy import NullPool, event
+from sqlalchemy.engine import Connection, Engine, make_url
+
 from .config import settings
 
-engine_args = {}
-if os.getenv("USE_PGBOUNCER_TRANSACTION_MODE", "false").lower() == "true":
-    engine_args['poolclass'] = NullPool
+ROLES = ("api", "worker")
+
+# Engines configured by `configure_engine`, so forked children can drop their parent's connections.
+_engines: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+def engine_options(role: str = "api") -> Dict[str, Any]:
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for an API or worker process. With
+    USE_PGBOUNCER_TRANSACTION_MODE, PgBouncer does the pooling: connections are
+    not kept client-side and nothing is set at the session level (PgBouncer
+    rejects startup `options`, and session state leaks across clients).
+    """
+    if role not in ROLES:
+        raise ValueError(f"Unknown process role '{role}'; expected one of {', '.join(ROLES)}.")
+    worker = role == "worker"
+    connect_args: Dict[str, Any] = {"application_name": f"girit-rpa-{role}"}
+    options: Dict[str, Any] = {"connect_args": connect_args}
+
+    if settings.USE_PGBOUNCER_TRANSACTION_MODE:
+        options["poolclass"] = NullPool
+        if make_url(settings.SQLALCHEMY_DATABASE_URI).get_driver_name() == "psycopg":
+            # psycopg 3 prepares repeated statements server-side; those don't survive a PgBouncer
+            # transaction boundary. psycopg2 never uses server-side prepared statements.
+            connect_args["prepare_threshold"] = None
+        return options
+
+    options.update(
+        pool_size=settings.WORKER_DB_POOL_SIZE if worker else settings.DB_POOL_SIZE,
+        max_overflow=settings.WORKER_DB_MAX_OVERFLOW if worker else settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    timeout = _statement_timeout(role)
+    if timeout:
+        connect_args["options"] = f"-c statement_timeout={timeout}"
+    return options
+
+
+def _statement_timeout(role: str) -> int:
+    return settings.WORKER_DB_STATEMENT_TIMEOUT_MS if role == "worker" else settings.DB_STATEMENT_TIMEOUT_MS
+
+
+def configure_engine(engine: Engine, role: str = "api") -> None:
+    """Per-engine setup that can't be expressed as engine options; call once per engine."""
+    if engine in _engines:
+        return
+    _engines.add(engine)
+    timeout = _statement_timeout(role)
+    if settings.USE_PGBOUNCER_TRANSACTION_MODE and timeout:
+        # SET LOCAL lasts only for the transaction, so it is safe on a multiplexed server connection.
+        @event.listens_for(engine, "begin")
+        def _set_statement_timeout(conn):
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
+def set_maintenance_timeouts(conn: Connection) -> None:
+    """
+    For the rest of the transaction: no statement timeout, which long maintenance statements
+    on big tables would hit, and MAINTENANCE_LOCK_TIMEOUT_MS for acquiring locks.
+    """
+    conn.exec_driver_sql("SET LOCAL statement_timeout = 0")
+    conn.exec_driver_sql(f"SET LOCAL lock_timeout = {int(settings.MAINTENANCE_LOCK_TIMEOUT_MS)}")
+
+
+@contextmanager
+def maintenance_connection(engine: Engine) -> Iterator[Connection]:
+    """
+    An autocommit connection with the timeouts of `set_maintenance_timeouts`, for statements
+    that can't run in a transaction (CREATE INDEX CONCURRENTLY). The settings are per session,
+    so the connection is discarded afterwards, and it needs a direct (or session-mode
+    PgBouncer) connection to Postgres.
+    """
+    conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        conn.exec_driver_sql("SET statement_timeout = 0")
+        conn.exec_driver_sql(f"SET lock_timeout = {int(settings.MAINTENANCE_LOCK_TIMEOUT_MS)}")
+        yield conn
+    finally:
+        conn.invalidate()
+        conn.close()
+
+
+def pool_stats(engine: Engine) -> Dict[str, Any]:
+    """Current usage of `engine`'s pool; counts are absent for pools that don't keep connections."""
+    pool = engine.pool
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    for attr in ("size", "checkedin", "checkedout", "overflow"):
+        value = getattr(pool, attr, None)
+        if callable(value):
+            stats[attr] = value()
+    return stats
+
+
+def _dispose_after_fork() -> None:
+    # A forked child (Celery prefork, gunicorn --preload) must not reuse sockets its parent
+    # holds; close=False leaves them open for the parent and gives the child an empty pool.
+    for engine in list(_engines):
+        engine.dispose(close=False)
+
 
-SQLALCHEMY_DATABASE_URL = settings.SQLALCHEMY_DATABASE_URI
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_dispose_after_fork)
@@ -0,0 +1,138 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from flask import Flask, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+
+from . import database
+from .config import settings
+
+# Jobs range from sub-second no-ops to long browser sessions.
+JOB_SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Latency of API requests by endpoint.", ["method", "endpoint", "status"],
+)
+JOB_QUEUE_WAIT_SECONDS = Histogram(
+    "job_queue_wait_seconds", "Time from enqueue to a worker claiming the job.", ["bot"], buckets=JOB_SECONDS_BUCKETS,
+)
+JOB_RUN_SECONDS = Histogram(
+    "job_run_seconds", "Run time of bot scripts by final job status.", ["bot", "status"], buckets=JOB_SECONDS_BUCKETS,
+)
+JOB_PHASE_SECONDS = Histogram(
+    "job_phase_seconds", "Time spent in each phase of execute_rpa_bot_task (METRICS_JOB_PHASE_TIMING).", ["phase"],
+)
+JOB_OUTCOMES = Counter("job_task_outcomes_total", "execute_rpa_bot_task results by status.", ["status"])
+JOB_LOG_WRITES = Counter("job_log_writes_total", "Rows written to job_logs.")
+JOB_LOG_WRITE_ERRORS = Counter("job_log_write_errors_total", "Rows lost because a job_logs flush failed.")
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out of the SQLAlchemy pool.")
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection (including connecting).",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+
+class _PoolStateCollector:
+    """Reports the current state of instrumented pools at scrape time."""
+
+    def __init__(self):
+        self.engines = {}
+
+    def collect(self):
+        checked_out = GaugeMetricFamily("db_pool_checked_out", "Connections currently checked out.", labels=["pool"])
+        overflow = GaugeMetricFamily("db_pool_overflow", "Connections open beyond the pool size.", labels=["pool"])
+        size = GaugeMetricFamily("db_pool_size", "Configured pool size.", labels=["pool"])
+        for name, engine in self.engines.items():
+            stats = database.pool_stats(engine)
+            for family, key in ((checked_out, "checkedout"), (overflow, "overflow"), (size, "size")):
+                if key in stats:
+                    family.add_metric([name], stats[key])
+        yield checked_out
+        yield overflow
+        yield size
+
+
+_pool_state = _PoolStateCollector()
+REGISTRY.register(_pool_state)
+
+
+def _instrument_pool(pool) -> None:
+    do_get = pool._do_get
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+            DB_POOL_CHECKOUTS.inc()
+
+    pool._do_get = timed_do_get
+
+
+def instrument_engine(engine, name: str = "default") -> None:
+    """Counts checkouts of `engine`'s pool and times how long each one waits for a connection."""
+    if name in _pool_state.engines:
+        return
+    _instrument_pool(engine.pool)
+    # dispose() (e.g. after a fork) swaps in a new pool, which needs wrapping again.
+    event.listen(engine, "engine_disposed", lambda disposed: _instrument_pool(disposed.pool))
+    _pool_state.engines[name] = engine
+
+
+def init_app(app: Flask) -> None:
+    """Records the latency of every request, labelled by its endpoint (blueprint.view)."""
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started_at = time.perf_counter()
+
+    @app.after_request
+    def _observe(response):
+        started = g.pop("metrics_started_at", None)
+        if started is not None:
+            HTTP_REQUEST_SECONDS.labels(
+                request.method, request.endpoint or "unmatched", response.status_code
+            ).observe(time.perf_counter() - started)
+        return response
+
+
+@contextmanager
+def job_phase(phase: str) -> Iterator[None]:
+    """Times a phase of execute_rpa_bot_task when METRICS_JOB_PHASE_TIMING is on."""
+    if not settings.METRICS_JOB_PHASE_TIMING:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        JOB_PHASE_SECONDS.labels(phase).observe(time.perf_counter() - started)
+
+
+def _registry():
+    # With several processes per host (gunicorn workers, Celery prefork), PROMETHEUS_MULTIPROC_DIR
+    # makes each scrape aggregate all of them. Pool gauges then only cover the scraped process.
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_pool_state)
+        return registry
+    return REGISTRY
+
+
+def render() -> tuple:
+    """(body, content type) of a scrape of this process's metrics."""
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+
+def start_exporter(port: int, addr: Optional[str] = None) -> None:
+    """Serves /metrics on its own port; for processes without a Flask app (Celery workers, dispatcher)."""
+    start_http_server(port, addr=addr or settings.METRICS_EXPORTER_ADDR, registry=_registry())
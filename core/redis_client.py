@@ -0,0 +1,30 @@
+import os
+from typing import Optional
+
+import redis
+
+from .config import settings
+
+_client: Optional[redis.Redis] = None
+_client_pid: Optional[int] = None
+
+
+def get_redis() -> redis.Redis:
+    """
+    Returns a process-wide Redis client for `settings.REDIS_URL`.
+    A new client (and connection pool) is created after a fork.
+    """
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        _client = new_redis()
+        _client_pid = os.getpid()
+    return _client
+
+
+def new_redis() -> redis.Redis:
+    """A Redis client with a connection pool of its own, e.g. for a native thread in a gevent worker."""
+    return redis.Redis.from_url(
+        settings.REDIS_URL,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    )
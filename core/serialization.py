@@ -0,0 +1,121 @@
+import json
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+
+from marshmallow import Schema, fields, utils
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_MISSING = object()
+# Private marshmallow internals the converters are matched against; when a marshmallow
+# release lacks one, the fields relying on it are dumped by `schema.dump` instead.
+_TEMPORAL_FIELD = getattr(fields, "_TemporalField", None)
+_FORMAT_NUM = getattr(fields.Number, "_format_num", None)
+
+Converter = Callable[[Any], Any]
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _text(value: Any) -> str:
+    return value if type(value) is str else utils.ensure_text_type(value)
+
+
+def _field_converter(field: fields.Field) -> Optional[Converter]:
+    """
+    A function doing what `field._serialize` does for a non-None value, or None when the
+    field can't be reproduced exactly (custom `_serialize`, dump defaults, method fields, ...).
+    """
+    if not getattr(field, "_CHECK_ATTRIBUTE", False) or getattr(field, "dump_default", None) is not utils.missing:
+        return None
+    serialize = type(field)._serialize
+    if serialize is fields.Field._serialize:
+        return _identity
+    if serialize is fields.String._serialize:
+        return _text
+    if serialize is fields.UUID._serialize:
+        return str
+    if (serialize is fields.Number._serialize and _FORMAT_NUM is not None
+            and getattr(type(field), "_format_num", None) is _FORMAT_NUM
+            and type(field).num_type is int and not field.as_string):
+        return int
+    if _TEMPORAL_FIELD is not None and serialize is _TEMPORAL_FIELD._serialize:
+        data_format = field.format or field.DEFAULT_FORMAT
+        format_func = field.SERIALIZATION_FUNCS.get(data_format)
+        return format_func or (lambda value: value.strftime(data_format))
+    if serialize is fields.List._serialize:
+        inner = _field_converter(field.inner)
+        if inner is None:
+            return None
+        return lambda value: [None if each is None else inner(each) for each in value]
+    if serialize is fields.Mapping._serialize:
+        if field.key_field is None and field.value_field is None:
+            return field.mapping_type
+        key = _identity if field.key_field is None else _field_converter(field.key_field)
+        item = _identity if field.value_field is None else _field_converter(field.value_field)
+        if key is None or item is None:
+            return None
+        mapping_type = field.mapping_type
+        return lambda value: mapping_type(
+            (None if k is None else key(k), None if v is None else item(v)) for k, v in value.items()
+        )
+    if serialize is fields.Nested._serialize:
+        nested = compile_dumper(field.schema)
+        if field.schema.many or field.many:
+            return lambda value: [nested(each) for each in value]
+        return nested
+    return None
+
+
+def compile_dumper(schema: Schema) -> Callable[[Any], Dict[str, Any]]:
+    """
+    Returns a function equivalent to dumping one object with `schema`, with every field's
+    key, attribute and converter resolved here rather than on each call. Objects and
+    mappings (e.g. row mappings) are both read like marshmallow does. Schemas it can't
+    reproduce exactly (dump hooks, dotted attributes, unsupported fields) get `schema.dump`.
+    """
+    fallback = lambda obj: schema.dump(obj, many=False)
+    hooks = getattr(schema, "_hooks", None)
+    if hooks is None or hooks.get("pre_dump") or hooks.get("post_dump"):
+        return fallback
+    steps = []
+    for name, field in schema.dump_fields.items():
+        attribute = field.attribute or name
+        converter = _field_converter(field)
+        if converter is None or "." in attribute:
+            return fallback
+        steps.append((field.data_key or name, attribute, converter))
+
+    def dump(obj: Any) -> Dict[str, Any]:
+        if isinstance(obj, Mapping):
+            get = obj.get
+        else:
+            get = lambda attribute, default: getattr(obj, attribute, default)
+        result = {}
+        for key, attribute, converter in steps:
+            value = get(attribute, _MISSING)
+            if value is _MISSING:
+                continue
+            result[key] = None if value is None else converter(value)
+        return result
+
+    return dump
+
+
+@lru_cache(maxsize=128)
+def dumper(schema: Schema) -> Callable[[Any], Dict[str, Any]]:
+    """`compile_dumper` once per schema instance."""
+    return compile_dumper(schema)
+
+
+def dumps(data: Any) -> bytes:
+    """JSON with sorted keys, like Flask's provider; through orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,77 @@
+"""
+Startup timing. With STARTUP_PROFILE=true, `create_app` prints how long each of its steps
+took. For an import-time breakdown by package as well, run
+
+    PYTHONPATH=$(pwd) python -m core.startup [api|worker]
+
+which starts a fresh interpreter with `-X importtime` and builds the app for that role.
+"""
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from core.config import settings
+
+_phases: List[Tuple[str, float]] = []
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    if not settings.STARTUP_PROFILE:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, time.perf_counter() - started))
+
+
+def report(role: str) -> None:
+    """Prints and resets the recorded phases."""
+    if not _phases:
+        return
+    total = sum(seconds for _, seconds in _phases)
+    steps = ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in _phases)
+    print(f"create_app({role}) took {total * 1000:.1f} ms: {steps}")
+    _phases.clear()
+
+
+def import_times(role: str) -> Tuple[Dict[str, float], str]:
+    """
+    Builds the app for `role` in a child interpreter under `-X importtime`. Returns the
+    import time per top-level package in seconds and the child's stdout.
+    """
+    code = f"from app import create_app; create_app(role={role!r})"
+    env = dict(os.environ, STARTUP_PROFILE="true")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=env, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "startup failed")
+    per_package: Dict[str, float] = defaultdict(float)
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        per_package[name.strip().split(".")[0]] += int(own) / 1_000_000
+    return dict(per_package), result.stdout
+
+
+def main(argv: List[str]) -> int:
+    role = argv[0] if argv else settings.PROCESS_ROLE
+    started = time.perf_counter()
+    per_package, output = import_times(role)
+    elapsed = time.perf_counter() - started
+    print(output.strip())
+    print(f"Imports: {sum(per_package.values()) * 1000:.1f} ms (process total {elapsed * 1000:.1f} ms)")
+    for name, seconds in sorted(per_package.items(), key=lambda item: item[1], reverse=True)[:20]:
+        print(f"  {name:<28} {seconds * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,3 +1,56 @@
+import time
+from typing import List, Optional
 
+import redis
 
+from .redis_client import get_redis
 
+# Counting semaphore stored as a sorted set: members are holder ids, scores are lease
+# expiry timestamps. Expired leases (e.g. of a worker that died) are purged on acquire.
+_ACQUIRE_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+local free = tonumber(ARGV[3]) - redis.call('ZCARD', KEYS[1])
+local acquired = {}
+for i = 4, #ARGV do
+    if free <= 0 then break end
+    if redis.call('ZADD', KEYS[1], ARGV[2], ARGV[i]) == 1 then
+        free = free - 1
+    end
+    table.insert(acquired, ARGV[i])
+end
+return acquired
+"""
+
+_acquire = None
+
+
+def _acquire_script():
+    global _acquire
+    if _acquire is None or _acquire.registered_client is not get_redis():
+        _acquire = get_redis().register_script(_ACQUIRE_SCRIPT)
+    return _acquire
+
+
+def available_slots(name: str, limit: int) -> int:
+    """Number of free slots in semaphore `name` of size `limit`."""
+    client = get_redis()
+    client.zremrangebyscore(name, "-inf", time.time())
+    return max(limit - client.zcard(name), 0)
+
+
+def acquire_slots(name: str, holders: List[str], limit: int, lease_seconds: float) -> List[str]:
+    """Atomically takes up to `limit` slots for `holders`, in order. Returns the holders that got one."""
+    if not holders:
+        return []
+    now = time.time()
+    acquired = _acquire_script()(keys=[name], args=[now, now + lease_seconds, limit, *holders])
+    return [h.decode() if isinstance(h, bytes) else h for h in acquired]
+
+
+def renew_slot(name: str, holder: str, lease_seconds: float, client: Optional[redis.Redis] = None) -> None:
+    """Extends the lease of a slot `holder` already owns."""
+    (client or get_redis()).zadd(name, {holder: time.time() + lease_seconds}, xx=True)
+
+
+def release_slot(name: str, holder: str) -> None:
+    get_redis().zrem(name, holder)
@@ -0,0 +1,12 @@
+from app import create_app
+from app.dispatcher import run_forever
+from core import metrics
+from core.config import settings
+
+app = create_app(settings, role="worker")
+
+if __name__ == "__main__":
+    if settings.METRICS_ENABLED and settings.METRICS_EXPORTER_PORT:
+        metrics.start_exporter(settings.METRICS_EXPORTER_PORT)
+    with app.app_context():
+        run_forever()
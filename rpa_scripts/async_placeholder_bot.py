@@ -0,0 +1,29 @@
+import asyncio
+
+async def run_script(job_id_str: str, parameters: dict, input_files_metadata: list, job_log_func, job_control=None):
+    """
+    A placeholder RPA bot script using the async interface, for bots that mostly wait on
+    portals, APIs or browser pages. `async def` scripts share one event loop per worker
+    process; on a gevent worker (see ASYNC_SCRIPTS_QUEUE) a waiting job then costs a
+    coroutine and a greenlet rather than a process.
+
+    Takes the same arguments as `placeholder_bot.run_script`, except that logging is awaited:
+        await job_log_func(job_id_str, level, message, source="script")
+    and on `job_control`, `heartbeat` and `save_artifact` are awaited too, while
+    `should_cancel()` / `raise_if_cancelled()` are plain calls. Cancelling the job also
+    cancels the script at its next `await`. Blocking calls (time.sleep, requests, ...)
+    stall every async job on the worker; use their asyncio counterparts.
+    """
+    source_name = __name__
+
+    await job_log_func(job_id_str, "SCRIPT_INFO", f"Async placeholder bot script '{source_name}' started.", source=source_name)
+    await job_log_func(job_id_str, "SCRIPT_INFO", f"Parameters received: {parameters}", source=source_name)
+
+    for i in range(3):
+        await job_log_func(job_id_str, "SCRIPT_INFO", f"Waiting... step {i+1}/3", source=source_name)
+        await asyncio.sleep(1)
+        if job_control:
+            await job_control.heartbeat(int((i + 1) * 100 / 3), f"Step {i+1}/3 done")
+
+    await job_log_func(job_id_str, "SCRIPT_INFO", f"Async placeholder bot script '{source_name}' finished successfully.", source=source_name)
+    return "Async placeholder script executed successfully. See logs for details."
@@ -1,6 +1,6 @@
 import time
 
-def run_script(job_id_str: str, parameters: dict, input_files_metadata: list, job_log_func):
+def run_script(job_id_str: str, parameters: dict, input_files_metadata: list, job_log_func, job_control=None):
     """
     A placeholder RPA bot script.
 
@@ -8,11 +8,19 @@ def run_script(job_id_str: str, parameters: dict, input_files_metadata: list, jo
         job_id_str (str): The ID of the current job (as a string).
         parameters (dict): Parameters provided for this job run.
         input_files_metadata (list): A list of dictionaries, each describing an uploaded file.
-                                    Example: [{'original_filename': 'invoice.pdf', 
-                                              'storage_path': '/path/to/uploads/job_id/invoice.pdf', 
-                                              'mimetype': 'application/pdf'}]
+                                    Example: [{'original_filename': 'invoice.pdf',
+                                              'storage_path': '/path/to/uploads/blobs/ab/cd/abcd...',
+                                              'mimetype': 'application/pdf', 'size': 48213,
+                                              'sha256': 'abcd...', 'upload_id': '...'}]
+                                    Files are content-addressed and shared between jobs: open
+                                    them read-only and copy before modifying.
         job_log_func (function): A function to call for logging, e.g., 
                                  job_log_func(job_id_str_or_uuid, level, message, source="script")
+        job_control (JobControl, optional): Passed when the script accepts it. Call
+                                 job_control.raise_if_cancelled() between steps and
+                                 job_control.heartbeat(progress_percent, progress_message)
+                                 to report progress, and job_control.save_artifact(name, data)
+                                 to store output files (file objects, bytes or text).
     """
     source_name = __name__ 
 
@@ -29,8 +37,12 @@ def run_script(job_id_str: str, parameters: dict, input_files_metadata: list, jo
 
 
     for i in range(3): 
+        if job_control:
+            job_control.raise_if_cancelled()
         job_log_func(job_id_str, "SCRIPT_INFO", f"Working... step {i+1}/3", source=source_name)
         time.sleep(1) 
+        if job_control:
+            job_control.heartbeat(int((i + 1) * 100 / 3), f"Step {i+1}/3 done")
 
     job_log_func(job_id_str, "SCRIPT_INFO", f"Placeholder bot script '{source_name}' finished successfully.", source=source_name)
     return "Placeholder script executed successfully. See logs for details."
\ No newline at end of file
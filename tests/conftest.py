@@ -0,0 +1,4 @@
+import os
+
+# core.config builds the database URL at import time; these tests never connect.
+os.environ.setdefault("DATABASE_HOST", "localhost")
@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.models.bot_model import BotConfiguration
+from app.schemas.bot_schema import bot_config_schema, bot_configs_schema, sparse_bot_configs_schema
+from core import serialization
+
+
+def _full_bot():
+    return BotConfiguration(
+        id=uuid4(),
+        name="invoice-bot",
+        description="Downloads invoices",
+        script_identifier="invoices.run",
+        parameter_schema={
+            "month": {"type": "integer", "label": "Month", "required": True, "default_value": 1, "options": None},
+            "portal": {"type": "string", "label": "Portal", "options": ["a", "b"]},
+        },
+        default_parameters={"month": 1, "dry_run": False},
+        is_enabled=True,
+        max_concurrency=3,
+        dispatch_weight=2,
+        execution_mode="subprocess",
+        timeout_seconds=600,
+        cpu_time_limit=60,
+        memory_limit_mb=512,
+        result_cache_ttl=300,
+        max_retries=2,
+        retry_backoff_seconds=10,
+        retry_backoff_max_seconds=120,
+        retry_on=["ConnectionError", "TimeoutError"],
+        created_by=uuid4(),
+        created_at=datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+        updated_at=datetime(2026, 2, 3, 4, 5, 6, tzinfo=timezone.utc),
+    )
+
+
+def _sparse_bot():
+    # Only the required columns set: every nullable field is None.
+    return BotConfiguration(
+        id=uuid4(),
+        name="minimal-bot",
+        script_identifier="minimal.run",
+        is_enabled=False,
+        dispatch_weight=1,
+        execution_mode="inline",
+        created_at=datetime(2026, 3, 4, 5, 6, 7, tzinfo=timezone.utc),
+    )
+
+
+def test_bot_schemas_are_compiled():
+    # Otherwise the comparisons below would only compare schema.dump with itself.
+    for schema in (bot_config_schema, bot_configs_schema, sparse_bot_configs_schema(["id", "name"])[0]):
+        assert serialization.dumper(schema).__name__ == "dump"
+
+
+@pytest.mark.parametrize("make_bot", [_full_bot, _sparse_bot])
+def test_dumper_matches_schema_dump(make_bot):
+    bot = make_bot()
+    assert serialization.dumper(bot_config_schema)(bot) == bot_config_schema.dump(bot)
+
+
+def test_list_dumper_matches_schema_dump():
+    bots = [_full_bot(), _sparse_bot()]
+    dump = serialization.dumper(bot_configs_schema)
+    assert [dump(bot) for bot in bots] == bot_configs_schema.dump(bots)
+
+
+@pytest.mark.parametrize("output_fields", [
+    ["id", "name"],
+    ["id", "name", "created_by", "updated_at", "created_at"],
+    ["parameter_schema", "default_parameters", "retry_on", "max_concurrency", "timeout_seconds"],
+])
+@pytest.mark.parametrize("make_bot", [_full_bot, _sparse_bot])
+def test_sparse_dumper_matches_schema_dump_of_row_mappings(output_fields, make_bot):
+    schema, columns = sparse_bot_configs_schema(output_fields)
+    bot = make_bot()
+    # What get_all_bot_configs returns for sparse fieldsets: a mapping of the selected columns.
+    row = {column: getattr(bot, column) for column in columns}
+    assert serialization.dumper(schema)(row) == schema.dump([row])[0]
+
+
+def test_dumps_is_sorted_json():
+    bot = _full_bot()
+    data = serialization.dumper(bot_config_schema)(bot)
+    assert serialization.dumps(data).decode().startswith('{"cpu_time_limit":60,"created_at":"2026-01-02T03:04:05.678901+00:00"')
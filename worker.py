@@ -0,0 +1,16 @@
+"""
+Celery worker entry point:
+
+    PYTHONPATH=$(pwd) celery -A worker.celery worker -l info -P gevent
+
+Builds the app with the worker role (worker pool settings, no HTTP routes), which also
+registers the tasks. With the prefork pool, children are forked after the app is built
+and the scripts are preloaded (see `app.tasks._preload_worker`).
+"""
+from app import create_app
+from app.celery_app import celery
+from core.config import settings
+
+app = create_app(settings, role="worker")
+
+__all__ = ["app", "celery"]